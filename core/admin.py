@@ -2,11 +2,92 @@
 Django admin customization
 """
 
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.functions import Substr
+from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
-from core.models import User, Post, Tag
+from core.deletion import delete_posts, schedule_user_deletion
+from core.models import User, Post, Tag, Task, Course
+
+CONTENT_PREVIEW_LENGTH = 100
+
+
+def estimated_count(model, using='default'):
+    """Return the planner's row estimate for a model's table"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using pg_class.reltuples for large unfiltered querysets"""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_count(self.object_list.model,
+                                       self.object_list.db)
+            if estimate and estimate >= settings.ADMIN_ESTIMATED_COUNT_MIN:
+                return estimate
+        return super().count
+
+
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """Related filter using the admin autocomplete instead of listing rows"""
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin,
+                 field_path):
+        self.admin_site = model_admin.admin_site
+        super().__init__(field, request, params, model, model_admin,
+                         field_path)
+
+    def field_choices(self, field, request, model_admin):
+        # Only the selected object is loaded, to label the current choice.
+        if not self.lookup_val:
+            return []
+        return field.get_choices(include_blank=False,
+                                 limit_choices_to={'pk': self.lookup_val})
+
+    def has_output(self):
+        return True
+
+    def widget(self):
+        """Render a select2 widget backed by the admin autocomplete view"""
+        form_field = forms.ModelChoiceField(
+            queryset=self.field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(self.field,
+                                      self.admin_site,
+                                      attrs={'style': 'width: 100%'}),
+            required=False,
+        )
+        return form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+
+
+class PostChangeList(ChangeList):
+    """Changelist that never loads full post content"""
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('content').annotate(
+            content_preview=Substr('content', 1, CONTENT_PREVIEW_LENGTH),
+        )
 
 
 class UserAdmin(BaseUserAdmin):
@@ -25,10 +106,11 @@ class UserAdmin(BaseUserAdmin):
                  'user_permissions'
                  ),
         }),
-        (_('Important Dates'), {'fields': ('last_login',)}),
+        (_('Important Dates'), {'fields': ('last_login',
+                                           'deletion_requested_at')}),
     )
     search_fields = ('email',)
-    readonly_fields = ['last_login']
+    readonly_fields = ['last_login', 'deletion_requested_at']
     add_fieldsets = (
         (None, {'classes': ('wide',),
                 'fields':
@@ -43,16 +125,81 @@ class UserAdmin(BaseUserAdmin):
                 }),
     )
 
+    def get_deleted_objects(self, objs, request):
+        """Summarize dependents with counts instead of collecting them"""
+        users = list(objs)
+        model_count = {
+            User._meta.verbose_name_plural: len(users),
+            Post._meta.verbose_name_plural:
+                Post.objects.filter(by__in=users).count(),
+            Tag._meta.verbose_name_plural:
+                Tag.objects.filter(user__in=users).count(),
+        }
+        perms_needed = {
+            model._meta.verbose_name for model in (User, Post, Tag)
+            if not self.admin_site._registry[model].has_delete_permission(
+                request)
+        }
+        return [str(user) for user in users], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        """Deactivate the user and leave the rest to purge_users"""
+        schedule_user_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+
 
 class PostAdmin(admin.ModelAdmin):
     """Define admin pages for posts"""
-    list_display = ['title', 'content', 'created_at', 'read_time_min', 'image']
-    list_filter = ['created_at', 'status', 'by']
+    list_display = ['title', 'content_preview', 'by', 'status', 'created_at',
+                    'read_time_min', 'image']
+    list_filter = ['status', ('by', AutocompleteFilter)]
+    list_select_related = ['by']
+    date_hierarchy = 'created_date'
     search_fields = ['title', 'content', 'by__email', 'by__name']
+    autocomplete_fields = ['by']
     prepopulated_fields = {'slug': ('title',)}
     readonly_fields = ['created_at', 'updated_at']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        field = Post._meta.get_field('by')
+        return super().media + AutocompleteSelect(field, self.admin_site).media
+
+    def get_changelist(self, request, **kwargs):
+        return PostChangeList
+
+    def delete_queryset(self, request, queryset):
+        delete_posts(queryset)
+
+    @admin.display(description=_('Content'))
+    def content_preview(self, obj):
+        return obj.content_preview
+
+
+class TaskAdmin(admin.ModelAdmin):
+    """Define admin pages for background tasks"""
+    list_display = ['name', 'status', 'attempts', 'run_at', 'created_at']
+    list_filter = ['status', 'name']
+    readonly_fields = ['created_at', 'locked_at', 'last_error']
+
+
+class CourseAdmin(admin.ModelAdmin):
+    """Define admin pages for courses"""
+    list_display = ['title', 'by', 'status', 'created_at']
+    list_filter = ['status']
+    list_select_related = ['by']
+    search_fields = ['title', 'by__email']
+    autocomplete_fields = ['by']
+    readonly_fields = ['created_at', 'updated_at']
 
 
 admin.site.register(User, UserAdmin)
 admin.site.register(Post, PostAdmin)
 admin.site.register(Tag)
+admin.site.register(Task, TaskAdmin)
+admin.site.register(Course, CourseAdmin)
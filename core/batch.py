@@ -0,0 +1,142 @@
+"""
+Batched dispatch of several API requests in one round trip
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+METHODS = SAFE_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class SubRequestSerializer(serializers.Serializer):
+    """Serializer for one request inside a batch"""
+    method = serializers.ChoiceField(choices=METHODS, default='GET')
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        path = urlsplit(value).path
+        if not path.startswith('/api/') or path.rstrip('/') == '/api/batch':
+            raise serializers.ValidationError(
+                'Only API endpoints other than the batch can be requested.')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for a batch of API requests"""
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'At most {settings.BATCH_MAX_REQUESTS} requests can be '
+                f'batched.')
+        return value
+
+
+def build_request(parent, method, path, body=None):
+    """Return a request for path that reuses the parent's authentication"""
+    url = urlsplit(path)
+    payload = b'' if body is None else json.dumps(body).encode()
+    request = WSGIRequest({
+        **parent.META,
+        'REQUEST_METHOD': method,
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(payload)),
+        'wsgi.input': io.BytesIO(payload),
+    })
+    request.user = parent.user
+    if parent.user.is_authenticated:
+        # DRF skips the view's authenticators for forced credentials.
+        request._force_auth_user = parent.user
+        request._force_auth_token = parent.auth
+    return request
+
+
+def _content(response):
+    content_type = response.get('Content-Type', '')
+    if not response.content:
+        return None
+    if content_type.startswith('application/json'):
+        return json.loads(response.content)
+    return response.content.decode(response.charset)
+
+
+def execute(parent, item):
+    """Resolve and run one request, returning its status and body"""
+    request = build_request(parent, item['method'], item['path'],
+                            item.get('body'))
+    try:
+        match = resolve(request.path_info)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except (Resolver404, Http404):
+        return {'status': 404, 'body': {'detail': 'Not found.'}}
+    except PermissionDenied:
+        return {'status': 403, 'body': {'detail': 'Permission denied.'}}
+    except Exception:
+        logger.exception('Batched request to %s failed', item['path'])
+        return {'status': 500, 'body': {'detail': 'Server error.'}}
+
+    if response.streaming:
+        return {'status': 400,
+                'body': {'detail': 'Streaming responses cannot be batched.'}}
+    return {'status': response.status_code, 'body': _content(response)}
+
+
+def _execute_in_thread(parent, item):
+    try:
+        return execute(parent, item)
+    finally:
+        # Worker threads open their own connections; do not leak them.
+        connections.close_all()
+
+
+def run_batch(parent, items):
+    """Run batched requests and return their responses in order.
+
+    Consecutive read requests run concurrently on up to
+    BATCH_MAX_WORKERS threads. Writes run one at a time, in order, and
+    only after the reads before them have finished.
+    """
+    results = [None] * len(items)
+    reads = []
+
+    def run_reads():
+        if len(reads) > 1 and settings.BATCH_MAX_WORKERS > 1:
+            workers = min(len(reads), settings.BATCH_MAX_WORKERS)
+            with ThreadPoolExecutor(workers) as pool:
+                responses = pool.map(
+                    lambda index: _execute_in_thread(parent, items[index]),
+                    reads)
+                for index, response in zip(reads, responses):
+                    results[index] = response
+        else:
+            for index in reads:
+                results[index] = execute(parent, items[index])
+        reads.clear()
+
+    for index, item in enumerate(items):
+        if item['method'] in SAFE_METHODS:
+            reads.append(index)
+        else:
+            run_reads()
+            results[index] = execute(parent, item)
+    run_reads()
+    return results
@@ -0,0 +1,40 @@
+"""
+Compact sets of small integers stored as little-endian bytes
+"""
+
+
+def to_int(data):
+    """Return the bitset stored in data as an int"""
+    return int.from_bytes(bytes(data or b''), 'little')
+
+
+def to_bytes(value):
+    """Return the shortest bytes storing the bitset value"""
+    return value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+
+def add(data, index):
+    """Return data with the bit at index set"""
+    return to_bytes(to_int(data) | 1 << index)
+
+
+def discard(data, index):
+    """Return data with the bit at index cleared"""
+    return to_bytes(to_int(data) & ~(1 << index))
+
+
+def count(value):
+    """Return the number of bits set in an int bitset"""
+    return bin(value).count('1')
+
+
+def members(value):
+    """Return the indexes of the bits set in an int bitset"""
+    indexes = []
+    index = 0
+    while value:
+        if value & 1:
+            indexes.append(index)
+        value >>= 1
+        index += 1
+    return indexes
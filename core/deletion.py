@@ -0,0 +1,105 @@
+"""
+Deferred, batched deletion of users and their content
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Post, Tag
+from post.bulk import touch_posts
+from post.tasks import refresh_related_posts_many
+
+
+def schedule_user_deletion(user):
+    """Deactivate a user now and queue the purge of their content"""
+    from core.tasks import purge_scheduled_user
+
+    user.is_active = False
+    user.deletion_requested_at = timezone.now()
+    user.save(update_fields=['is_active', 'deletion_requested_at'])
+    purge_scheduled_user.delay(user.pk)
+
+
+def _delete_files(storage, names):
+    for name in names:
+        storage.delete(name)
+
+
+def delete_posts(queryset, batch_size=None, progress=None):
+    """Delete posts in bounded transactions, removing their image files.
+
+    Each batch deletes the post tags and posts of at most `batch_size`
+    posts, and `progress` is called with the running total afterwards.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    storage = Post._meta.get_field('image').storage
+    total = 0
+    while True:
+        batch = list(queryset.order_by('pk').values_list('pk', 'image')
+                     [:batch_size])
+        if not batch:
+            return total
+        ids = [pk for pk, image in batch]
+        images = [image for pk, image in batch if image]
+        with transaction.atomic():
+            Post.tags.through.objects.filter(post_id__in=ids).delete()
+            Post.objects.filter(pk__in=ids).delete()
+            transaction.on_commit(
+                lambda images=images: _delete_files(storage, images)
+            )
+        total += len(ids)
+        if progress:
+            progress(total)
+
+
+def delete_tags(queryset, batch_size=None, progress=None):
+    """Delete tags and their post links in bounded transactions"""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    total = 0
+    while True:
+        ids = list(queryset.order_by('pk').values_list('pk', flat=True)
+                   [:batch_size])
+        if not ids:
+            return total
+        with transaction.atomic():
+            links = Post.tags.through.objects.filter(tag_id__in=ids)
+            # The tagged posts are only known before their links go.
+            post_ids = list(links.values_list('post_id', flat=True)
+                            .distinct())
+            touch_posts(post_ids)
+            links.delete()
+            Tag.objects.filter(pk__in=ids).delete()
+            if post_ids:
+                refresh_related_posts_many.delay(post_ids)
+        total += len(ids)
+        if progress:
+            progress(total)
+
+
+def purge_user(user, batch_size=None, progress=None):
+    """Delete a user's posts and tags in batches, then the user.
+
+    `progress` is called with the model name and the running total of
+    deleted rows. Returns the number of deleted rows per model.
+    """
+    def report(name):
+        if progress:
+            return lambda total: progress(name, total)
+
+    counts = {
+        'posts': delete_posts(Post.objects.filter(by=user), batch_size,
+                              report('posts')),
+        'tags': delete_tags(Tag.objects.filter(user=user), batch_size,
+                            report('tags')),
+    }
+    user.delete()
+    counts['users'] = 1
+    return counts
+
+
+def users_pending_deletion():
+    """Return users whose deletion was scheduled"""
+    return get_user_model().objects.filter(
+        deletion_requested_at__isnull=False
+    ).order_by('deletion_requested_at')
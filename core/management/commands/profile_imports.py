@@ -0,0 +1,74 @@
+"""
+Django command to profile the imports made while a worker boots
+"""
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# What a web worker imports before serving its first request.
+BOOT = (
+    'import sys, django; django.setup(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns; '
+    'print(*sys.modules, sep="\\n")'
+)
+
+
+def parse_importtime(output):
+    """Return the self time in microseconds of each module in the output"""
+    timings = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, _, module = line[len('import time:'):].split('|')
+        if self_us.strip().isdigit():
+            timings[module.strip()] = int(self_us)
+    return timings
+
+
+def boot_imports(api_only=False):
+    """Boot the app in a fresh interpreter and return its import timings.
+
+    -X importtime does not time modules loaded through importlib, such as
+    the installed apps; they are listed with a self time of zero.
+    """
+    env = {**os.environ, 'API_ONLY': '1' if api_only else '0'}
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'main_project.settings')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise CommandError(f'Booting the app failed:\n{result.stderr}')
+    timings = dict.fromkeys(result.stdout.split(), 0)
+    timings.update(parse_importtime(result.stderr))
+    return timings
+
+
+class Command(BaseCommand):
+    """Django command to profile the imports made while a worker boots"""
+    help = 'Show the packages that take the most time to import at boot.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument('--api-only', action='store_true',
+                            help='Boot with the API_ONLY profile')
+        parser.add_argument('--modules', action='store_true',
+                            help='Report modules instead of packages')
+
+    def handle(self, *args, **options):
+        timings = boot_imports(options['api_only'])
+        totals = Counter()
+        for module, self_us in timings.items():
+            key = module if options['modules'] else module.split('.')[0]
+            totals[key] += self_us
+
+        self.stdout.write(
+            f'Imported {len(timings)} modules in '
+            f'{sum(timings.values()) / 1000:.0f} ms.'
+        )
+        for name, self_us in totals.most_common(options['limit']):
+            self.stdout.write(f'{self_us / 1000:8.1f} ms  {name}')
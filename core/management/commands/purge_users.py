@@ -0,0 +1,27 @@
+"""
+Django command to delete users scheduled for deletion
+"""
+from django.core.management import BaseCommand
+
+from core.deletion import purge_user, users_pending_deletion
+
+
+class Command(BaseCommand):
+    """Django command to delete users scheduled for deletion"""
+    help = 'Delete scheduled users and their posts and tags in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        def progress(name, total):
+            self.stdout.write(f'  deleted {total} {name}')
+
+        users = users_pending_deletion()
+        for user in users:
+            self.stdout.write(f'Purging {user.email}...')
+            counts = purge_user(user, options['batch_size'], progress)
+            self.stdout.write(self.style.SUCCESS(
+                f'Purged {user.email}: {counts["posts"]} posts, '
+                f'{counts["tags"]} tags'
+            ))
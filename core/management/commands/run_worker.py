@@ -0,0 +1,86 @@
+"""
+Django command to run background tasks from the database queue
+"""
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection
+from django.utils.module_loading import autodiscover_modules
+
+from core import queue
+
+
+class Command(BaseCommand):
+    """Django command to run background tasks from the database queue"""
+    help = 'Process queued background tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int,
+                            default=settings.TASK_WORKER_CONCURRENCY,
+                            help='Number of worker threads')
+        parser.add_argument('--poll-interval', type=float,
+                            default=settings.TASK_POLL_INTERVAL,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty')
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        self.stopping = threading.Event()
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(
+                    signum, lambda *args: self.stopping.set())
+        try:
+            self.start_workers(options)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def start_workers(self, options):
+        """Start the worker threads and wait for them to stop"""
+        requeued = queue.requeue_stale()
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale tasks')
+
+        concurrency = options['concurrency']
+        self.stdout.write(f'Starting {concurrency} worker threads...')
+        if concurrency == 1:
+            self.work(options['poll_interval'], options['once'])
+        else:
+            threads = [
+                threading.Thread(target=self.work,
+                                 args=(options['poll_interval'],
+                                       options['once']))
+                for _ in range(concurrency)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.stdout.write(self.style.SUCCESS('Worker stopped'))
+
+    def work(self, poll_interval, once):
+        """Claim and run tasks one by one until stopped"""
+        try:
+            while not self.stopping.is_set():
+                tasks = queue.claim_tasks()
+                if not tasks:
+                    if once:
+                        return
+                    self.stopping.wait(poll_interval)
+                    continue
+                for claimed in tasks:
+                    if queue.run_task(claimed):
+                        self.stdout.write(f'Task {claimed.name} done')
+                    else:
+                        self.stderr.write(
+                            f'Task {claimed.name} failed '
+                            f'(attempt {claimed.attempts})'
+                        )
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
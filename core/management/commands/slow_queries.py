@@ -0,0 +1,43 @@
+"""
+Django command to show the slowest sampled queries
+"""
+import json
+
+from django.core.management import BaseCommand
+
+from core.models import SlowQuery
+from core.slowlog import top_offenders
+
+
+class Command(BaseCommand):
+    """Django command to show the slowest sampled queries"""
+    help = 'Show query shapes with the most sampled slow time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10)
+        parser.add_argument('--plan', action='store_true',
+                            help='Print the plan of the slowest sample')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete all samples')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} samples.'))
+            return
+
+        offenders = top_offenders(options['limit'])
+        if not offenders:
+            self.stdout.write('No slow queries sampled.')
+        for rank, offender in enumerate(offenders, 1):
+            self.stdout.write(
+                f'{rank}. {offender["total_ms"]:.0f} ms total, '
+                f'{offender["samples"]} samples, '
+                f'avg {offender["avg_ms"]:.0f} ms, '
+                f'max {offender["max_ms"]:.0f} ms, '
+                f'view {offender["view"] or "-"}'
+            )
+            self.stdout.write(f'   {offender["fingerprint"]}')
+            if options['plan'] and offender['plan']:
+                self.stdout.write(json.dumps(offender['plan'], indent=2))
@@ -0,0 +1,64 @@
+"""
+Middleware for the core app
+"""
+import logging
+
+from django.conf import settings
+
+from core.queries import QueryBudgetExceeded, QueryTracker, view_budget
+from core.slowlog import current_view
+
+logger = logging.getLogger(__name__)
+
+
+class QueryInspectorMiddleware:
+    """Flag requests that repeat query shapes or exceed their budget.
+
+    QUERY_INSPECTOR selects the mode: 'off', 'warn' to log problems and
+    add an X-Query-Count header, or 'raise' to fail the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_INSPECTOR
+        if mode == 'off':
+            return self.get_response(request)
+
+        request.query_budget = None
+        with QueryTracker() as tracker:
+            response = self.get_response(request)
+
+        problems = tracker.problems(request.query_budget)
+        if problems:
+            message = (f'{request.method} {request.path}: ' +
+                       '; '.join(problems))
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning('Query inspector: %s', message)
+        if mode == 'warn':
+            response['X-Query-Count'] = str(tracker.count)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, 'query_budget'):
+            request.query_budget = view_budget(view_func, request.method)
+
+
+class SlowQueryContextMiddleware:
+    """Tag slow queries sampled during a request with the view serving it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_view.set(f'{request.method} {request.path}')
+        try:
+            return self.get_response(request)
+        finally:
+            current_view.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_view.set(
+            f'{request.method} {request.resolver_match.view_name}')
@@ -0,0 +1,54 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:25
+
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.text import slugify
+import django.utils.timezone
+
+
+def backfill_created_date(apps, schema_editor):
+    """Set created_date from created_at and rename colliding slugs"""
+    Post = apps.get_model('core', 'Post')
+    used = set()
+    posts = list(Post.objects.order_by('id'))
+    for post in posts:
+        post.created_date = timezone.localdate(post.created_at)
+        base = (post.slug or slugify(post.title))[:240].strip('-') or 'post'
+        slug, suffix = base, 1
+        while (post.created_date, slug) in used:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        post.slug = slug
+        used.add((post.created_date, slug))
+    Post.objects.bulk_update(posts, ['created_date', 'slug'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_post_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='created_date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=250),
+        ),
+        migrations.RunPython(backfill_created_date,
+                             migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(related_name='posts', to='core.Tag'),
+        ),
+        migrations.AddConstraint(
+            model_name='post',
+            constraint=models.UniqueConstraint(fields=('created_date', 'slug'), name='unique_post_slug_per_date'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_post_created_date_slug_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-created_at'], name='core_post_created_at_idx'),
+        ),
+    ]
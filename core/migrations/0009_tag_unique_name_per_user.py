@@ -0,0 +1,36 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:29
+
+from django.db import migrations, models
+
+MERGE_DUPLICATE_TAGS = """
+CREATE TEMP TABLE duplicate_tag ON COMMIT DROP AS
+SELECT id, keep_id FROM (
+    SELECT id, MIN(id) OVER (PARTITION BY user_id, name) AS keep_id
+    FROM core_tag
+) ranked WHERE id <> keep_id;
+
+INSERT INTO core_post_tags (post_id, tag_id)
+SELECT pt.post_id, d.keep_id FROM core_post_tags pt
+JOIN duplicate_tag d ON d.id = pt.tag_id
+ON CONFLICT DO NOTHING;
+
+DELETE FROM core_post_tags pt USING duplicate_tag d WHERE pt.tag_id = d.id;
+DELETE FROM core_tag t USING duplicate_tag d WHERE t.id = d.id;
+DROP TABLE duplicate_tag;
+SET CONSTRAINTS ALL IMMEDIATE;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_post_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunSQL(MERGE_DUPLICATE_TAGS, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='unique_tag_name_per_user'),
+        ),
+    ]
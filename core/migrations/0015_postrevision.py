@@ -0,0 +1,44 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_post_content_html'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=500)),
+                ('is_snapshot', models.BooleanField(default=False)),
+                ('content', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='core.post')),
+            ],
+            options={
+                'ordering': ['-number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_post_revision_number'),
+        ),
+        # Existing posts start their history with a snapshot of their
+        # current version.
+        migrations.RunSQL(
+            sql=(
+                'INSERT INTO core_postrevision '
+                '(post_id, number, title, is_snapshot, content, created_at) '
+                'SELECT id, 1, title, true, to_jsonb(content), updated_at '
+                'FROM core_post'
+            ),
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
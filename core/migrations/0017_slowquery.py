@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-19 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_post_changes_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.TextField()),
+                ('sql', models.TextField()),
+                ('duration_ms', models.FloatField()),
+                ('view', models.CharField(blank=True, max_length=255)),
+                ('plan', models.JSONField(blank=True, null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
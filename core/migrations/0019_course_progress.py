@@ -0,0 +1,66 @@
+# Generated by Django 3.2.25 on 2026-10-19 06:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def number_lessons(apps, schema_editor):
+    """Give existing lessons their course index and build the masks"""
+    Course = apps.get_model('core', 'Course')
+    Lesson = apps.get_model('core', 'Lesson')
+    lessons = list(Lesson.objects.order_by('id').values_list(
+        'id', 'module__course_id'))
+    slots = {}
+    for lesson_id, course_id in lessons:
+        index = slots.get(course_id, 0)
+        slots[course_id] = index + 1
+        Lesson.objects.filter(pk=lesson_id).update(index=index)
+    for course_id, count in slots.items():
+        mask = (1 << count) - 1
+        Course.objects.filter(pk=course_id).update(
+            lesson_slots=count,
+            lesson_mask=mask.to_bytes((count + 7) // 8, 'little'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_course_outline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_mask',
+            field=models.BinaryField(default=bytes),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_slots',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='index',
+            field=models.PositiveIntegerField(default=0, editable=False),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_lessons, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='CourseProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read', models.BinaryField(default=bytes)),
+                ('completed', models.BinaryField(default=bytes)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='core.course')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='course_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='courseprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'course'), name='unique_course_progress'),
+        ),
+    ]
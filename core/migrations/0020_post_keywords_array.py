@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-19 06:13
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_course_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='keyword_list',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, size=None),
+        ),
+        # Split the comma separated keywords like post.keywords does:
+        # whitespace collapsed, lower case, first occurrence kept.
+        migrations.RunSQL(
+            sql=(
+                'UPDATE core_post SET keyword_list = ARRAY('
+                'SELECT name FROM ('
+                r"SELECT left(lower(btrim(regexp_replace(k, '\s+', ' ', "
+                "'g'))), 100) AS name, min(n) AS n "
+                "FROM unnest(string_to_array(keywords, ',')) "
+                'WITH ORDINALITY AS t (k, n) GROUP BY 1) AS s '
+                "WHERE name <> '' ORDER BY n) "
+                "WHERE keywords <> ''"
+            ),
+            reverse_sql=(
+                "UPDATE core_post SET "
+                "keywords = array_to_string(keyword_list, ', ')"
+            ),
+        ),
+        # Blank so that reversing re-adds the column with an empty default.
+        migrations.AlterField(
+            model_name='post',
+            name='keywords',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='keywords',
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='keyword_list',
+            new_name='keywords',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['keywords'], name='core_post_keywords_gin'),
+        ),
+    ]
@@ -3,16 +3,26 @@ Database models.
 """
 import uuid
 import os
+import re
 
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db import models, connections, transaction, IntegrityError
+from django.db.models import Q
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin
 )
+from django.utils import timezone
 from django.utils.text import slugify
 
+from core import bitsets, rendering
+
+SLUG_MAX_LENGTH = 250
+SLUG_SAVE_ATTEMPTS = 5
+
 
 def post_image_file_path(instance, filename):
     """Generate file path for new image."""
@@ -52,53 +62,213 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    deletion_requested_at = models.DateTimeField(null=True, blank=True)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
 
-class Post(models.Model):
+class PostManager(models.Manager):
+    """Manager for posts."""
+
+    def allocate_slugs(self, requests):
+        """Return a unique slug for every (slug, date) pair in one query.
+
+        Existing `slug` and `slug-N` values on the same date are fetched at
+        once and the next free suffix is handed out, including to repeated
+        pairs in the same request.
+        """
+        requests = [(slug[:SLUG_MAX_LENGTH - 10].strip('-') or 'post', date)
+                    for slug, date in requests]
+        pairs = set(requests)
+        if not pairs:
+            return []
+
+        condition = Q()
+        for slug, date in pairs:
+            condition |= Q(created_date=date, slug__startswith=slug)
+        taken = {}
+        existing = self.get_queryset().filter(condition).values_list(
+            'created_date', 'slug')
+        for date, slug in existing:
+            taken.setdefault(date, set()).add(slug)
+
+        next_suffix = {}
+        slugs = []
+        for slug, date in requests:
+            if (slug, date) not in next_suffix:
+                used = taken.get(date, set())
+                pattern = re.compile(rf'^{re.escape(slug)}-(\d+)$')
+                suffixes = [int(match.group(1)) for match in
+                            map(pattern.match, used) if match]
+                next_suffix[(slug, date)] = max(suffixes, default=1) + 1
+                if slug not in used:
+                    slugs.append(slug)
+                    continue
+            suffix = next_suffix[(slug, date)]
+            next_suffix[(slug, date)] = suffix + 1
+            slugs.append(f'{slug}-{suffix}')
+
+        return slugs
+
+    def allocate_slug(self, slug, date):
+        """Return a unique slug for the given date"""
+        return self.allocate_slugs([(slug, date)])[0]
+
+
+class RenderedContent(models.Model):
+    """Markdown content stored along with its sanitized HTML rendering."""
+    content = models.TextField()
+    content_html = models.TextField(blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    render_version = models.PositiveSmallIntegerField(default=0,
+                                                      editable=False)
+
+    class Meta:
+        abstract = True
+
+    def render_content(self, force=False):
+        """Render content to HTML unless the stored rendering is current"""
+        fields = rendering.render_fields(self.content, self.content_hash,
+                                         self.render_version, force)
+        if fields is None:
+            return False
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if self.render_content() and update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'content_html',
+                                       'content_hash', 'render_version'}
+        return super().save(*args, **kwargs)
+
+
+class Post(RenderedContent):
     """Post in the system."""
     STATUS_CHOICES = (
         ('draft', 'Draft'),
         ('published', 'Published'),
     )
     title = models.CharField(max_length=500)
-    slug = models.SlugField(max_length=250,
-                            unique_for_date='created_at',
-                            blank=True
-                            )
+    slug = models.SlugField(max_length=SLUG_MAX_LENGTH, blank=True)
     by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='user',
     )
-    content = models.TextField()
     read_time_min = models.PositiveSmallIntegerField()
     status = models.CharField(max_length=10,
                               choices=STATUS_CHOICES,
                               default='draft',
                               )
     created_at = models.DateTimeField(auto_now_add=True)
+    created_date = models.DateField(default=timezone.localdate,
+                                    editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField('Tag', related_name='posts', blank=False)
-    keywords = models.TextField()
+    # Normalized by post.keywords, matched exactly through the GIN index.
+    keywords = ArrayField(models.CharField(max_length=100), default=list,
+                          blank=True)
     image = models.ImageField(null=True,
                               blank=True,
                               upload_to=post_image_file_path)
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = PostManager()
 
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Posts'
+        constraints = [
+            models.UniqueConstraint(fields=['created_date', 'slug'],
+                                    name='unique_post_slug_per_date'),
+        ]
+        indexes = [
+            models.Index(fields=['-created_at'],
+                         name='core_post_created_at_idx'),
+            models.Index(fields=['updated_at', 'id'],
+                         name='core_post_updated_at_idx'),
+            GinIndex(fields=['keywords'], name='core_post_keywords_gin'),
+        ]
 
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if self.slug:
+            # Edits lock the row before the UPDATE and keep it locked while
+            # post_save receivers record the revision, so concurrent edits
+            # are recorded in the order they commit.
+            with transaction.atomic():
+                if self.pk is not None:
+                    list(Post.objects.select_for_update().filter(pk=self.pk)
+                         .values_list('pk'))
+                return super().save(*args, **kwargs)
+
+        # The unique constraint is the source of truth; a concurrent insert
+        # that took the allocated slug makes us allocate again.
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = Post.objects.allocate_slug(slugify(self.title),
+                                                   self.created_date)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                collided = Post.objects.filter(
+                    created_date=self.created_date, slug=self.slug
+                ).exclude(pk=self.pk).exists()
+                self.slug = ''
+                if not collided or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+
+
+class TagManager(models.Manager):
+    """Manager for tags."""
+
+    def resolve(self, user, names):
+        """Return the user's tags for names, creating missing ones.
+
+        On PostgreSQL this is one INSERT ... ON CONFLICT DO NOTHING RETURNING
+        statement that also selects the tags which already existed.
+        """
+        names = list(dict.fromkeys(names))
+        if not names:
+            return []
+        user_id = getattr(user, 'pk', user)
+
+        if connections[self.db].vendor == 'postgresql':
+            table = self.model._meta.db_table
+            tags = list(self.raw(
+                f'WITH input (name) AS (SELECT unnest(%s::varchar[])), '
+                f'inserted AS ('
+                f'INSERT INTO {table} (name, user_id) '
+                f'SELECT name, %s FROM input '
+                f'ON CONFLICT (user_id, name) DO NOTHING '
+                f'RETURNING id, name, user_id) '
+                f'SELECT id, name, user_id FROM inserted '
+                f'UNION ALL '
+                f'SELECT t.id, t.name, t.user_id FROM {table} t '
+                f'JOIN input i ON i.name = t.name WHERE t.user_id = %s',
+                [names, user_id, user_id],
+            ))
+        else:
+            self.bulk_create([self.model(user_id=user_id, name=name)
+                              for name in names], ignore_conflicts=True)
+            tags = []
+
+        by_name = {tag.name: tag for tag in tags}
+        missing = [name for name in names if name not in by_name]
+        if missing:
+            # Rows committed by a concurrent insert after our statement
+            # started are invisible to it, so fetch them separately.
+            by_name.update(
+                (tag.name, tag) for tag in
+                self.filter(user_id=user_id, name__in=missing)
+            )
+        return [by_name[name] for name in names]
 
 
 class Tag(models.Model):
@@ -109,5 +279,245 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = TagManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'],
+                                    name='unique_tag_name_per_user'),
+        ]
+
     def __str__(self):
         return self.name
+
+
+class RelatedPost(models.Model):
+    """Precomputed tag similarity between two posts."""
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='related_posts')
+    related = models.ForeignKey(Post,
+                                on_delete=models.CASCADE,
+                                related_name='related_from')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'],
+                                    name='unique_related_post'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id}'
+
+
+class TrendingPost(models.Model):
+    """Time decayed view score of a recently viewed post."""
+    post = models.OneToOneField(Post,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='trending')
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return str(self.post_id)
+
+
+class PostRevision(models.Model):
+    """Saved version of a post, stored as a snapshot or a line delta."""
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='revisions')
+    number = models.PositiveIntegerField()
+    title = models.CharField(max_length=500)
+    is_snapshot = models.BooleanField(default=False)
+    # The full content for snapshots, otherwise the delta ops that turn
+    # the previous revision's content into this one.
+    content = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'],
+                                    name='unique_post_revision_number'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} #{self.number}'
+
+
+class PostTombstone(models.Model):
+    """Marker left behind by a deleted post for incremental sync."""
+    post_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'post_id'],
+                         name='core_tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.post_id)
+
+
+class Course(models.Model):
+    """Course made of ordered modules of ordered lessons."""
+    title = models.CharField(max_length=500)
+    description = models.TextField(blank=True)
+    by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='courses',
+    )
+    status = models.CharField(max_length=10,
+                              choices=Post.STATUS_CHOICES,
+                              default='draft',
+                              )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Lesson indexes handed out so far, and the bitset of the indexes of
+    # live lessons that progress bitsets are counted against.
+    lesson_slots = models.PositiveIntegerField(default=0, editable=False)
+    lesson_mask = models.BinaryField(default=bytes)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.title
+
+
+class Module(models.Model):
+    """Section of a course at a position among the course's modules."""
+    # Indexed by the position constraint, which leads with the course.
+    course = models.ForeignKey(Course,
+                               on_delete=models.CASCADE,
+                               related_name='modules',
+                               db_index=False)
+    title = models.CharField(max_length=500)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['course', 'position']
+        constraints = [
+            # Deferred so a reorder can shift siblings in one statement.
+            models.UniqueConstraint(fields=['course', 'position'],
+                                    name='unique_module_position',
+                                    deferrable=models.Deferrable.DEFERRED),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class Lesson(RenderedContent):
+    """Lesson of a module at a position among the module's lessons."""
+    # Indexed by the position constraint, which leads with the module.
+    module = models.ForeignKey(Module,
+                               on_delete=models.CASCADE,
+                               related_name='lessons',
+                               db_index=False)
+    title = models.CharField(max_length=500)
+    read_time_min = models.PositiveSmallIntegerField()
+    position = models.PositiveIntegerField()
+    # Bit of the lesson in its course's progress bitsets, never reused
+    index = models.PositiveIntegerField(editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['module', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['module', 'position'],
+                                    name='unique_lesson_position',
+                                    deferrable=models.Deferrable.DEFERRED),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        if self.index is not None:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            course = Course.objects.select_for_update().only(
+                'lesson_slots', 'lesson_mask').get(modules=self.module_id)
+            self.index = course.lesson_slots
+            course.lesson_slots += 1
+            course.lesson_mask = bitsets.add(course.lesson_mask, self.index)
+            course.save(update_fields=['lesson_slots', 'lesson_mask'])
+            return super().save(*args, **kwargs)
+
+
+class CourseProgress(models.Model):
+    """Lessons a user has read and completed in a course, as bitsets."""
+    # Indexed by the unique constraint, which leads with the user.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE,
+                             related_name='course_progress',
+                             db_index=False)
+    course = models.ForeignKey(Course,
+                               on_delete=models.CASCADE,
+                               related_name='progress')
+    # Bit i stands for the lesson with index i, least significant first.
+    read = models.BinaryField(default=bytes)
+    completed = models.BinaryField(default=bytes)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'],
+                                    name='unique_course_progress'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} in {self.course_id}'
+
+
+class Task(models.Model):
+    """Background task waiting in the database queue."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    )
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10,
+                              choices=STATUS_CHOICES,
+                              default='queued',
+                              )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['run_at'],
+                         name='core_task_queued_idx',
+                         condition=Q(status='queued')),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SlowQuery(models.Model):
+    """Sampled slow SQL statement kept in a bounded ring of recent rows."""
+    fingerprint = models.TextField()
+    sql = models.TextField()
+    duration_ms = models.FloatField()
+    view = models.CharField(max_length=255, blank=True)
+    plan = models.JSONField(null=True, blank=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.duration_ms:.0f} ms {self.fingerprint[:80]}'
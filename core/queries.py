@@ -0,0 +1,89 @@
+"""
+SQL fingerprinting, N+1 detection and per-view query budgets
+"""
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+NORMALIZERS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\((\s*\?\s*,)+\s*\?\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+# Transaction bookkeeping repeats by design and is never an N+1.
+IGNORED = re.compile(
+    r'^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)',
+    re.IGNORECASE,
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request breaks its query budget or repeats a query"""
+
+
+def fingerprint(sql):
+    """Return the shape of a SQL statement with its literals removed"""
+    for pattern, replacement in NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class QueryTracker:
+    """Count the queries run on every connection while active"""
+
+    def __init__(self):
+        self.shapes = Counter()
+        self.count = 0
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if not IGNORED.match(sql):
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def repeated(self, threshold=None):
+        """Return the query shapes run at least threshold times"""
+        threshold = threshold or settings.QUERY_REPEAT_THRESHOLD
+        return [(shape, count) for shape, count in self.shapes.most_common()
+                if count >= threshold]
+
+    def problems(self, budget=None, threshold=None):
+        """Describe the budget overrun and repeated queries, if any"""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f'{self.count} queries over a budget of {budget}')
+        problems.extend(f'{count} x {shape}'
+                        for shape, count in self.repeated(threshold))
+        return problems
+
+
+def view_budget(view_func, method):
+    """Return the query budget a view declares for a request method.
+
+    Views declare `query_budgets`, a dict of viewset action, or of
+    lowercase method for plain views, to the most queries a request may
+    run.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    budgets = getattr(view_class, 'query_budgets', None)
+    if not budgets:
+        return None
+    method = method.lower()
+    actions = getattr(view_func, 'actions', None) or {}
+    return budgets.get(actions.get(method, method))
@@ -0,0 +1,123 @@
+"""
+Database backed background task queue
+"""
+import datetime
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """Register a function as a task and give it a `delay` method.
+
+    `func.delay(*args, **kwargs)` stores a Task row in the current
+    transaction, so the task only becomes visible to workers on commit.
+    Arguments must be JSON serializable.
+    """
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__qualname__}'
+        TASKS[task_name] = func
+
+        def delay(*args, **kwargs):
+            return enqueue(task_name, args, kwargs,
+                           max_attempts=max_attempts)
+
+        func.delay = delay
+        func.task_name = task_name
+        return func
+
+    return register(func) if func else register
+
+
+def enqueue(name, args=(), kwargs=None, run_at=None, max_attempts=None):
+    """Add a task to the queue, or run it right away in eager mode"""
+    kwargs = kwargs or {}
+    if settings.TASKS_EAGER:
+        TASKS[name](*args, **kwargs)
+        return None
+
+    return Task.objects.create(
+        name=name,
+        args=list(args),
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.TASK_MAX_ATTEMPTS,
+    )
+
+
+def claim_tasks(limit=1):
+    """Lock due tasks with SKIP LOCKED and mark them as running"""
+    now = timezone.now()
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('run_at')[:limit]
+        )
+        if tasks:
+            Task.objects.filter(pk__in=[t.pk for t in tasks]).update(
+                status='running', locked_at=now)
+    for claimed in tasks:
+        claimed.status = 'running'
+        claimed.locked_at = now
+    return tasks
+
+
+def retry_delay(attempts):
+    """Return the exponential backoff before the next attempt"""
+    return datetime.timedelta(
+        seconds=settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1)
+    )
+
+
+def run_task(claimed):
+    """Run a claimed task, deleting it on success or scheduling a retry"""
+    claimed.attempts += 1
+    try:
+        func = TASKS[claimed.name]
+        func(*claimed.args, **claimed.kwargs)
+    except Exception:
+        claimed.last_error = traceback.format_exc()
+        claimed.locked_at = None
+        if claimed.attempts >= claimed.max_attempts:
+            claimed.status = 'failed'
+            logger.error('Task %s (%s) failed', claimed.pk, claimed.name)
+        else:
+            claimed.status = 'queued'
+            claimed.run_at = timezone.now() + retry_delay(claimed.attempts)
+        claimed.save(update_fields=['attempts', 'last_error', 'locked_at',
+                                    'status', 'run_at'])
+        return False
+
+    claimed.delete()
+    return True
+
+
+def requeue_stale(timeout=None):
+    """Requeue running tasks whose worker died before finishing them"""
+    timeout = timeout or settings.TASK_LOCK_TIMEOUT
+    cutoff = timezone.now() - datetime.timedelta(seconds=timeout)
+    return Task.objects.filter(status='running', locked_at__lt=cutoff) \
+        .update(status='queued', locked_at=None)
+
+
+def run_pending(limit=None):
+    """Run due tasks until the queue is empty, returning how many ran"""
+    count = 0
+    while limit is None or count < limit:
+        tasks = claim_tasks()
+        if not tasks:
+            break
+        for claimed in tasks:
+            run_task(claimed)
+            count += 1
+    return count
@@ -0,0 +1,61 @@
+"""
+Markdown rendering of post content to sanitized HTML
+"""
+import hashlib
+
+# Bump whenever the output of render_markdown changes so stored
+# renderings are refreshed by the render_posts command.
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists']
+
+ALLOWED_TAGS = {
+    'a', 'abbr', 'acronym', 'b', 'blockquote', 'code', 'em', 'i', 'li',
+    'ol', 'strong', 'ul', 'p', 'br', 'hr', 'pre', 'span', 'del', 'img',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+}
+
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    'acronym': ['title'],
+    'img': ['src', 'alt', 'title'],
+    'code': ['class'],
+    'th': ['align'],
+    'td': ['align'],
+}
+
+ALLOWED_PROTOCOLS = ['http', 'https', 'mailto']
+
+
+def content_hash(text):
+    """Return the SHA-256 hex digest of post content"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def render_markdown(text):
+    """Render Markdown to HTML with unsafe tags and attributes removed"""
+    # Imported on first use so workers that never write posts skip them.
+    import bleach
+    import markdown
+
+    html = markdown.markdown(text, extensions=MARKDOWN_EXTENSIONS)
+    return bleach.clean(html,
+                        tags=ALLOWED_TAGS,
+                        attributes=ALLOWED_ATTRIBUTES,
+                        protocols=ALLOWED_PROTOCOLS,
+                        strip=True)
+
+
+def render_fields(text, current_hash='', current_version=0, force=False):
+    """Return the rendering fields for text, or None if they are current"""
+    digest = content_hash(text)
+    if (not force and digest == current_hash and
+            current_version == RENDERER_VERSION):
+        return None
+    return {
+        'content_html': render_markdown(text),
+        'content_hash': digest,
+        'render_version': RENDERER_VERSION,
+    }
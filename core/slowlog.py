@@ -0,0 +1,108 @@
+"""
+Sampled log of slow SQL statements with their EXPLAIN plans
+"""
+import json
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Sum
+
+from core.models import SlowQuery
+from core.queries import fingerprint
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|INSERT|UPDATE|DELETE)\b',
+                         re.IGNORECASE)
+ANALYZABLE = re.compile(r'^\s*SELECT\b', re.IGNORECASE)
+
+# The view serving the current request, set by SlowQueryContextMiddleware.
+current_view = ContextVar('slow_query_view', default='')
+_recording = ContextVar('slow_query_recording', default=False)
+
+
+def explain(cursor, sql, params):
+    """Return the JSON plan of a statement, or None if it has none"""
+    if not EXPLAINABLE.match(sql):
+        return None
+    options = 'FORMAT JSON'
+    if settings.SLOW_QUERY_EXPLAIN_ANALYZE and ANALYZABLE.match(sql):
+        options = 'ANALYZE, ' + options
+    cursor.execute(f'EXPLAIN ({options}) {sql}', params)
+    plan = cursor.fetchone()[0]
+    return json.loads(plan) if isinstance(plan, str) else plan
+
+
+def record(connection, sql, params, many, duration_ms):
+    """Store a slow statement and trim the log to its ring size"""
+    token = _recording.set(True)
+    try:
+        # A savepoint keeps a failing EXPLAIN from aborting the request.
+        with transaction.atomic(using=connection.alias), \
+                connection.cursor() as cursor:
+            plan = None if many else explain(cursor, sql, params)
+            sample = SlowQuery.objects.using(connection.alias).create(
+                fingerprint=fingerprint(sql),
+                sql=sql,
+                duration_ms=duration_ms,
+                view=current_view.get(),
+                plan=plan,
+            )
+            SlowQuery.objects.using(connection.alias).filter(
+                pk__lte=sample.pk - settings.SLOW_QUERY_LOG_SIZE
+            ).delete()
+    except Exception:
+        logger.exception('Failed to record slow query')
+    finally:
+        _recording.reset(token)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Time a statement and sample it if it is slower than the threshold"""
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if not threshold or _recording.get():
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if (duration_ms >= threshold and
+            random.random() < settings.SLOW_QUERY_SAMPLE_RATE):
+        record(context['connection'], sql, params, many, duration_ms)
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """Add the slow query wrapper to a new database connection"""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def top_offenders(limit=20):
+    """Return query shapes by total sampled time with their worst sample"""
+    offenders = list(
+        SlowQuery.objects.values('fingerprint').annotate(
+            samples=Count('id'),
+            total_ms=Sum('duration_ms'),
+            avg_ms=Avg('duration_ms'),
+            max_ms=Max('duration_ms'),
+            last_seen=Max('recorded_at'),
+        ).order_by('-total_ms')[:limit]
+    )
+    worst = {
+        sample['fingerprint']: sample for sample in
+        SlowQuery.objects.filter(
+            fingerprint__in=[o['fingerprint'] for o in offenders]
+        ).order_by('fingerprint', '-duration_ms').distinct('fingerprint')
+        .values('fingerprint', 'view', 'sql', 'plan')
+    }
+    for offender in offenders:
+        sample = worst[offender['fingerprint']]
+        offender.update(view=sample['view'], sql=sample['sql'],
+                        plan=sample['plan'])
+    return offenders
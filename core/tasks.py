@@ -0,0 +1,17 @@
+"""
+Background tasks for the core app
+"""
+from django.contrib.auth import get_user_model
+
+from core.deletion import purge_user
+from core.queue import task
+
+
+@task
+def purge_scheduled_user(user_id):
+    """Purge a user scheduled for deletion, if still scheduled"""
+    user = get_user_model().objects.filter(
+        pk=user_id, deletion_requested_at__isnull=False
+    ).first()
+    if user:
+        purge_user(user)
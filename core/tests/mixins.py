@@ -0,0 +1,37 @@
+"""
+Reusable test case mixins
+"""
+from contextlib import contextmanager
+
+from django.test import override_settings
+
+from core.queries import QueryTracker
+from post.counters import view_counter
+
+
+class QueryInspectionMixin:
+    """Fail tests whose requests repeat queries or exceed a view budget"""
+
+    def setUp(self):
+        super().setUp()
+        inspector = override_settings(QUERY_INSPECTOR='raise')
+        inspector.enable()
+        self.addCleanup(inspector.disable)
+
+    @contextmanager
+    def assertQueryBudget(self, budget=None, threshold=None):
+        """Assert the block stays within budget and repeats no query"""
+        with QueryTracker() as tracker:
+            yield tracker
+        problems = tracker.problems(budget, threshold)
+        if problems:
+            self.fail('Query inspection failed: ' + '; '.join(problems))
+
+
+class ViewCounterMixin:
+    """Drain buffered post views before and after each test"""
+
+    def setUp(self):
+        super().setUp()
+        view_counter.flush()
+        self.addCleanup(view_counter.flush)
@@ -1,11 +1,16 @@
 """
 Test for the django admin modifications
 """
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import Client
 
+from core.admin import EstimatedCountPaginator
+from core.models import Post
+
 
 class AdminSiteTest(TestCase):
     """Tests for Django admin."""
@@ -45,3 +50,50 @@ class AdminSiteTest(TestCase):
         res = self.client.get(url)
 
         self.assertEquals(res.status_code, 200)
+
+    def test_posts_list_truncates_content(self):
+        """Test the post changelist shows a preview of the content"""
+        Post.objects.create(title='Long post', content='x' * 500 + 'END',
+                            by=self.user, read_time_min=1)
+        url = reverse("admin:core_post_changelist")
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'Long post')
+        self.assertNotContains(res, 'END')
+
+    def test_posts_list_author_filter_does_not_list_users(self):
+        """Test the author filter renders an autocomplete, not all users"""
+        url = reverse("admin:core_post_changelist")
+        res = self.client.get(url, {'by__id__exact': self.user.id})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertContains(res, 'admin-autocomplete')
+        self.assertContains(res, self.user.email)
+        self.assertNotContains(res, self.admin_user.email + '</option>')
+
+    def test_create_post_page(self):
+        """Test the create post page works"""
+        url = reverse("admin:core_post_add")
+        res = self.client.get(url)
+
+        self.assertEquals(res.status_code, 200)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_MIN=1000)
+    @patch('core.admin.estimated_count', return_value=5000)
+    def test_paginator_uses_estimate_for_large_tables(self, patched_count):
+        """Test unfiltered large querysets are counted from the estimate"""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(status='draft'), 100)
+
+        self.assertEqual(paginator.count, 5000)
+        self.assertEqual(filtered.count, 0)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_MIN=1000)
+    @patch('core.admin.estimated_count', return_value=10)
+    def test_paginator_counts_small_tables(self, patched_count):
+        """Test small tables are still counted exactly"""
+        paginator = EstimatedCountPaginator(Post.objects.all(), 100)
+
+        self.assertEqual(paginator.count, 0)
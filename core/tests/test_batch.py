@@ -0,0 +1,136 @@
+"""
+Tests for the batch API
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from core.tests.mixins import ViewCounterMixin
+
+BATCH_URL = reverse('batch')
+
+
+def get(path):
+    return {'method': 'GET', 'path': path}
+
+
+@override_settings(BATCH_MAX_WORKERS=1)
+class BatchApiTests(ViewCounterMixin, TestCase):
+    """Test running several API requests in one call"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        Tag.objects.create(user=self.user, name='python')
+
+    def _batch(self, *requests):
+        return self.client.post(BATCH_URL, {'requests': list(requests)},
+                                format='json')
+
+    def test_responses_returned_in_order(self):
+        """Test each sub-request gets its own response, in order"""
+        res = self._batch(get('/api/health-check'),
+                          get('/api/posts/tags/'),
+                          get('/api/user/me/'),
+                          get('/api/posts/posts/?search=missing'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        responses = res.data['responses']
+        self.assertEqual([r['status'] for r in responses], [200] * 4)
+        self.assertEqual(responses[0]['body'], {'healthy': True})
+        self.assertEqual(responses[1]['body'][0]['name'], 'python')
+        self.assertEqual(responses[2]['body']['email'], self.user.email)
+        self.assertEqual(responses[3]['body'], [])
+
+    def test_authenticates_once(self):
+        """Test sub-requests reuse the batch's authentication"""
+        with patch.object(TokenAuthentication, 'authenticate',
+                          autospec=True,
+                          side_effect=TokenAuthentication.authenticate) \
+                as authenticate:
+            res = self._batch(get('/api/user/me/'), get('/api/posts/tags/'))
+
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(res.data['responses'][0]['status'], 200)
+
+    def test_anonymous_batch(self):
+        """Test anonymous batches see only public endpoints"""
+        self.client.credentials()
+
+        res = self._batch(get('/api/posts/tags/'), get('/api/user/me/'))
+
+        self.assertEqual([r['status'] for r in res.data['responses']],
+                         [200, 401])
+
+    def test_writes_run_in_order(self):
+        """Test reads after a write see its effect"""
+        post = Post.objects.create(by=self.user, title='Old', content='c',
+                                   read_time_min=1)
+        path = f'/api/posts/posts/{post.id}/'
+
+        res = self._batch(
+            {'method': 'PATCH', 'path': path, 'body': {'title': 'New'}},
+            get(path),
+        )
+
+        responses = res.data['responses']
+        self.assertEqual(responses[0]['status'], 200)
+        self.assertEqual(responses[1]['body']['title'], 'New')
+
+    def test_unknown_path(self):
+        """Test unknown paths return 404 without failing the batch"""
+        res = self._batch(get('/api/missing/'), get('/api/health-check'))
+
+        self.assertEqual([r['status'] for r in res.data['responses']],
+                         [404, 200])
+
+    def test_non_api_paths_rejected(self):
+        """Test only API endpoints other than the batch can be batched"""
+        for path in ['/admin/', '/api/batch']:
+            res = self._batch(get(path))
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_too_many_requests_rejected(self):
+        """Test batches above the limit are rejected"""
+        res = self._batch(*[get('/api/health-check')] * 3)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(BATCH_MAX_WORKERS=4)
+class ConcurrentBatchTests(TransactionTestCase):
+    """Test reads in a batch run on worker threads"""
+
+    def test_concurrent_reads(self):
+        """Test concurrent reads each see committed data"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=user, name='django')
+        client = APIClient()
+
+        res = client.post(BATCH_URL, {'requests': [
+            get('/api/posts/tags/'),
+            get('/api/health-check'),
+            get('/api/posts/tags/'),
+        ]}, format='json')
+
+        responses = res.data['responses']
+        self.assertEqual([r['status'] for r in responses], [200] * 3)
+        self.assertEqual(responses[2]['body'][0]['name'], 'django')
@@ -0,0 +1,128 @@
+"""
+Tests for deferred deletion of users and posts
+"""
+import io
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.deletion import (delete_posts, delete_tags, purge_user,
+                           schedule_user_deletion)
+from core.models import Post, RelatedPost, Tag
+from post.related import build_related_posts
+
+
+def create_post(user, **params):
+    """Create and return a sample post"""
+    defaults = {'title': 'Test', 'content': 'Test', 'read_time_min': 1}
+    defaults.update(params)
+    return Post.objects.create(by=user, **defaults)
+
+
+class DeletionTests(TestCase):
+    """Test batched deletion"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.other = get_user_model().objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='python')
+        for i in range(5):
+            create_post(self.user, title=f'Post {i}').tags.add(self.tag)
+        self.kept = create_post(self.other, title='Kept')
+
+    def test_schedule_user_deletion(self):
+        """Test scheduling deactivates the user without deleting content"""
+        schedule_user_deletion(self.user)
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deletion_requested_at)
+        self.assertEqual(Post.objects.filter(by=self.user).count(), 5)
+
+    def test_purge_user_in_batches(self):
+        """Test purging deletes posts and tags batch by batch"""
+        progress = []
+
+        counts = purge_user(self.user, batch_size=2,
+                            progress=lambda *args: progress.append(args))
+
+        self.assertEqual(counts, {'posts': 5, 'tags': 1, 'users': 1})
+        self.assertEqual(progress, [('posts', 2), ('posts', 4),
+                                    ('posts', 5), ('tags', 1)])
+        self.assertFalse(get_user_model().objects.filter(
+            email='author@example.com').exists())
+        self.assertEqual(list(Post.objects.all()), [self.kept])
+        self.assertFalse(Post.tags.through.objects.exists())
+
+    @patch('core.deletion._delete_files')
+    def test_delete_posts_removes_images(self, patched_delete_files):
+        """Test image files of deleted posts are removed after commit"""
+        Post.objects.filter(title='Post 0').update(image='uploads/post/a.jpg')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_posts(Post.objects.filter(by=self.user), batch_size=10)
+
+        storage, names = patched_delete_files.call_args[0]
+        self.assertEqual(names, ['uploads/post/a.jpg'])
+
+    def test_delete_tags_refreshes_cached_posts(self):
+        """Test posts of other users stop listing purged tags"""
+        cache.clear()
+        self.kept.tags.add(self.tag)
+        url = reverse('post:post-list')
+        self.client.get(url)
+
+        delete_tags(Tag.objects.filter(user=self.user))
+        res = self.client.get(url)
+
+        kept = next(post for post in res.data if post['id'] == self.kept.id)
+        self.assertEqual(kept['tags'], [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_delete_tags_refreshes_related_posts(self):
+        """Test related posts scored on purged tags are dropped"""
+        self.kept.tags.add(self.tag)
+        build_related_posts()
+
+        delete_tags(Tag.objects.filter(user=self.user))
+
+        self.assertFalse(RelatedPost.objects.exists())
+
+    def test_purge_users_command(self):
+        """Test the command purges only scheduled users"""
+        schedule_user_deletion(self.user)
+        out = io.StringIO()
+
+        call_command('purge_users', batch_size=2, stdout=out)
+
+        self.assertIn('Purged author@example.com: 5 posts, 1 tags',
+                      out.getvalue())
+        self.assertEqual(get_user_model().objects.count(), 1)
+
+    def test_admin_delete_schedules_user(self):
+        """Test deleting a user in the admin defers the cascade"""
+        admin_user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        client = Client()
+        client.force_login(admin_user)
+        url = reverse('admin:core_user_delete', args=[self.user.id])
+
+        res = client.get(url)
+        self.assertContains(res, '<td>5</td>', html=True)
+        client.post(url, {'post': 'yes'})
+
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(Post.objects.filter(by=self.user).count(), 5)
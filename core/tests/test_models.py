@@ -2,6 +2,9 @@
 Tests for models
 """
 
+import datetime
+
+from django.db import IntegrityError
 from django.test import TestCase
 from unittest.mock import patch
 from django.contrib.auth import get_user_model
@@ -82,3 +85,96 @@ class ModelTests(TestCase):
         mock_uuid4.return_value = uuid
         file_path = models.post_image_file_path(None, 'myimage.jpg')
         self.assertEqual(file_path, f'uploads/post/{uuid}.jpg')
+
+    def test_post_slug_generated_from_title(self):
+        """Test saving a post without slug sets it from the title"""
+        user = User.objects.create_user(email='test@example.com')
+        post = models.Post.objects.create(
+            title='Hello World', content='c', by=user, read_time_min=1,
+        )
+
+        self.assertEqual(post.slug, 'hello-world')
+
+    def test_post_slug_unique_for_same_date(self):
+        """Test posts with the same title on one date get suffixed slugs"""
+        user = User.objects.create_user(email='test@example.com')
+        slugs = [
+            models.Post.objects.create(
+                title='Same Title', content='c', by=user, read_time_min=1,
+            ).slug
+            for _ in range(3)
+        ]
+
+        self.assertEqual(slugs, ['same-title', 'same-title-2', 'same-title-3'])
+
+    def test_allocate_slugs_single_query(self):
+        """Test a batch of slugs is allocated with one query"""
+        user = User.objects.create_user(email='test@example.com')
+        day = datetime.date(2023, 12, 1)
+        other_day = datetime.date(2023, 12, 2)
+        for slug in ['intro', 'intro-4', 'intro-part']:
+            models.Post.objects.create(
+                title='x', slug=slug, content='c', by=user, read_time_min=1,
+                created_date=day,
+            )
+
+        with self.assertNumQueries(1):
+            slugs = models.Post.objects.allocate_slugs([
+                ('intro', day), ('intro', day), ('intro', other_day),
+                ('fresh', day),
+            ])
+
+        self.assertEqual(slugs, ['intro-5', 'intro-6', 'intro', 'fresh'])
+
+    def test_allocate_slugs_skips_taken_suffixes(self):
+        """Test repeats of a free slug skip suffixes already taken"""
+        user = User.objects.create_user(email='test@example.com')
+        day = datetime.date(2023, 12, 1)
+        models.Post.objects.create(
+            title='x', slug='intro-2', content='c', by=user, read_time_min=1,
+            created_date=day,
+        )
+
+        slugs = models.Post.objects.allocate_slugs([
+            ('intro', day), ('intro', day), ('intro', day),
+        ])
+
+        self.assertEqual(slugs, ['intro', 'intro-3', 'intro-4'])
+
+    def test_post_slug_retries_on_collision(self):
+        """Test a slug taken concurrently is allocated again"""
+        user = User.objects.create_user(email='test@example.com')
+        models.Post.objects.create(
+            title='Taken', content='c', by=user, read_time_min=1,
+        )
+        stale = ['taken', 'taken-2']
+
+        with patch.object(models.PostManager, 'allocate_slug',
+                          side_effect=lambda slug, date: stale.pop(0)):
+            post = models.Post.objects.create(
+                title='Taken', content='c', by=user, read_time_min=1,
+            )
+
+        self.assertEqual(post.slug, 'taken-2')
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = User.objects.create_user(email='test@example.com')
+        other = User.objects.create_user(email='other@example.com')
+        Tag.objects.create(user=user, name='python')
+        Tag.objects.create(user=other, name='python')
+
+        with self.assertRaises(IntegrityError):
+            Tag.objects.create(user=user, name='python')
+
+    def test_resolve_tags_single_query(self):
+        """Test resolving tags creates missing ones in one query"""
+        user = User.objects.create_user(email='test@example.com')
+        existing = Tag.objects.create(user=user, name='python')
+
+        with self.assertNumQueries(1):
+            tags = Tag.objects.resolve(user, ['django', 'python', 'django'])
+
+        self.assertEqual([tag.name for tag in tags], ['django', 'python'])
+        self.assertEqual(tags[1].id, existing.id)
+        self.assertEqual(Tag.objects.filter(user=user).count(), 2)
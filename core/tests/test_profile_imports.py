@@ -0,0 +1,59 @@
+"""
+Tests for the boot import profile and the API only profile
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.management.commands.profile_imports import (
+    boot_imports,
+    parse_importtime,
+)
+
+# Only needed by the admin, the docs, uploads, rendering or the task worker
+DEFERRED = ['numpy', 'scipy', 'PIL', 'bleach']
+ADMIN_ONLY = ['jazzmin', 'drf_spectacular.views', 'core.admin']
+
+
+class ProfileImportsTests(SimpleTestCase):
+    """Test the imports made while a worker boots"""
+
+    def test_parse_importtime(self):
+        """Test self times are read per module and the header skipped"""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   encodings.utf_8\n'
+            'import time:      2300 |       2420 | django\n'
+        )
+
+        self.assertEqual(parse_importtime(output),
+                         {'encodings.utf_8': 120, 'django': 2300})
+
+    def test_heavy_packages_deferred(self):
+        """Test packages only some requests need are not imported at boot"""
+        modules = boot_imports()
+
+        self.assertIn('post.views', modules)
+        self.assertIn('jazzmin', modules)
+        for module in DEFERRED:
+            self.assertNotIn(module, modules)
+
+    def test_api_only_omits_admin_and_docs(self):
+        """Test the API only profile boots without the admin and docs"""
+        modules = boot_imports(api_only=True)
+
+        self.assertIn('post.views', modules)
+        for module in ADMIN_ONLY + DEFERRED:
+            self.assertNotIn(module, modules)
+
+    def test_command_reports_packages(self):
+        """Test the command lists the slowest packages to import"""
+        out = StringIO()
+
+        call_command('profile_imports', '--limit', '3', stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('Imported '))
+        self.assertEqual(len(lines), 4)
+        self.assertIn('django', out.getvalue())
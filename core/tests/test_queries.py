@@ -0,0 +1,97 @@
+"""
+Tests for query inspection
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from core.queries import QueryBudgetExceeded, QueryTracker, fingerprint
+from core.tests.mixins import QueryInspectionMixin
+from post.views import PostViewSet
+
+POSTS_URL = reverse('post:post-list')
+TAGS_URL = reverse('post:tag-list')
+
+
+class FingerprintTests(TestCase):
+    """Test normalizing SQL to its shape"""
+
+    def test_literals_and_lists_removed(self):
+        """Test parameters, literals and IN lists share one shape"""
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE a = %s AND b IN (%s, %s)'),
+            fingerprint("SELECT  *  FROM t WHERE a = 'x' AND b IN (1, 2, 3)"),
+        )
+
+    def test_tracker_reports_repeated_shapes(self):
+        """Test the tracker counts queries and flags repeats"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        with QueryTracker() as tracker:
+            for name in ['a', 'b', 'c']:
+                Tag.objects.filter(user=user, name=name).exists()
+
+        self.assertEqual(tracker.count, 3)
+        self.assertEqual(len(tracker.repeated(3)), 1)
+        self.assertEqual(tracker.problems(budget=2)[0],
+                         '3 queries over a budget of 2')
+
+
+class QueryInspectorTests(QueryInspectionMixin, TestCase):
+    """Test the middleware against the post endpoints"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        tags = [Tag.objects.create(user=user, name=f'tag {i}')
+                for i in range(3)]
+        for i in range(5):
+            post = Post.objects.create(by=user, title=f'Post {i}',
+                                       content='c', read_time_min=1)
+            post.tags.add(*tags)
+
+    def test_post_list_within_budget(self):
+        """Test listing posts loads tags without per-row queries"""
+        with self.assertQueryBudget(PostViewSet.query_budgets['list']):
+            res = self.client.get(POSTS_URL)
+
+        self.assertEqual(len(res.data), 5)
+
+    def test_tag_list_within_budget(self):
+        """Test listing tags stays within its budget"""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(len(res.data), 3)
+
+    def test_budget_overrun_raises(self):
+        """Test exceeding a declared budget fails the request"""
+        with patch.object(PostViewSet, 'query_budgets', {'list': 1}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.client.get(POSTS_URL)
+
+    def test_repeated_queries_raise(self):
+        """Test an N+1 pattern fails the request"""
+        with patch.object(PostViewSet, 'get_queryset',
+                          lambda view: Post.objects.all()):
+            with self.assertRaisesMessage(QueryBudgetExceeded, '5 x SELECT'):
+                self.client.get(POSTS_URL)
+
+    @override_settings(QUERY_INSPECTOR='warn')
+    def test_warn_mode_logs(self):
+        """Test warn mode logs problems and reports the query count"""
+        with patch.object(PostViewSet, 'query_budgets', {'list': 1}), \
+                self.assertLogs('core.middleware', 'WARNING'):
+            res = self.client.get(POSTS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['X-Query-Count'], '2')
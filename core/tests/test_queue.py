@@ -0,0 +1,118 @@
+"""
+Tests for the database task queue
+"""
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import queue
+from core.deletion import schedule_user_deletion
+from core.models import Post, Task
+
+calls = []
+
+
+@queue.task
+def record(value):
+    calls.append(value)
+
+
+@queue.task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class QueueTests(TestCase):
+    """Test enqueueing and running tasks"""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_stores_task(self):
+        """Test delay stores the task instead of running it"""
+        task = record.delay('a')
+
+        self.assertEqual(task.name, 'core.tests.test_queue.record')
+        self.assertEqual(task.args, ['a'])
+        self.assertEqual(task.status, 'queued')
+        self.assertEqual(calls, [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_inline(self):
+        """Test eager mode runs tasks without touching the queue"""
+        record.delay('a')
+
+        self.assertEqual(calls, ['a'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_run_pending_runs_and_deletes(self):
+        """Test due tasks run in order and are removed on success"""
+        record.delay('a')
+        record.delay('b')
+        queue.enqueue(record.task_name, ['later'],
+                      run_at=timezone.now() + datetime.timedelta(hours=1))
+
+        self.assertEqual(queue.run_pending(), 2)
+        self.assertEqual(calls, ['a', 'b'])
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_failed_task_retried_with_backoff(self):
+        """Test failures are rescheduled, then marked failed"""
+        task = explode.delay()
+
+        with override_settings(TASK_RETRY_BACKOFF=10):
+            queue.run_task(queue.claim_tasks()[0])
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'queued')
+        self.assertEqual(task.attempts, 1)
+        self.assertIn('boom', task.last_error)
+        self.assertGreater(task.run_at,
+                           timezone.now() + datetime.timedelta(seconds=5))
+        self.assertEqual(queue.claim_tasks(), [])
+
+        Task.objects.update(run_at=timezone.now())
+        queue.run_task(queue.claim_tasks()[0])
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'failed')
+
+    def test_requeue_stale(self):
+        """Test tasks locked by a dead worker are queued again"""
+        task = record.delay('a')
+        Task.objects.update(
+            status='running',
+            locked_at=timezone.now() - datetime.timedelta(hours=2),
+        )
+
+        self.assertEqual(queue.requeue_stale(timeout=60), 1)
+        task.refresh_from_db()
+        self.assertEqual(task.status, 'queued')
+
+    def test_run_worker_once(self):
+        """Test the worker command drains the queue and exits"""
+        record.delay('a')
+        out = io.StringIO()
+
+        call_command('run_worker', concurrency=1, once=True, stdout=out)
+
+        self.assertEqual(calls, ['a'])
+        self.assertIn('Worker stopped', out.getvalue())
+
+    def test_schedule_user_deletion_enqueues_purge(self):
+        """Test scheduling a deletion queues the purge task"""
+        user = get_user_model().objects.create_user(
+            email='author@example.com', password='testpass123')
+        Post.objects.create(by=user, title='t', content='c', read_time_min=1)
+
+        schedule_user_deletion(user)
+
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'core.tasks.purge_scheduled_user')
+        self.assertEqual(task.args, [user.pk])
+
+        queue.run_pending()
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(get_user_model().objects.exists())
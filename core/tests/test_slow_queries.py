@@ -0,0 +1,106 @@
+"""
+Tests for the slow query log
+"""
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, SlowQuery, Tag
+from core.slowlog import slow_query_wrapper, top_offenders
+
+SLOW_QUERIES_URL = reverse('slow-queries')
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001,
+                   SLOW_QUERY_SAMPLE_RATE=1)
+class SlowQueryLogTests(TestCase):
+    """Test sampling slow queries"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+
+    def test_wrapper_installed(self):
+        """Test every connection times its queries"""
+        self.assertIn(slow_query_wrapper, connection.execute_wrappers)
+
+    def test_slow_query_recorded_with_plan(self):
+        """Test a sampled query stores its shape and EXPLAIN plan"""
+        list(Post.objects.filter(title='x'))
+
+        sample = SlowQuery.objects.get(fingerprint__contains='"core_post"')
+        self.assertIn('WHERE "core_post"."title" = ?', sample.fingerprint)
+        self.assertIn('Plan', sample.plan[0])
+        self.assertGreater(sample.duration_ms, 0)
+
+    @override_settings(SLOW_QUERY_LOG_SIZE=3)
+    def test_ring_buffer_bounded(self):
+        """Test only the most recent samples are kept"""
+        for name in ['a', 'b', 'c', 'd', 'e']:
+            Tag.objects.filter(name=name).exists()
+
+        self.assertLessEqual(SlowQuery.objects.count(), 3)
+
+    def test_request_view_recorded(self):
+        """Test samples taken during a request name its view"""
+        client = APIClient()
+        client.get(reverse('post:post-list'))
+
+        views = set(SlowQuery.objects.filter(
+            fingerprint__contains='"core_post"',
+        ).values_list('view', flat=True))
+        self.assertEqual(views, {'GET post:post-list'})
+
+    def test_top_offenders(self):
+        """Test offenders are grouped by shape and ordered by total time"""
+        for title in ['a', 'b']:
+            list(Post.objects.filter(title=title))
+
+        offender = next(o for o in top_offenders()
+                        if '"core_post"."title"' in o['fingerprint'])
+        self.assertEqual(offender['samples'], 2)
+        self.assertIsNotNone(offender['plan'])
+
+    def test_staff_endpoint(self):
+        """Test staff can list the top offenders"""
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(SLOW_QUERIES_URL, {'limit': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(res.data), 5)
+
+    def test_endpoint_requires_staff(self):
+        """Test regular users cannot see query samples"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(SLOW_QUERIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command_lists_offenders(self):
+        """Test the command prints offenders and clears samples"""
+        list(Post.objects.filter(title='x'))
+        out = io.StringIO()
+
+        call_command('slow_queries', plan=True, stdout=out)
+        self.assertIn('"core_post"."title" = ?', out.getvalue())
+
+        call_command('slow_queries', clear=True, stdout=out)
+        self.assertIn('Deleted', out.getvalue())
+        self.assertFalse(SlowQuery.objects.filter(
+            fingerprint__contains='"core_post"."title"').exists())
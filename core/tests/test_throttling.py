@@ -0,0 +1,75 @@
+"""
+Tests for the token bucket throttles
+"""
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.throttling import LoginEmailThrottle, LoginIPThrottle
+
+TOKEN_URL = reverse('user:token')
+
+
+class ThrottleTests(TestCase):
+    """Test throttling of the auth endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    @patch.object(LoginEmailThrottle, 'THROTTLE_RATES',
+                  {'login_email': '2/min'})
+    @patch('user.serializers.authenticate', return_value=None)
+    def test_login_throttled_per_email(self, patched_authenticate):
+        """Test excess logins for one email are rejected before authenticate"""
+        payload = {'email': 'Test@Example.com', 'password': 'wrong'}
+
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        res = self.client.post(TOKEN_URL, {'email': 'test@example.com',
+                                           'password': 'wrong'})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        self.assertEqual(patched_authenticate.call_count, 2)
+
+        res = self.client.post(TOKEN_URL, {'email': 'other@example.com',
+                                           'password': 'wrong'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '2/min'})
+    @patch('user.serializers.authenticate', return_value=None)
+    def test_login_throttled_per_ip(self, patched_authenticate):
+        """Test excess logins from one IP are rejected across emails"""
+        for i in range(3):
+            res = self.client.post(TOKEN_URL, {
+                'email': f'user{i}@example.com', 'password': 'wrong',
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(patched_authenticate.call_count, 2)
+
+    @patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '2/min'})
+    def test_tokens_refill_over_time(self):
+        """Test the bucket refills proportionally to elapsed time"""
+        throttle = LoginIPThrottle()
+        request = APIRequestFactory().post('/')
+        now = [1000.0]
+        throttle.timer = lambda: now[0]
+
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
+        self.assertAlmostEqual(throttle.wait(), 30)
+
+        now[0] += 30
+        self.assertTrue(throttle.allow_request(request, None))
+        self.assertFalse(throttle.allow_request(request, None))
@@ -0,0 +1,109 @@
+"""
+Tests for the worker warmup
+"""
+import importlib
+import sys
+from unittest.mock import Mock, patch
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core import warmup
+from core.models import Tag
+
+
+# Closing connections would end the transaction wrapping each test.
+@patch('core.warmup.close_old_connections')
+class WarmupTests(TestCase):
+    """Test priming a fresh worker"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        Tag.objects.create(user=user, name='django')
+
+    def test_warmup_reports_each_step(self, close_old_connections):
+        """Test every step runs and reports its count and time"""
+        with self.assertLogs('core.warmup', 'INFO') as logs:
+            report = warmup.warmup()
+
+        self.assertEqual(list(report), [name for name, _ in warmup.STEPS])
+        self.assertGreater(report['routes'][0], 0)
+        self.assertGreater(report['serializers'][0], 0)
+        self.assertEqual(report['reads'][0], 2)
+        self.assertIn('Worker warmed up in', logs.output[-1])
+        close_old_connections.assert_called_once()
+
+    def test_failing_step_does_not_stop_warmup(self, close_old_connections):
+        """Test a failing step is logged and the others still run"""
+        steps = [('routes', Mock(side_effect=RuntimeError)),
+                 ('reads', warmup.warm_reads)]
+        with patch.object(warmup, 'STEPS', steps), \
+                self.assertLogs('core.warmup', 'INFO') as logs:
+            report = warmup.warmup()
+
+        self.assertIsNone(report['routes'][0])
+        self.assertEqual(report['reads'][0], 2)
+        self.assertIn('Warmup step routes failed', logs.output[0])
+
+    @override_settings(WARMUP_PATHS=['/api/posts/tags/', '/api/missing/'])
+    def test_failing_read_is_skipped(self, close_old_connections):
+        """Test reads that fail are logged and not counted"""
+        with self.assertLogs('core.warmup', 'WARNING') as logs:
+            warmed = warmup.warm_reads()
+
+        self.assertEqual(warmed, 1)
+        self.assertIn('/api/missing/', logs.output[0])
+
+    def test_connections_opened_when_persistent(self, close_old_connections):
+        """Test only connections kept between requests are opened"""
+        with patch.dict(connection.settings_dict, CONN_MAX_AGE=0):
+            self.assertEqual(warmup.open_connections(), 0)
+        with patch.dict(connection.settings_dict, CONN_MAX_AGE=60):
+            self.assertEqual(warmup.open_connections(), 1)
+
+
+class WarmupLifespanTests(TestCase):
+    """Test warming up under ASGI"""
+
+    @patch('core.warmup.view_counter')
+    @patch('core.warmup.warmup')
+    @async_to_sync
+    async def test_warmup_on_startup(self, patched_warmup, counter):
+        """Test the warmup runs on startup and views flush on shutdown"""
+        async def application(scope, receive, send):
+            raise AssertionError('lifespan passed to the application')
+
+        lifespan = ApplicationCommunicator(
+            warmup.warmup_lifespan(application), {'type': 'lifespan'})
+
+        await lifespan.send_input({'type': 'lifespan.startup'})
+        self.assertEqual(await lifespan.receive_output(1),
+                         {'type': 'lifespan.startup.complete'})
+        patched_warmup.assert_called_once()
+
+        await lifespan.send_input({'type': 'lifespan.shutdown'})
+        self.assertEqual(await lifespan.receive_output(1),
+                         {'type': 'lifespan.shutdown.complete'})
+        await lifespan.wait(1)
+        counter.flush.assert_called_once()
+
+
+class WsgiImportTests(TestCase):
+    """Test importing the WSGI module outside uWSGI"""
+
+    @override_settings(WARMUP=True)
+    @patch('core.warmup.warmup')
+    def test_import_does_not_read_database(self, patched_warmup):
+        """Test the warmup reads are not run when the module is imported"""
+        with patch.dict(sys.modules, {'uwsgidecorators': None}), \
+                self.assertNumQueries(0):
+            sys.modules.pop('main_project.wsgi', None)
+            importlib.import_module('main_project.wsgi')
+
+        patched_warmup.assert_not_called()
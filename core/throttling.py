@@ -0,0 +1,108 @@
+"""
+Token bucket throttles for expensive endpoints
+"""
+import hashlib
+import time
+
+from rest_framework import throttling
+from rest_framework.permissions import SAFE_METHODS
+
+
+class TokenBucketThrottle(throttling.SimpleRateThrottle):
+    """
+    Throttle that refills `num_requests` tokens per `duration` seconds.
+
+    Buckets live in the default cache so every worker process shares them,
+    and each request takes `cost` tokens. Updates are serialized per bucket
+    with an atomic `cache.add` lock.
+    """
+    cost = 1
+    lock_attempts = 3
+    lock_wait = 0.01
+
+    def get_cost(self, request, view):
+        """Return the number of tokens the request consumes"""
+        return self.cost
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        cost = self.get_cost(request, view)
+        refill_rate = self.num_requests / self.duration
+        lock_key = f'{self.key}_lock'
+        for attempt in range(self.lock_attempts):
+            if self.cache.add(lock_key, 1, timeout=1):
+                break
+            time.sleep(self.lock_wait)
+        else:
+            # Contention on a single bucket is a burst in itself.
+            self.wait_seconds = 1
+            return False
+
+        try:
+            self.now = self.timer()
+            tokens, updated_at = self.cache.get(
+                self.key, (self.num_requests, self.now))
+            tokens = min(self.num_requests,
+                         tokens + (self.now - updated_at) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.wait_seconds = (cost - tokens) / refill_rate
+            self.cache.set(self.key, (tokens, self.now), self.duration)
+        finally:
+            self.cache.delete(lock_key)
+
+        return allowed
+
+    def wait(self):
+        return max(self.wait_seconds, 0)
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Limit token requests per client IP"""
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class LoginEmailThrottle(TokenBucketThrottle):
+    """Limit token requests per email regardless of client IP"""
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+
+        ident = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class SignupIPThrottle(LoginIPThrottle):
+    """Limit user registrations per client IP"""
+    scope = 'signup_ip'
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Limit unsafe requests per authenticated user or client IP"""
+    scope = 'write'
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
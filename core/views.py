@@ -1,11 +1,46 @@
 """
 Core views for app
 """
-from rest_framework.decorators import api_view
+from drf_spectacular.utils import extend_schema
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
+from core.batch import BatchSerializer, run_batch
+from core.slowlog import top_offenders
+
 
 @api_view(['GET'])
 def health_check(request):
     """Return success message if server is running"""
     return Response({'healthy': True})
+
+
+@extend_schema(request=BatchSerializer)
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([AllowAny])
+def batch(request):
+    """Run several API requests with one authentication, in order"""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    responses = run_batch(request, serializer.validated_data['requests'])
+    return Response({'responses': responses})
+
+
+@api_view(['GET'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAdminUser])
+def slow_queries(request):
+    """List the query shapes with the most sampled slow time"""
+    try:
+        limit = min(int(request.query_params.get('limit', 20)), 100)
+    except ValueError:
+        raise ValidationError({'limit': ['A valid integer is required.']})
+    return Response(top_offenders(limit))
@@ -0,0 +1,175 @@
+"""
+Warmup of a fresh worker before it serves its first request
+"""
+import io
+import logging
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connections
+from django.urls import URLResolver, get_resolver, resolve
+from rest_framework import serializers
+
+from post.counters import view_counter
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_routes():
+    """Compile the pattern of every route and return how many there are"""
+    def walk(patterns):
+        count = 0
+        for pattern in patterns:
+            pattern.pattern.regex
+            if isinstance(pattern, URLResolver):
+                count += walk(pattern.url_patterns)
+            else:
+                count += 1
+        return count
+
+    resolver = get_resolver()
+    resolver.reverse_dict
+    return walk(resolver.url_patterns)
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _subclasses(subclass)
+
+
+def build_serializers():
+    """Build the fields of every project serializer and return how many"""
+    project_apps = tuple(
+        f'{config.name}.' for config in apps.get_app_configs()
+        if config.path.startswith(str(settings.BASE_DIR))
+    )
+    built = 0
+    for serializer_class in set(_subclasses(serializers.Serializer)):
+        if not serializer_class.__module__.startswith(project_apps):
+            continue
+        try:
+            serializer_class(context={}).fields
+        except Exception:
+            logger.debug('Could not build %s', serializer_class.__name__,
+                         exc_info=True)
+        else:
+            built += 1
+    return built
+
+
+def open_connections():
+    """Connect the databases whose connections outlive a request"""
+    opened = 0
+    for connection in connections.all():
+        if connection.settings_dict['CONN_MAX_AGE']:
+            connection.ensure_connection()
+            opened += 1
+    return opened
+
+
+def _warm_host():
+    """Return a host name the warmup requests may use"""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def warm_request(path):
+    """Run an anonymous GET of path in process and return its status"""
+    url = urlsplit(path)
+    request = WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'SERVER_NAME': _warm_host(),
+        'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+    })
+    request.user = AnonymousUser()
+    match = resolve(url.path)
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    return response.status_code
+
+
+def warm_reads():
+    """Request the hot read endpoints and return how many succeeded"""
+    warmed = 0
+    for path in settings.WARMUP_PATHS:
+        try:
+            status = warm_request(path)
+        except Exception as error:
+            logger.warning('Warmup request to %s failed: %s', path, error)
+            continue
+        if status < 400:
+            warmed += 1
+        else:
+            logger.warning('Warmup request to %s returned %s', path, status)
+    return warmed
+
+
+STEPS = [
+    ('routes', resolve_routes),
+    ('serializers', build_serializers),
+    ('connections', open_connections),
+    ('reads', warm_reads),
+]
+
+
+def warmup():
+    """Prime this worker and return the count and time of each step"""
+    report = {}
+    start = time.perf_counter()
+    for name, step in STEPS:
+        step_start = time.perf_counter()
+        try:
+            count = step()
+        except Exception:
+            # A cold worker still serves; it only pays on first requests.
+            logger.exception('Warmup step %s failed', name)
+            count = None
+        report[name] = (count, (time.perf_counter() - step_start) * 1000)
+    # Without persistent connections, do not hold the reads' one idle.
+    close_old_connections()
+
+    logger.info(
+        'Worker warmed up in %.0f ms: %s',
+        (time.perf_counter() - start) * 1000,
+        ', '.join(f'{count} {name} in {ms:.0f} ms'
+                  for name, (count, ms) in report.items()),
+    )
+    return report
+
+
+def warmup_lifespan(application):
+    """Wrap an ASGI application to warm up on lifespan startup.
+
+    On shutdown, post views buffered by the worker are written while the
+    database is still reachable.
+    """
+    async def lifespan(scope, receive, send):
+        if scope['type'] != 'lifespan':
+            return await application(scope, receive, send)
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Thread sensitive, like Django's sync views, so the
+                # connections opened are the ones the views will use.
+                if settings.WARMUP:
+                    await sync_to_async(warmup)()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await sync_to_async(view_counter.flush)()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    return lifespan
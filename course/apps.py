@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class CourseConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'course'
+
+    def ready(self):
+        from course import signals  # noqa: F401
@@ -0,0 +1,99 @@
+"""
+Lesson progress of learners, stored as one pair of bitsets per course
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from core import bitsets
+from core.models import CourseProgress, Lesson
+
+STATES = ('read', 'completed', 'unread')
+
+
+def summary(course_id, read, completed, lesson_mask):
+    """Return the counts and completion of one course's progress"""
+    live = bitsets.to_int(lesson_mask)
+    total = bitsets.count(live)
+    done = bitsets.count(bitsets.to_int(completed) & live)
+    return {
+        'course': course_id,
+        'read': bitsets.count(bitsets.to_int(read) & live),
+        'completed': done,
+        'total': total,
+        'percent': round(100 * done / total, 1) if total else 0.0,
+    }
+
+
+def summaries(user, course_ids=None):
+    """Return the progress summary of a user in each course started.
+
+    Completion is counted from one row per course, against the course's
+    bitset of live lessons, without reading any lesson.
+    """
+    rows = CourseProgress.objects.filter(user=user)
+    if course_ids is not None:
+        rows = rows.filter(course_id__in=course_ids)
+    return [
+        summary(*row) for row in rows.order_by('course_id').values_list(
+            'course_id', 'read', 'completed', 'course__lesson_mask')
+    ]
+
+
+def lesson_states(user, course_id):
+    """Return the ids of the lessons a user read and completed"""
+    row = CourseProgress.objects.filter(
+        user=user, course_id=course_id).values_list('read', 'completed')
+    read, completed = row.first() or (b'', b'')
+    read, completed = bitsets.to_int(read), bitsets.to_int(completed)
+    states = {'read': [], 'completed': []}
+    lessons = Lesson.objects.filter(module__course_id=course_id) \
+        .order_by('module__position', 'position').values_list('id', 'index')
+    for lesson_id, index in lessons:
+        if read >> index & 1:
+            states['read'].append(lesson_id)
+        if completed >> index & 1:
+            states['completed'].append(lesson_id)
+    return states
+
+
+def record(user, updates):
+    """Apply (lesson id, state) updates and return the affected summaries.
+
+    Updates are grouped by course so each course's row is locked and
+    written once, whatever the number of lessons updated in it.
+    """
+    lesson_ids = {lesson_id for lesson_id, _ in updates}
+    lessons = {
+        lesson_id: (course_id, index)
+        for lesson_id, course_id, index in Lesson.objects.filter(
+            pk__in=lesson_ids).values_list('id', 'module__course_id', 'index')
+    }
+    missing = sorted(lesson_ids - lessons.keys())
+    if missing:
+        raise ValueError(f'Unknown lessons: {missing}')
+
+    by_course = defaultdict(list)
+    for lesson_id, state in updates:
+        course_id, index = lessons[lesson_id]
+        by_course[course_id].append((index, state))
+
+    with transaction.atomic():
+        for course_id in sorted(by_course):
+            progress, _ = CourseProgress.objects.select_for_update() \
+                .get_or_create(user=user, course_id=course_id)
+            read = bitsets.to_int(progress.read)
+            completed = bitsets.to_int(progress.completed)
+            for index, state in by_course[course_id]:
+                bit = 1 << index
+                if state == 'unread':
+                    read &= ~bit
+                    completed &= ~bit
+                else:
+                    read |= bit
+                    if state == 'completed':
+                        completed |= bit
+            progress.read = bitsets.to_bytes(read)
+            progress.completed = bitsets.to_bytes(completed)
+            progress.save()
+    return summaries(user, by_course)
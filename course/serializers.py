@@ -0,0 +1,129 @@
+"""Serializers for the course app."""
+
+from django.conf import settings
+from rest_framework import serializers
+from core.models import Course, Lesson, Module
+from course.progress import STATES
+
+
+class CourseSerializer(serializers.ModelSerializer):
+    """Serializer for course objects in the course app."""
+
+    class Meta:
+        model = Course
+        fields = ['id', 'by', 'title', 'description', 'status',
+                  'created_at', 'updated_at']
+        read_only_fields = ['id', 'by', 'created_at', 'updated_at']
+
+
+class ModuleSerializer(serializers.ModelSerializer):
+    """Serializer for module objects in the course app."""
+    position = serializers.IntegerField(min_value=0, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance is not None:
+            # Existing modules are reordered through the move action.
+            self.fields['course'].read_only = True
+            self.fields['position'].read_only = True
+
+    class Meta:
+        model = Module
+        fields = ['id', 'course', 'title', 'position']
+        read_only_fields = ['id']
+
+
+class LessonSerializer(serializers.ModelSerializer):
+    """Serializer for lesson objects in the course app."""
+    position = serializers.IntegerField(min_value=0, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance is not None:
+            # Existing lessons are reordered through the move action.
+            self.fields['module'].read_only = True
+            self.fields['position'].read_only = True
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'module', 'title', 'read_time_min', 'position',
+                  'content_hash']
+        read_only_fields = ['id', 'content_hash']
+
+
+class LessonDetailSerializer(LessonSerializer):
+    """Serializer for lesson objects details in the course app."""
+
+    class Meta(LessonSerializer.Meta):
+        fields = LessonSerializer.Meta.fields + ['content', 'content_html']
+        read_only_fields = LessonSerializer.Meta.read_only_fields + [
+            'content_html']
+
+
+class MoveSerializer(serializers.Serializer):
+    """Serializer for moving a module or lesson among its siblings."""
+    position = serializers.IntegerField(min_value=0)
+
+
+class LessonMoveSerializer(MoveSerializer):
+    """Serializer for moving a lesson, possibly to another module."""
+    module = serializers.PrimaryKeyRelatedField(
+        queryset=Module.objects.all(), required=False)
+
+
+class OutlineLessonSerializer(serializers.Serializer):
+    """Serializer for a lesson in a course outline."""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    position = serializers.IntegerField()
+    read_time_min = serializers.IntegerField()
+
+
+class OutlineModuleSerializer(serializers.Serializer):
+    """Serializer for a module in a course outline."""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    position = serializers.IntegerField()
+    lessons = OutlineLessonSerializer(many=True)
+
+
+class OutlineSerializer(serializers.Serializer):
+    """Serializer for a course with its ordered modules and lessons."""
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    status = serializers.CharField()
+    modules = OutlineModuleSerializer(many=True)
+
+
+class ProgressUpdateSerializer(serializers.Serializer):
+    """Serializer for the new state of one lesson for the user."""
+    lesson = serializers.IntegerField()
+    state = serializers.ChoiceField(choices=STATES)
+
+
+class ProgressBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of lesson progress updates."""
+    updates = ProgressUpdateSerializer(many=True, allow_empty=False)
+
+    def validate_updates(self, value):
+        if len(value) > settings.PROGRESS_MAX_UPDATES:
+            raise serializers.ValidationError(
+                f'At most {settings.PROGRESS_MAX_UPDATES} updates can be '
+                f'sent at once.')
+        return value
+
+
+class ProgressSerializer(serializers.Serializer):
+    """Serializer for the progress of the user in a course."""
+    course = serializers.IntegerField()
+    read = serializers.IntegerField()
+    completed = serializers.IntegerField()
+    total = serializers.IntegerField()
+    percent = serializers.FloatField()
+
+
+class ProgressDetailSerializer(ProgressSerializer):
+    """Serializer for the progress of the user in a course by lesson."""
+    read_lessons = serializers.ListField(child=serializers.IntegerField())
+    completed_lessons = serializers.ListField(
+        child=serializers.IntegerField())
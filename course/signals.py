@@ -0,0 +1,18 @@
+"""
+Signal handlers for the course app
+"""
+from django.db.models import F, Func, Value
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from core.models import Course, Lesson
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    """Stop counting a deleted lesson in the progress of its course"""
+    # The bit is within the mask, it was set when the lesson was created.
+    Course.objects.filter(modules=instance.module_id).update(
+        lesson_mask=Func(F('lesson_mask'), Value(instance.index), Value(0),
+                         function='set_bit'),
+    )
@@ -0,0 +1,183 @@
+"""
+Tests for the courses API
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Course, Lesson, Module
+from core.tests.mixins import QueryInspectionMixin
+from course import tree
+
+COURSES_URL = reverse('course:course-list')
+MODULES_URL = reverse('course:module-list')
+LESSONS_URL = reverse('course:lesson-list')
+
+
+def outline_url(course_id):
+    return reverse('course:course-outline', args=[course_id])
+
+
+def move_url(kind, pk):
+    return reverse(f'course:{kind}-move', args=[pk])
+
+
+def create_lesson(module, title, **params):
+    """Append and return a sample lesson"""
+    defaults = {'content': 'Text', 'read_time_min': 1}
+    defaults.update(params)
+    return tree.insert(Lesson(module=module, title=title, **defaults))
+
+
+class PublicCourseApiTests(QueryInspectionMixin, TestCase):
+    """Test reading courses without authentication"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.course = Course.objects.create(by=user, title='Django')
+        self.module = tree.insert(Module(course=self.course, title='Basics'))
+        self.lesson = create_lesson(self.module, 'Views',
+                                    content='**Views**')
+
+    def test_outline(self):
+        """Test the outline lists modules and lessons in order"""
+        second = tree.insert(Module(course=self.course, title='Models'))
+        create_lesson(second, 'Fields')
+        create_lesson(self.module, 'Intro')
+        tree.move(second, 0)
+
+        with self.assertQueryBudget(2):
+            res = self.client.get(outline_url(self.course.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(module['title'], [lesson['title']
+                                for lesson in module['lessons']])
+             for module in res.data['modules']],
+            [('Models', ['Fields']), ('Basics', ['Views', 'Intro'])])
+
+    def test_outline_not_found(self):
+        """Test the outline of a missing course is a 404"""
+        res = self.client.get(outline_url(self.course.id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_lesson_detail_has_rendered_content(self):
+        """Test a lesson is returned with its stored HTML rendering"""
+        res = self.client.get(reverse('course:lesson-detail',
+                                      args=[self.lesson.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['content_html'],
+                         '<p><strong>Views</strong></p>')
+
+    def test_list_lessons_of_module(self):
+        """Test lessons can be listed for one module, without content"""
+        other = tree.insert(Module(course=self.course, title='Models'))
+        create_lesson(other, 'Fields')
+
+        res = self.client.get(LESSONS_URL, {'module': self.module.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([lesson['title'] for lesson in res.data], ['Views'])
+        self.assertNotIn('content', res.data[0])
+
+    def test_write_requires_staff(self):
+        """Test non staff users cannot change courses"""
+        res = self.client.post(move_url('lesson', self.lesson.id),
+                               {'position': 0})
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateCourseApiTests(QueryInspectionMixin, TestCase):
+    """Test editing courses as staff"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(by=self.user, title='Django')
+
+    def test_create_course(self):
+        """Test creating a course sets its author"""
+        res = self.client.post(COURSES_URL, {'title': 'Python'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Course.objects.get(id=res.data['id']).by, self.user)
+
+    def test_create_modules_in_order(self):
+        """Test modules are appended unless a position is given"""
+        for title, extra in [('Views', {}), ('Models', {}),
+                             ('Intro', {'position': 0})]:
+            res = self.client.post(MODULES_URL, {'course': self.course.id,
+                                                 'title': title, **extra})
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(res.data['position'], 0)
+        self.assertEqual(
+            list(self.course.modules.values_list('title', 'position')),
+            [('Intro', 0), ('Views', 1), ('Models', 2)])
+
+    def test_update_does_not_reorder(self):
+        """Test position and parent are ignored by updates"""
+        module = tree.insert(Module(course=self.course, title='Basics'))
+        tree.insert(Module(course=self.course, title='Models'))
+
+        res = self.client.patch(
+            reverse('course:module-detail', args=[module.id]),
+            {'title': 'Intro', 'position': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        module.refresh_from_db()
+        self.assertEqual((module.title, module.position), ('Intro', 0))
+
+    def test_move_lesson(self):
+        """Test moving a lesson to another module"""
+        first = tree.insert(Module(course=self.course, title='Basics'))
+        second = tree.insert(Module(course=self.course, title='Models'))
+        lesson = create_lesson(first, 'Views')
+        create_lesson(second, 'Fields')
+
+        res = self.client.post(move_url('lesson', lesson.id),
+                               {'position': 0, 'module': second.id})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data['module'], res.data['position']),
+                         (second.id, 0))
+        self.assertEqual(
+            list(second.lessons.values_list('title', flat=True)),
+            ['Views', 'Fields'])
+
+    def test_move_requires_position(self):
+        """Test a move without a valid position is rejected"""
+        module = tree.insert(Module(course=self.course, title='Basics'))
+
+        res = self.client.post(move_url('module', module.id),
+                               {'position': -1})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_module_closes_gap(self):
+        """Test deleting a module shifts the following modules back"""
+        module = tree.insert(Module(course=self.course, title='Basics'))
+        tree.insert(Module(course=self.course, title='Models'))
+
+        res = self.client.delete(reverse('course:module-detail',
+                                         args=[module.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(self.course.modules.values_list('title', 'position')),
+            [('Models', 0)])
@@ -0,0 +1,191 @@
+"""
+Tests for tracking lesson progress
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import bitsets
+from core.models import Course, CourseProgress, Lesson, Module
+from core.tests.mixins import QueryInspectionMixin
+from course import tree
+
+PROGRESS_URL = reverse('course:progress-list')
+
+
+def detail_url(course_id):
+    return reverse('course:progress-detail', args=[course_id])
+
+
+def create_lessons(module, count):
+    """Append count lessons to a module and return them in order"""
+    return [
+        tree.insert(Lesson(module=module, title=f'Lesson {index}',
+                           content='Text', read_time_min=1))
+        for index in range(count)
+    ]
+
+
+class BitsetTests(TestCase):
+    """Test the bytes encoding of bitsets"""
+
+    def test_round_trip(self):
+        """Test bits survive storing as bytes"""
+        data = bitsets.add(bitsets.add(b'', 3), 17)
+
+        self.assertEqual(len(data), 3)
+        self.assertEqual(bitsets.members(bitsets.to_int(data)), [3, 17])
+        self.assertEqual(bitsets.discard(data, 17), b'\x08')
+        self.assertEqual(bitsets.count(bitsets.to_int(data)), 2)
+
+
+class LessonIndexTests(TestCase):
+    """Test lessons get a stable bit in their course"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.course = Course.objects.create(by=user, title='Django')
+        self.module = tree.insert(Module(course=self.course, title='Basics'))
+
+    def test_indexes_are_not_reused(self):
+        """Test deleting a lesson clears its bit without reusing it"""
+        lessons = create_lessons(self.module, 3)
+
+        tree.remove(lessons[1])
+        added = create_lessons(self.module, 1)[0]
+
+        self.assertEqual([lesson.index for lesson in lessons], [0, 1, 2])
+        self.assertEqual(added.index, 3)
+        self.course.refresh_from_db()
+        self.assertEqual(
+            bitsets.members(bitsets.to_int(self.course.lesson_mask)),
+            [0, 2, 3])
+
+
+class PublicProgressApiTests(TestCase):
+    """Test the progress API without authentication"""
+
+    def test_login_required(self):
+        """Test authentication is required to read progress"""
+        res = APIClient().get(PROGRESS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateProgressApiTests(QueryInspectionMixin, TestCase):
+    """Test recording and reading progress as a learner"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            email='learner@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.course = Course.objects.create(by=self.user, title='Django')
+        module = tree.insert(Module(course=self.course, title='Basics'))
+        self.lessons = create_lessons(module, 4)
+
+    def post_updates(self, *updates):
+        return self.client.post(PROGRESS_URL, {'updates': [
+            {'lesson': lesson.id, 'state': state}
+            for lesson, state in updates
+        ]}, format='json')
+
+    def test_batch_update(self):
+        """Test a batch of updates writes one row per course"""
+        other = Course.objects.create(by=self.user, title='Python')
+        lesson = create_lessons(
+            tree.insert(Module(course=other, title='Intro')), 1)[0]
+
+        with self.assertQueryBudget(12):
+            res = self.post_updates(
+                (self.lessons[0], 'completed'), (self.lessons[1], 'read'),
+                (self.lessons[2], 'completed'), (lesson, 'read'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(CourseProgress.objects.count(), 2)
+        self.assertEqual(
+            [(row['course'], row['read'], row['completed'], row['percent'])
+             for row in res.data],
+            [(self.course.id, 3, 2, 50.0), (other.id, 1, 0, 0.0)])
+
+    def test_unread_clears_states(self):
+        """Test marking a lesson unread clears read and completed"""
+        self.post_updates((self.lessons[0], 'completed'))
+
+        res = self.post_updates((self.lessons[0], 'unread'))
+
+        self.assertEqual((res.data[0]['read'], res.data[0]['completed']),
+                         (0, 0))
+
+    def test_deleted_lessons_are_not_counted(self):
+        """Test completion ignores lessons deleted after being completed"""
+        self.post_updates((self.lessons[0], 'completed'),
+                          (self.lessons[1], 'completed'))
+
+        tree.remove(self.lessons[0])
+        with self.assertQueryBudget(2):
+            res = self.client.get(PROGRESS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            (res.data[0]['completed'], res.data[0]['total'],
+             res.data[0]['percent']),
+            (1, 3, 33.3))
+
+    def test_retrieve_by_lesson(self):
+        """Test the progress in one course lists lesson states"""
+        self.post_updates((self.lessons[2], 'completed'),
+                          (self.lessons[3], 'read'))
+
+        res = self.client.get(detail_url(self.course.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['read_lessons'],
+                         [self.lessons[2].id, self.lessons[3].id])
+        self.assertEqual(res.data['completed_lessons'], [self.lessons[2].id])
+
+    def test_retrieve_not_started(self):
+        """Test a course not started reports no progress"""
+        res = self.client.get(detail_url(self.course.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual((res.data['total'], res.data['read_lessons']),
+                         (4, []))
+
+    def test_unknown_lesson(self):
+        """Test updating a lesson that does not exist is rejected"""
+        res = self.client.post(PROGRESS_URL, {'updates': [
+            {'lesson': self.lessons[-1].id + 1, 'state': 'read'}
+        ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CourseProgress.objects.exists())
+
+    @override_settings(PROGRESS_MAX_UPDATES=2)
+    def test_batch_size_is_capped(self):
+        """Test batches larger than the configured maximum are rejected"""
+        res = self.post_updates(*[(lesson, 'read')
+                                  for lesson in self.lessons[:3]])
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lessons_move_within_their_course(self):
+        """Test a lesson cannot move to a module of another course"""
+        self.user.is_staff = True
+        self.user.save()
+        other = Course.objects.create(by=self.user, title='Python')
+        module = tree.insert(Module(course=other, title='Intro'))
+
+        res = self.client.post(
+            reverse('course:lesson-move', args=[self.lessons[0].id]),
+            {'position': 0, 'module': module.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,121 @@
+"""
+Tests for ordering modules and lessons in the course outline
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core.models import Course, Lesson, Module
+from course import tree
+
+
+def create_lessons(module, count):
+    """Append count lessons to a module and return them in order"""
+    return [
+        tree.insert(Lesson(module=module, title=f'Lesson {index}',
+                           content='Text', read_time_min=1))
+        for index in range(count)
+    ]
+
+
+def tuple_ids():
+    """Return the physical row id of every lesson by primary key"""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT id, ctid FROM core_lesson')
+        return dict(cursor.fetchall())
+
+
+class TreeTests(TestCase):
+    """Test inserting, moving and removing ordered nodes"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.course = Course.objects.create(by=user, title='Django')
+        self.module = tree.insert(Module(course=self.course, title='Basics'))
+        self.other = tree.insert(Module(course=self.course, title='Models'))
+
+    def titles(self, module):
+        return list(module.lessons.values_list('title', flat=True))
+
+    def test_insert_appends_or_shifts(self):
+        """Test nodes are appended by default and inserted at a position"""
+        create_lessons(self.module, 2)
+        tree.insert(Lesson(module=self.module, title='Intro', content='c',
+                           read_time_min=1), position=0)
+
+        self.assertEqual(self.titles(self.module),
+                         ['Intro', 'Lesson 0', 'Lesson 1'])
+        self.assertEqual(
+            list(self.module.lessons.values_list('position', flat=True)),
+            [0, 1, 2])
+        self.assertEqual([self.module.position, self.other.position], [0, 1])
+
+    def test_move_up_and_down(self):
+        """Test moving a lesson within its module keeps positions dense"""
+        lessons = create_lessons(self.module, 4)
+
+        tree.move(lessons[3], 1)
+        self.assertEqual(self.titles(self.module),
+                         ['Lesson 0', 'Lesson 3', 'Lesson 1', 'Lesson 2'])
+
+        tree.move(lessons[3], 10)
+        self.assertEqual(self.titles(self.module),
+                         ['Lesson 0', 'Lesson 1', 'Lesson 2', 'Lesson 3'])
+
+    def test_move_rewrites_only_affected_siblings(self):
+        """Test siblings outside the moved range are not rewritten"""
+        lessons = create_lessons(self.module, 6)
+        before = tuple_ids()
+
+        tree.move(lessons[4], 2)
+
+        after = tuple_ids()
+        rewritten = {pk for pk in before if before[pk] != after[pk]}
+        self.assertEqual(rewritten,
+                         {lessons[2].pk, lessons[3].pk, lessons[4].pk})
+
+    def test_move_to_another_module(self):
+        """Test moving a lesson closes its old gap and opens a new one"""
+        lessons = create_lessons(self.module, 3)
+        create_lessons(self.other, 2)
+
+        tree.move(lessons[0], 1, self.other.pk)
+
+        self.assertEqual(self.titles(self.module), ['Lesson 1', 'Lesson 2'])
+        self.assertEqual(self.titles(self.other),
+                         ['Lesson 0', 'Lesson 0', 'Lesson 1'])
+        self.assertEqual(
+            list(self.module.lessons.values_list('position', flat=True)),
+            [0, 1])
+
+    def test_remove_closes_gap(self):
+        """Test removing a node shifts the following siblings back"""
+        lessons = create_lessons(self.module, 3)
+
+        tree.remove(lessons[0])
+
+        self.assertEqual(
+            list(self.module.lessons.values_list('title', 'position')),
+            [('Lesson 1', 0), ('Lesson 2', 1)])
+
+    def test_outline_in_one_query(self):
+        """Test the ordered outline, empty modules included, is one query"""
+        create_lessons(self.other, 2)
+        tree.move(self.other, 0)
+
+        with self.assertNumQueries(1):
+            outline = tree.outline(self.course.pk)
+
+        self.assertEqual(outline['title'], 'Django')
+        self.assertEqual(
+            [(module['title'], [lesson['title']
+                                for lesson in module['lessons']])
+             for module in outline['modules']],
+            [('Models', ['Lesson 0', 'Lesson 1']), ('Basics', [])])
+
+    def test_outline_of_missing_course(self):
+        """Test the outline of a course that does not exist is None"""
+        self.assertIsNone(tree.outline(self.course.pk + 1))
@@ -0,0 +1,128 @@
+"""
+Ordered course outline: modules within a course, lessons within a module
+"""
+from django.db import transaction
+from django.db.models import F
+
+from core.models import Course, Lesson, Module
+
+# The parent each kind of node is ordered within
+PARENTS = {
+    Module: ('course', Course),
+    Lesson: ('module', Module),
+}
+
+
+def _lock(parent_model, *parent_ids):
+    """Lock parent rows so their children are reordered one at a time"""
+    list(parent_model.objects.select_for_update()
+         .filter(pk__in=parent_ids).order_by('pk').values_list('pk'))
+
+
+def _siblings(node_model, parent_id):
+    field, _ = PARENTS[node_model]
+    return node_model.objects.filter(**{f'{field}_id': parent_id})
+
+
+def _shift(siblings, delta, start, stop=None):
+    """Move the siblings at positions start up to stop by delta"""
+    siblings = siblings.filter(position__gte=start)
+    if stop is not None:
+        siblings = siblings.filter(position__lt=stop)
+    siblings.update(position=F('position') + delta)
+
+
+def _clamp(position, last):
+    return last if position is None else max(0, min(position, last))
+
+
+def insert(node, position=None):
+    """Save a new node at position, or last, among its siblings"""
+    field, parent_model = PARENTS[type(node)]
+    parent_id = getattr(node, f'{field}_id')
+    with transaction.atomic():
+        _lock(parent_model, parent_id)
+        siblings = _siblings(type(node), parent_id)
+        node.position = _clamp(position, siblings.count())
+        _shift(siblings, 1, node.position)
+        node.save()
+    return node
+
+
+def move(node, position, parent_id=None):
+    """Move a node to position among its siblings, or those of parent_id.
+
+    Only the siblings between the old and the new position are
+    rewritten.
+    """
+    field, parent_model = PARENTS[type(node)]
+    old_parent_id = getattr(node, f'{field}_id')
+    parent_id = parent_id or old_parent_id
+    with transaction.atomic():
+        _lock(parent_model, old_parent_id, parent_id)
+        # Read the position again under the lock, a concurrent reorder of
+        # the siblings may have changed it.
+        node.refresh_from_db(fields=['position'])
+        old = node.position
+        siblings = _siblings(type(node), parent_id).exclude(pk=node.pk)
+        if parent_id == old_parent_id:
+            new = _clamp(position, siblings.count())
+            if new < old:
+                _shift(siblings, 1, new, old)
+            elif new > old:
+                _shift(siblings, -1, old + 1, new + 1)
+        else:
+            _shift(_siblings(type(node), old_parent_id), -1, old + 1)
+            new = _clamp(position, siblings.count())
+            _shift(siblings, 1, new)
+            setattr(node, f'{field}_id', parent_id)
+        node.position = new
+        node.save(update_fields=[field, 'position'])
+    return node
+
+
+def remove(node):
+    """Delete a node and close the gap it leaves among its siblings"""
+    field, parent_model = PARENTS[type(node)]
+    parent_id = getattr(node, f'{field}_id')
+    with transaction.atomic():
+        _lock(parent_model, parent_id)
+        node.refresh_from_db(fields=['position'])
+        node.delete()
+        _shift(_siblings(type(node), parent_id), -1, node.position + 1)
+
+
+def outline(course_id):
+    """Return a course with its ordered modules and lessons, or None.
+
+    The whole tree is read in one query joining the course to its modules
+    and lessons, which walks the position indexes in order.
+    """
+    rows = Course.objects.filter(pk=course_id).values_list(
+        'id', 'title', 'status',
+        'modules__id', 'modules__title', 'modules__position',
+        'modules__lessons__id', 'modules__lessons__title',
+        'modules__lessons__position', 'modules__lessons__read_time_min',
+    ).order_by('modules__position', 'modules__lessons__position')
+
+    course = None
+    modules = {}
+    for (pk, title, status, module_id, module_title, module_position,
+         lesson_id, lesson_title, lesson_position, read_time_min) in rows:
+        if course is None:
+            course = {'id': pk, 'title': title, 'status': status,
+                      'modules': []}
+        if module_id is None:
+            continue
+        if module_id not in modules:
+            modules[module_id] = {'id': module_id, 'title': module_title,
+                                  'position': module_position, 'lessons': []}
+            course['modules'].append(modules[module_id])
+        if lesson_id is not None:
+            modules[module_id]['lessons'].append({
+                'id': lesson_id,
+                'title': lesson_title,
+                'position': lesson_position,
+                'read_time_min': read_time_min,
+            })
+    return course
@@ -0,0 +1,23 @@
+"""
+URL Configuration for courses API
+"""
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from course.views import (
+    CourseViewSet,
+    LessonViewSet,
+    ModuleViewSet,
+    ProgressViewSet,
+)
+
+router = DefaultRouter()
+router.register('courses', CourseViewSet)
+router.register('modules', ModuleViewSet)
+router.register('lessons', LessonViewSet)
+router.register('progress', ProgressViewSet, basename='progress')
+
+app_name = 'course'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,206 @@
+"""
+Views related to courses APIs
+"""
+from drf_spectacular.utils import (
+    extend_schema_view,
+    extend_schema,
+    OpenApiParameter,
+    OpenApiTypes,
+)
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import ValidationError
+
+from core.permissions import IsAdminUserOrReadOnly
+from core.throttling import WriteThrottle
+
+from core.models import Course, Lesson, Module
+from course import progress, serializers, tree
+
+
+def _parent_parameter(name, parent):
+    return extend_schema_view(
+        list=extend_schema(
+            parameters=[
+                OpenApiParameter(
+                    name=name,
+                    type=OpenApiTypes.INT,
+                    description=f'Only list the children of this {parent}'
+                ),
+            ]
+        )
+    )
+
+
+class CourseViewSet(viewsets.ModelViewSet):
+    """API endpoint that allows users to apply CRUD on courses"""
+    serializer_class = serializers.CourseSerializer
+    queryset = Course.objects.all()
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUserOrReadOnly]
+    throttle_classes = [WriteThrottle]
+    # Most queries per request, counting the token lookup
+    query_budgets = {
+        'list': 2,
+        'retrieve': 2,
+        'outline': 2,
+    }
+
+    def perform_create(self, serializer):
+        serializer.save(by=self.request.user)
+
+    @extend_schema(responses=serializers.OutlineSerializer)
+    @action(methods=['GET'], detail=True, url_path='outline')
+    def outline(self, request, pk=None):
+        """Retrieve a course with its ordered modules and lessons"""
+        course = tree.outline(pk)
+        if course is None:
+            raise Http404
+        return Response(serializers.OutlineSerializer(course).data)
+
+
+class OrderedViewSet(viewsets.ModelViewSet):
+    """CRUD on nodes kept in order among their siblings"""
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [IsAdminUserOrReadOnly]
+    throttle_classes = [WriteThrottle]
+    move_serializer_class = serializers.MoveSerializer
+    parent_field = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        parent = self.request.query_params.get(self.parent_field)
+        if self.action == 'list' and parent:
+            try:
+                queryset = queryset.filter(**{self.parent_field: int(parent)})
+            except ValueError:
+                return queryset.none()
+        return queryset
+
+    def perform_create(self, serializer):
+        position = serializer.validated_data.pop('position', None)
+        serializer.instance = tree.insert(
+            self.queryset.model(**serializer.validated_data), position)
+
+    def perform_destroy(self, instance):
+        tree.remove(instance)
+
+    def _move(self, request):
+        node = self.get_object()
+        serializer = self.move_serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        parent = serializer.validated_data.get(self.parent_field)
+        if parent is not None:
+            self.validate_parent(node, parent)
+        tree.move(node, serializer.validated_data['position'],
+                  parent.pk if parent else None)
+        return Response(self.get_serializer(node).data)
+
+    def validate_parent(self, node, parent):
+        """Raise a ValidationError if node cannot move under parent"""
+
+
+@_parent_parameter('course', 'course')
+class ModuleViewSet(OrderedViewSet):
+    """API endpoint that allows users to apply CRUD on course modules"""
+    serializer_class = serializers.ModuleSerializer
+    queryset = Module.objects.all()
+    parent_field = 'course'
+    query_budgets = {
+        'list': 2,
+        'retrieve': 2,
+    }
+
+    @extend_schema(request=serializers.MoveSerializer)
+    @action(methods=['POST'], detail=True, url_path='move')
+    def move(self, request, pk=None):
+        """Move a module to a position among the modules of its course"""
+        return self._move(request)
+
+
+@_parent_parameter('module', 'module')
+class LessonViewSet(OrderedViewSet):
+    """API endpoint that allows users to apply CRUD on module lessons"""
+    serializer_class = serializers.LessonDetailSerializer
+    queryset = Lesson.objects.all()
+    move_serializer_class = serializers.LessonMoveSerializer
+    parent_field = 'module'
+    query_budgets = {
+        'list': 2,
+        'retrieve': 2,
+    }
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return serializers.LessonSerializer
+        return self.serializer_class
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.defer('content', 'content_html')
+        return queryset
+
+    def validate_parent(self, node, parent):
+        # Progress bitsets index lessons within their course.
+        if parent.course_id != node.module.course_id:
+            raise ValidationError(
+                {'module': ['Lessons can only move within their course.']})
+
+    @extend_schema(request=serializers.LessonMoveSerializer)
+    @action(methods=['POST'], detail=True, url_path='move')
+    def move(self, request, pk=None):
+        """Move a lesson to a position in its module or another one"""
+        return self._move(request)
+
+
+class ProgressViewSet(viewsets.GenericViewSet):
+    """API endpoint for the lesson progress of the authenticated user"""
+    serializer_class = serializers.ProgressSerializer
+    authentication_classes = [TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [WriteThrottle]
+    query_budgets = {
+        'list': 2,
+        'retrieve': 4,
+    }
+
+    def list(self, request):
+        """List the progress of the user in each course started"""
+        return Response(
+            self.get_serializer(progress.summaries(request.user),
+                                many=True).data)
+
+    @extend_schema(responses=serializers.ProgressDetailSerializer)
+    def retrieve(self, request, pk=None):
+        """Retrieve the progress of the user in a course by lesson"""
+        try:
+            course = get_object_or_404(
+                Course.objects.only('lesson_mask'), pk=int(pk))
+        except ValueError:
+            raise Http404
+        found = progress.summaries(request.user, [course.pk])
+        data = found[0] if found else progress.summary(
+            course.pk, b'', b'', course.lesson_mask)
+        states = progress.lesson_states(request.user, course.pk)
+        data.update(read_lessons=states['read'],
+                    completed_lessons=states['completed'])
+        return Response(serializers.ProgressDetailSerializer(data).data)
+
+    @extend_schema(request=serializers.ProgressBatchSerializer,
+                   responses=serializers.ProgressSerializer(many=True))
+    def create(self, request):
+        """Set the state of a batch of lessons for the user"""
+        batch = serializers.ProgressBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        updates = [(update['lesson'], update['state'])
+                   for update in batch.validated_data['updates']]
+        try:
+            summaries = progress.record(request.user, updates)
+        except ValueError as error:
+            raise ValidationError({'updates': [str(error)]})
+        return Response(self.get_serializer(summaries, many=True).data)
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup, the post events and warmup need the app registry.
+from core.warmup import warmup_lifespan  # noqa: E402
+from post.streaming import events_router  # noqa: E402
+
+application = warmup_lifespan(events_router(django_application))
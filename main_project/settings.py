@@ -34,6 +34,13 @@ ALLOWED_HOSTS.extend(
 
 # Application definition
 
+# API only workers skip the admin and the API docs, which they never serve,
+# to boot faster. Run a separate deployment without it for those pages.
+API_ONLY = bool(int(os.environ.get('API_ONLY', 0)))
+
+# Apps that only serve the admin and the API docs pages
+ADMIN_APPS = ['jazzmin', 'django.contrib.admin', 'drf_spectacular']
+
 INSTALLED_APPS = [
     'jazzmin',
     'django.contrib.admin',
@@ -48,8 +55,12 @@ INSTALLED_APPS = [
     'rest_framework',
     'drf_spectacular',
     'post',
+    'course',
 ]
 
+if API_ONLY:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in ADMIN_APPS]
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -58,8 +69,17 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.QueryInspectorMiddleware',
+    'core.middleware.SlowQueryContextMiddleware',
 ]
 
+# Query inspection of each request: off, warn (log and add X-Query-Count)
+# or raise. Warns by default in DEBUG.
+QUERY_INSPECTOR = os.environ.get('QUERY_INSPECTOR',
+                                 'warn' if DEBUG else 'off')
+# A query shape run this many times in one request is reported as N+1
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 3))
+
 ROOT_URLCONF = 'main_project.urls'
 
 TEMPLATES = [
@@ -91,9 +111,30 @@ DATABASES = {
         'NAME': os.environ.get("DB_NAME"),
         'USER': os.environ.get("DB_USER"),
         'PASSWORD': os.environ.get("DB_PASS"),
+        # Seconds a worker keeps its connection open between requests
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Throttle buckets must be shared by all uWSGI workers, so deployments
+# point MEMCACHED_LOCATION at a memcached instance.
+
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ.get('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -139,9 +180,123 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('THROTTLE_LOGIN_IP', '20/min'),
+        'login_email': os.environ.get('THROTTLE_LOGIN_EMAIL', '5/min'),
+        'signup_ip': os.environ.get('THROTTLE_SIGNUP_IP', '20/hour'),
+        'write': os.environ.get('THROTTLE_WRITE', '120/min'),
+    },
 }
 
+if not API_ONLY:
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = (
+        'drf_spectacular.openapi.AutoSchema'
+    )
+
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
 }
+
+# Unfiltered admin changelists above this many rows use estimated counts
+ADMIN_ESTIMATED_COUNT_MIN = int(
+    os.environ.get('ADMIN_ESTIMATED_COUNT_MIN', 100000)
+)
+
+# Background task queue
+# TASKS_EAGER runs tasks inline instead of storing them for run_worker.
+TASKS_EAGER = bool(int(os.environ.get('TASKS_EAGER', 0)))
+TASK_WORKER_CONCURRENCY = int(os.environ.get('TASK_WORKER_CONCURRENCY', 2))
+TASK_POLL_INTERVAL = float(os.environ.get('TASK_POLL_INTERVAL', 1))
+TASK_MAX_ATTEMPTS = int(os.environ.get('TASK_MAX_ATTEMPTS', 3))
+TASK_RETRY_BACKOFF = int(os.environ.get('TASK_RETRY_BACKOFF', 30))
+TASK_LOCK_TIMEOUT = int(os.environ.get('TASK_LOCK_TIMEOUT', 3600))
+
+# Number of precomputed related posts kept per post
+RELATED_POSTS_TOP_K = int(os.environ.get('RELATED_POSTS_TOP_K', 10))
+
+# Posts retagged together past this count rebuild all related posts
+RELATED_POSTS_REFRESH_MAX = int(
+    os.environ.get('RELATED_POSTS_REFRESH_MAX', 200)
+)
+
+# Post views are buffered per process and flushed in one statement
+VIEW_COUNT_FLUSH_INTERVAL = float(
+    os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', 10)
+)
+VIEW_COUNT_FLUSH_SIZE = int(os.environ.get('VIEW_COUNT_FLUSH_SIZE', 500))
+# Trending scores halve every TRENDING_HALF_LIFE seconds
+TRENDING_HALF_LIFE = int(os.environ.get('TRENDING_HALF_LIFE', 6 * 3600))
+TRENDING_MAX_POSTS = int(os.environ.get('TRENDING_MAX_POSTS', 1000))
+
+# Post revisions store a full snapshot at least every N revisions
+POST_REVISION_SNAPSHOT_INTERVAL = int(
+    os.environ.get('POST_REVISION_SNAPSHOT_INTERVAL', 20))
+
+# Changes newer than this many seconds are held back from the sync feed
+# so transactions still in flight cannot be skipped by a cursor
+POST_CHANGES_SETTLE_SECONDS = int(
+    os.environ.get('POST_CHANGES_SETTLE_SECONDS', 5))
+# Queries slower than SLOW_QUERY_THRESHOLD_MS are sampled at
+# SLOW_QUERY_SAMPLE_RATE with their EXPLAIN plan into a ring of the last
+# SLOW_QUERY_LOG_SIZE rows; a threshold of 0 disables the log
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS',
+                                               200))
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', 1))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 1000))
+# EXPLAIN ANALYZE runs a sampled SELECT a second time
+SLOW_QUERY_EXPLAIN_ANALYZE = bool(
+    int(os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE', 0)))
+
+# Requests accepted by /api/batch and threads running its reads
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 20))
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))
+
+# Post events pushed to streaming clients: LocalBackend only reaches
+# connections in the publishing process, PostgresBackend reaches all
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND',
+                                'post.events.PostgresBackend')
+# Events buffered per connection before a lagging client is told to resync
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+# Seconds between keepalive comments on idle event streams
+EVENTS_HEARTBEAT = int(os.environ.get('EVENTS_HEARTBEAT', 15))
+# Reconnection delay suggested to SSE clients, in milliseconds
+EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))
+
+# Deleted post markers are kept this many days; older cursors must resync
+POST_TOMBSTONE_RETENTION_DAYS = int(
+    os.environ.get('POST_TOMBSTONE_RETENTION_DAYS', 30))
+
+# Rows removed per transaction when purging users scheduled for deletion
+DELETION_BATCH_SIZE = int(os.environ.get('DELETION_BATCH_SIZE', 500))
+
+# Posts changed by one bulk update, delete or retag request
+BULK_MAX_POSTS = int(os.environ.get('BULK_MAX_POSTS', 1000))
+
+# Seconds a serialized post stays cached for list responses
+POST_FRAGMENT_TIMEOUT = int(os.environ.get('POST_FRAGMENT_TIMEOUT', 24 * 3600))
+
+# Number of rows fetched per server-side cursor round trip by post exports
+POST_EXPORT_CHUNK_SIZE = int(os.environ.get('POST_EXPORT_CHUNK_SIZE', 2000))
+
+# Lesson progress updates accepted in one request
+PROGRESS_MAX_UPDATES = int(os.environ.get('PROGRESS_MAX_UPDATES', 500))
+
+# Worker warmup after fork, or at startup under runserver and ASGI
+WARMUP = bool(int(os.environ.get('WARMUP', 1)))
+# Anonymous reads made to prime the hot endpoints. The post list is not
+# paginated, so its first page is the trending one.
+WARMUP_PATHS = list(filter(None, os.environ.get(
+    'WARMUP_PATHS', '/api/posts/tags/,/api/posts/posts/trending/'
+).split(',')))
+
+# Report the warmup time on the console, which uWSGI logs
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.warmup': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
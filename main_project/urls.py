@@ -14,28 +14,39 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.static import static
 from django.conf import settings
-from drf_spectacular.views import (SpectacularAPIView, SpectacularSwaggerView)
 
 import core.views
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/health-check', core.views.health_check, name='health-check'),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
-    path(
-        'api/docs/',
-        SpectacularSwaggerView.as_view(url_name='api-schema'),
-        name='api-docs'
-    ),
+    path('api/batch', core.views.batch, name='batch'),
+    path('api/slow-queries', core.views.slow_queries, name='slow-queries'),
     path('api/user/', include('user.urls')),
     path('api/posts/', include('post.urls')),
+    path('api/courses/', include('course.urls')),
 
 ]
 
+if not settings.API_ONLY:
+    from django.contrib import admin
+    from drf_spectacular.views import (
+        SpectacularAPIView,
+        SpectacularSwaggerView,
+    )
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+        path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+        path(
+            'api/docs/',
+            SpectacularSwaggerView.as_view(url_name='api-schema'),
+            name='api-docs'
+        ),
+    ]
+
 if settings.DEBUG is True:
     urlpatterns += static(
         settings.MEDIA_URL,
@@ -14,3 +14,40 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'main_project.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf, and with it every view, serializer and model, and
+# compile its routes now. uWSGI loads this module in the master, so the
+# forked workers share those pages copy-on-write instead of each building
+# them on its first request. Nothing here may open a database connection:
+# it would be shared too.
+from django.conf import settings  # noqa: E402
+
+from core.warmup import (  # noqa: E402
+    build_serializers,
+    resolve_routes,
+    warmup,
+)
+
+resolve_routes()
+
+# Warm each worker once uWSGI forks it. Other servers, runserver and
+# tests import this module without a fork to follow: only the serializers
+# are built now, and the database is left to the first requests.
+if settings.WARMUP:
+    try:
+        from uwsgidecorators import postfork
+    except ImportError:
+        build_serializers()
+    else:
+        postfork(warmup)
+
+# Write the views a worker buffered when uWSGI stops it gracefully, while
+# the database is still reachable.
+try:
+    import uwsgi
+except ImportError:
+    uwsgi = None
+if uwsgi is not None:
+    from post.counters import view_counter
+
+    uwsgi.atexit = view_counter.flush
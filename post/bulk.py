@@ -0,0 +1,146 @@
+"""
+Set-based operations on many posts selected by ids or filters
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Post, PostTombstone, Tag
+from post.events import publish
+from post.fragments import invalidate
+from post.keywords import filter_keywords
+from post.tasks import refresh_related_posts_many
+
+_in_bulk = ContextVar('in_bulk', default=False)
+
+
+def in_bulk():
+    """Return whether per-post signal work is done by a bulk operation"""
+    return _in_bulk.get()
+
+
+@contextmanager
+def _bulk():
+    token = _in_bulk.set(True)
+    try:
+        yield
+    finally:
+        _in_bulk.reset(token)
+
+
+def select_posts(ids=None, filters=None):
+    """Return the posts with the given ids, or else matching filters"""
+    if ids is not None:
+        return Post.objects.filter(pk__in=ids)
+    filters = filters or {}
+    queryset = Post.objects.all()
+    if 'status' in filters:
+        queryset = queryset.filter(status=filters['status'])
+    if 'by' in filters:
+        queryset = queryset.filter(by_id=filters['by'])
+    if 'tags' in filters:
+        queryset = queryset.filter(tags__id__in=filters['tags'])
+    if 'keywords' in filters:
+        queryset = filter_keywords(queryset, filters['keywords'],
+                                   filters.get('keywords_match', 'any'))
+    return queryset
+
+
+def _lock(queryset, *fields):
+    """Lock the selected posts and return their ids, or (id, *fields)"""
+    limit = settings.BULK_MAX_POSTS
+    rows = list(
+        Post.objects.filter(pk__in=queryset.values('pk')).order_by('pk')
+        .select_for_update().values_list('pk', *fields, flat=not fields)
+        [:limit + 1]
+    )
+    if len(rows) > limit:
+        raise ValueError(f'The selection matches more than {limit} posts.')
+    return rows
+
+
+def _publish_all(events):
+    for event in events:
+        publish(event)
+
+
+def touch_posts(ids, **values):
+    """Update posts and their updated_at in one UPDATE, announcing them.
+
+    The cached fragments are dropped, and the sync feed and event
+    subscribers see the posts as changed once committed.
+    """
+    now = timezone.now()
+    Post.objects.filter(pk__in=ids).update(**values, updated_at=now)
+    invalidate(ids)
+    events = [{'type': 'updated', 'id': pk,
+               'updated_at': now.isoformat()} for pk in ids]
+    transaction.on_commit(lambda: _publish_all(events))
+
+
+def update_posts(queryset, values):
+    """Set values on the selected posts in one UPDATE, returning the ids"""
+    with transaction.atomic():
+        ids = _lock(queryset)
+        if not ids:
+            return ids
+        touch_posts(ids, **values)
+    return ids
+
+
+def delete_posts(queryset):
+    """Delete the selected posts and their images, returning the ids.
+
+    Tombstones are inserted together and the per-post delete signal is
+    skipped, so the posts and their related rows go in a few DELETEs.
+    """
+    storage = Post._meta.get_field('image').storage
+    with transaction.atomic():
+        rows = _lock(queryset, 'image')
+        ids = [pk for pk, image in rows]
+        if not ids:
+            return ids
+        images = [image for pk, image in rows if image]
+        PostTombstone.objects.bulk_create(
+            [PostTombstone(post_id=pk) for pk in ids])
+        with _bulk():
+            Post.objects.filter(pk__in=ids).only('pk').delete()
+        invalidate(ids)
+        events = [{'type': 'deleted', 'id': pk} for pk in ids]
+
+        def deleted():
+            for name in images:
+                storage.delete(name)
+            _publish_all(events)
+
+        transaction.on_commit(deleted)
+    return ids
+
+
+def retag_posts(queryset, user, add=(), remove=()):
+    """Add tags by name to the selected posts and remove others by name.
+
+    Added names resolve to the user's tags, creating the missing ones,
+    like tags given when creating a post. Removed names match tags of
+    any user.
+    """
+    through = Post.tags.through
+    with transaction.atomic():
+        ids = _lock(queryset)
+        if not ids:
+            return ids
+        if remove:
+            through.objects.filter(post_id__in=ids,
+                                   tag__name__in=remove).delete()
+        if add:
+            tags = Tag.objects.resolve(user, add)
+            through.objects.bulk_create(
+                [through(post_id=pk, tag_id=tag.pk)
+                 for pk in ids for tag in tags],
+                batch_size=5000, ignore_conflicts=True)
+        touch_posts(ids)
+        refresh_related_posts_many.delay(ids)
+    return ids
@@ -0,0 +1,119 @@
+"""
+Buffered post view counters and trending scores
+"""
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.db.models.expressions import RawSQL
+
+from core.models import Post, TrendingPost
+
+logger = logging.getLogger(__name__)
+
+
+def decay_rate():
+    """Return the per second exponential decay rate of trending scores"""
+    return math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def decayed_score():
+    """Expression for a trending score decayed to the current time"""
+    table = TrendingPost._meta.db_table
+    return RawSQL(
+        f'{table}.score * exp(%s * extract(epoch FROM '
+        f'{table}.updated_at - now()))',
+        [decay_rate()],
+    )
+
+
+def flush_views(hits):
+    """Add view hits to posts and their trending scores in one statement"""
+    if not hits:
+        return
+    post_table = Post._meta.db_table
+    trending_table = TrendingPost._meta.db_table
+    # Sorted ids make concurrent flushes lock rows in the same order.
+    rows = sorted(hits.items())
+    values = ', '.join(['(%s::bigint, %s::bigint)'] * len(rows))
+    params = [value for row in rows for value in row]
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH hits (post_id, hits) AS (VALUES {values}), '
+            f'updated AS ('
+            f'UPDATE {post_table} p SET view_count = p.view_count + h.hits '
+            f'FROM hits h WHERE p.id = h.post_id RETURNING p.id) '
+            f'INSERT INTO {trending_table} (post_id, score, updated_at) '
+            f'SELECT h.post_id, h.hits, now() '
+            f'FROM hits h JOIN updated u ON u.id = h.post_id '
+            f'ON CONFLICT (post_id) DO UPDATE SET '
+            f'score = {trending_table}.score * exp(%s * extract(epoch FROM '
+            f'{trending_table}.updated_at - now())) + EXCLUDED.score, '
+            f'updated_at = now()',
+            params + [decay_rate()],
+        )
+        # Keep the trending table small by dropping the coldest posts.
+        cursor.execute(
+            f'DELETE FROM {trending_table} WHERE post_id IN ('
+            f'SELECT post_id FROM {trending_table} ORDER BY score * exp(%s * '
+            f'extract(epoch FROM updated_at - now())) DESC OFFSET %s)',
+            [decay_rate(), settings.TRENDING_MAX_POSTS],
+        )
+
+
+class ViewCounter:
+    """Per process buffer of post views, flushed in batches.
+
+    A flush happens once a request finishes and finds the buffer older
+    than VIEW_COUNT_FLUSH_INTERVAL or holding VIEW_COUNT_FLUSH_SIZE posts,
+    and when a server worker shuts down while its database is still up.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.last_flush = time.monotonic()
+
+    def record(self, post_id):
+        """Count a view of a post"""
+        with self.lock:
+            self.hits[post_id] += 1
+
+    def flush_if_due(self):
+        """Flush the buffer if it is full or old enough"""
+        with self.lock:
+            due = self.hits and (
+                len(self.hits) >= settings.VIEW_COUNT_FLUSH_SIZE or
+                time.monotonic() - self.last_flush >=
+                settings.VIEW_COUNT_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered views to the database"""
+        with self.lock:
+            hits, self.hits = self.hits, Counter()
+            self.last_flush = time.monotonic()
+        try:
+            flush_views(hits)
+        except Exception:
+            logger.exception('Failed to flush %d post view counts', len(hits))
+            with self.lock:
+                self.hits.update(hits)
+
+
+view_counter = ViewCounter()
+
+
+@receiver(request_finished)
+def flush_view_counts(sender, **kwargs):
+    """Flush due view counts after the response, outside the request"""
+    view_counter.flush_if_due()
@@ -0,0 +1,172 @@
+"""
+Real-time post events fanned out to streaming connections
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection, connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Bounded queue of events for one streaming connection"""
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def put(self, event):
+        """Queue an event, marking the subscription if the client lags"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class Broker:
+    """In-process fan out of events to the subscriptions of this process.
+
+    Events may be dispatched from any thread; each one is handed to the
+    event loop that owns the subscription.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+
+    def subscribe(self):
+        """Register a subscription on the running event loop"""
+        subscription = Subscription(asyncio.get_running_loop(),
+                                    settings.EVENTS_QUEUE_SIZE)
+        with self.lock:
+            self.subscriptions.add(subscription)
+        get_backend().start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def dispatch(self, event):
+        """Deliver an event to every subscription in this process"""
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put,
+                                                       event)
+            except RuntimeError:
+                # The loop of a finished server is closed.
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
+
+
+class LocalBackend:
+    """Deliver events only to connections held by this process"""
+
+    def publish(self, event):
+        broker.dispatch(event)
+
+    def start(self):
+        pass
+
+
+class PostgresBackend:
+    """Deliver events to every process through LISTEN/NOTIFY.
+
+    Publishers only send a NOTIFY. A process holding connections starts
+    one listener thread, on its own database connection, that dispatches
+    notifications to the local broker.
+    """
+    channel = 'post_events'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.listener = None
+
+    def publish(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)',
+                           [self.channel, json.dumps(event)])
+
+    def start(self):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen,
+                                                 name='post-events',
+                                                 daemon=True)
+                self.listener.start()
+
+    def listen(self):
+        """Forward notifications to the broker, reconnecting on errors"""
+        wrapper = connections['default']
+        while True:
+            conn = None
+            try:
+                conn = wrapper.get_new_connection(
+                    wrapper.get_connection_params())
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.channel}')
+                while True:
+                    if select.select([conn], [], [], 60) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        broker.dispatch(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Post events listener failed, reconnecting')
+                if conn is not None:
+                    conn.close()
+                time.sleep(1)
+
+
+_backend = None
+
+
+def get_backend():
+    """Return the configured events backend"""
+    global _backend
+    if _backend is None:
+        _backend = import_string(settings.EVENTS_BACKEND)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'EVENTS_BACKEND':
+        _backend = None
+
+
+def post_event(event_type, post):
+    """Return the event pushed to clients when a post changes"""
+    event = {'type': event_type, 'id': post.pk}
+    if event_type != 'deleted':
+        event['updated_at'] = post.updated_at.isoformat()
+    return event
+
+
+def publish(event):
+    """Publish an event to every connected client"""
+    try:
+        get_backend().publish(event)
+    except Exception:
+        # Push is best effort; clients catch up through the changes feed.
+        logger.exception('Failed to publish post event %s', event)
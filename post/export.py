@@ -0,0 +1,100 @@
+"""
+Streaming export of posts as NDJSON or CSV
+"""
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from rest_framework import renderers
+
+from core.models import Post
+
+EXPORT_FIELDS = [
+    'id',
+    'title',
+    'slug',
+    'by',
+    'status',
+    'read_time_min',
+    'keywords',
+    'content',
+    'image',
+    'created_at',
+    'updated_at',
+]
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Renderer used only to negotiate the NDJSON export format"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """Renderer used only to negotiate the CSV export format"""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data)
+
+
+class Echo:
+    """File-like object that returns written values instead of buffering"""
+
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=None):
+    """Yield one dict per post, loading the tags of each chunk in one query"""
+    chunk_size = chunk_size or settings.POST_EXPORT_CHUNK_SIZE
+    rows = queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    through = Post.tags.through
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        tags = {}
+        post_tags = through.objects.filter(
+            post_id__in=[row['id'] for row in chunk]
+        ).values_list('post_id', 'tag_id', 'tag__name').order_by('tag_id')
+        for post_id, tag_id, tag_name in post_tags:
+            tags.setdefault(post_id, []).append(
+                {'id': tag_id, 'name': tag_name}
+            )
+        for row in chunk:
+            row['tags'] = tags.get(row['id'], [])
+            yield row
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def stream_ndjson(queryset, chunk_size=None):
+    """Yield posts as newline delimited JSON documents"""
+    for row in iter_export_rows(queryset, chunk_size):
+        row['created_at'] = _isoformat(row['created_at'])
+        row['updated_at'] = _isoformat(row['updated_at'])
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def stream_csv(queryset, chunk_size=None):
+    """Yield posts as CSV lines, tags are joined by commas in one column"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS + ['tags'])
+    for row in iter_export_rows(queryset, chunk_size):
+        row['created_at'] = _isoformat(row['created_at'])
+        row['updated_at'] = _isoformat(row['updated_at'])
+        row['keywords'] = ', '.join(row['keywords'])
+        tag_names = ','.join(tag['name'] for tag in row['tags'])
+        yield writer.writerow(
+            [row[field] for field in EXPORT_FIELDS] + [tag_names]
+        )
@@ -0,0 +1,79 @@
+"""
+Cached serialized posts spliced into list responses
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+# Bump whenever the representation of a post changes without a change to
+# the fields of its serializer, so cached fragments are dropped.
+REPRESENTATION_VERSION = 1
+
+
+def fragment_key(post_id):
+    """Return the cache key of the fragments of a post"""
+    return f'post:fragment:{REPRESENTATION_VERSION}:{post_id}'
+
+
+def serializer_shape(serializer):
+    """Return a digest of the serializer class and its output fields"""
+    fields = ','.join(f'{name}:{type(field).__name__}'
+                      for name, field in serializer.fields.items())
+    shape = f'{type(serializer).__name__}|{fields}'
+    return hashlib.md5(shape.encode()).hexdigest()[:12]
+
+
+def _field_value(field, post):
+    attribute = field.get_attribute(post)
+    return None if attribute is None else field.to_representation(attribute)
+
+
+def represent(serializer, posts):
+    """Return the representation of posts, reusing cached fragments.
+
+    A post is cached as JSON once per serializer shape, which decodes
+    faster than unpickling nested dicts, and is re-serialized only when
+    its updated_at differs from the cached one. Fields listed in the
+    serializer's uncached_fields are always read from the post.
+    """
+    shape = serializer_shape(serializer)
+    uncached = {name: field for name, field in serializer.fields.items()
+                if name in getattr(serializer, 'uncached_fields', ())}
+    keys = {post.pk: fragment_key(post.pk) for post in posts}
+    entries = cache.get_many(list(keys.values()))
+    changed = {}
+    data = []
+    for post in posts:
+        key = keys[post.pk]
+        entry = entries.get(key, {})
+        updated_at, text = entry.get(shape, (None, None))
+        if text is None or updated_at != post.updated_at:
+            item = serializer.to_representation(post)
+            text = json.dumps(item, cls=JSONEncoder, ensure_ascii=False)
+            entries[key] = changed[key] = {
+                **entry, shape: (post.updated_at, text)}
+        else:
+            item = json.loads(text)
+            item.update((name, _field_value(field, post))
+                        for name, field in uncached.items())
+        data.append(item)
+    if changed:
+        cache.set_many(changed, settings.POST_FRAGMENT_TIMEOUT)
+    return data
+
+
+def invalidate(post_ids):
+    """Drop the cached fragments of posts, again once committed.
+
+    The second delete covers requests that cached the previous version
+    of a post before the transaction changing it committed.
+    """
+    keys = [fragment_key(post_id) for post_id in post_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,287 @@
+"""
+Bulk import of posts from NDJSON or CSV streams
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from core.models import Post, PostRevision, Tag
+from core.rendering import render_fields
+from post.keywords import KEYWORD_MAX_LENGTH, normalize_keywords
+
+STAGING_POST_COLUMNS = [
+    'row_no',
+    'title',
+    'slug',
+    'by_id',
+    'content',
+    'read_time_min',
+    'status',
+    'keywords',
+    'image',
+    'created_at',
+    'created_date',
+    'updated_at',
+    'content_html',
+    'content_hash',
+    'render_version',
+]
+
+REQUIRED_FIELDS = ['title', 'content', 'read_time_min']
+
+
+def read_rows(stream, fmt):
+    """Yield raw row dicts from a text stream in the given format"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _parse_tags(value):
+    """Return tag names from a list of names/objects or a CSV string"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        names = value.split(',')
+    else:
+        names = [tag['name'] if isinstance(tag, dict) else tag
+                 for tag in value]
+    return list(dict.fromkeys(name.strip() for name in names if name.strip()))
+
+
+def _parse_datetime(value):
+    if not value:
+        return None
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+def normalize_row(raw, row_no, by_id=None):
+    """Validate a raw row and return the values to insert"""
+    missing = [field for field in REQUIRED_FIELDS if raw.get(field) in
+               (None, '')]
+    if missing:
+        raise ValueError(
+            f'Row {row_no}: missing required fields {", ".join(missing)}'
+        )
+    author = by_id or raw.get('by')
+    if not author:
+        raise ValueError(f'Row {row_no}: missing author "by"')
+    created_at = _parse_datetime(raw.get('created_at'))
+    keywords = normalize_keywords(raw.get('keywords'))
+    if any(len(keyword) > KEYWORD_MAX_LENGTH for keyword in keywords):
+        raise ValueError(
+            f'Row {row_no}: keywords longer than {KEYWORD_MAX_LENGTH} '
+            f'characters'
+        )
+
+    return {
+        'row_no': row_no,
+        'title': raw['title'],
+        'slug': raw.get('slug') or slugify(raw['title']),
+        'by_id': int(author),
+        'content': raw['content'],
+        'read_time_min': int(raw['read_time_min']),
+        'status': raw.get('status') or 'draft',
+        'keywords': keywords,
+        'image': raw.get('image') or None,
+        'created_at': created_at,
+        'created_date': timezone.localdate(created_at),
+        'updated_at': _parse_datetime(raw.get('updated_at')),
+        'tags': _parse_tags(raw.get('tags')),
+        **render_fields(raw['content']),
+    }
+
+
+def iter_batches(rows, batch_size):
+    """Split an iterable of rows into lists of at most batch_size"""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def allocate_slugs(batch):
+    """Make the slugs of a batch unique per date like Post.save does"""
+    slugs = Post.objects.allocate_slugs(
+        [(row['slug'], row['created_date']) for row in batch]
+    )
+    for row, slug in zip(batch, slugs):
+        row['slug'] = slug
+
+
+def _array_literal(values):
+    """Return a PostgreSQL array literal of quoted strings"""
+    quoted = (value.replace('\\', '\\\\').replace('"', '\\"')
+              for value in values)
+    return '{' + ','.join(f'"{value}"' for value in quoted) + '}'
+
+
+def _copy_value(value):
+    if isinstance(value, list):
+        return _array_literal(value)
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _copy(cursor, table, columns, rows, force_not_null=()):
+    """Load rows into a table with COPY ... FROM STDIN"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(value) for value in row])
+    buffer.seek(0)
+    options = 'FORMAT csv'
+    if force_not_null:
+        # Unquoted empty CSV values are NULL unless told otherwise.
+        options += f', FORCE_NOT_NULL ({", ".join(force_not_null)})'
+    cursor.copy_expert(
+        f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH ({options})',
+        buffer,
+    )
+
+
+def load_batch_copy(batch):
+    """Load a batch through COPY into staging tables and merge it"""
+    post_table = Post._meta.db_table
+    tag_table = Tag._meta.db_table
+    post_tags_table = Post.tags.through._meta.db_table
+    revision_table = PostRevision._meta.db_table
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE import_post ('
+            'row_no integer PRIMARY KEY, title text, slug text, '
+            'by_id bigint, content text, read_time_min integer, '
+            'status text, keywords varchar(100)[], image text, '
+            'created_at timestamptz, created_date date, '
+            'updated_at timestamptz, content_html text, '
+            'content_hash text, render_version smallint, '
+            'post_id bigint) ON COMMIT DROP'
+        )
+        cursor.execute(
+            'CREATE TEMP TABLE import_post_tag ('
+            'row_no integer, name text) ON COMMIT DROP'
+        )
+        _copy(cursor, 'import_post', STAGING_POST_COLUMNS,
+              ([row[column] for column in STAGING_POST_COLUMNS]
+               for row in batch),
+              force_not_null=['title', 'slug', 'content', 'status',
+                              'content_html'])
+        _copy(cursor, 'import_post_tag', ['row_no', 'name'],
+              ((row['row_no'], name) for row in batch for name in row['tags']))
+
+        cursor.execute(
+            'UPDATE import_post SET post_id = '
+            'nextval(pg_get_serial_sequence(%s, %s))',
+            [post_table, 'id'],
+        )
+        cursor.execute(
+            f'INSERT INTO {post_table} (id, title, slug, by_id, content, '
+            f'read_time_min, status, keywords, image, created_at, '
+            f'created_date, updated_at, view_count, content_html, '
+            f'content_hash, render_version) '
+            f'SELECT post_id, title, slug, by_id, content, read_time_min, '
+            f'status, keywords, image, COALESCE(created_at, now()), '
+            f'created_date, '
+            f'COALESCE(updated_at, created_at, now()), 0, content_html, '
+            f'content_hash, render_version '
+            f'FROM import_post ORDER BY row_no'
+        )
+        cursor.execute(
+            f'INSERT INTO {revision_table} '
+            f'(post_id, number, title, is_snapshot, content, created_at) '
+            f'SELECT post_id, 1, title, true, to_jsonb(content), now() '
+            f'FROM import_post'
+        )
+        cursor.execute(
+            f'INSERT INTO {tag_table} (name, user_id) '
+            f'SELECT DISTINCT t.name, p.by_id FROM import_post_tag t '
+            f'JOIN import_post p ON p.row_no = t.row_no '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {tag_table} c '
+            f'WHERE c.user_id = p.by_id AND c.name = t.name) '
+            f'ON CONFLICT (user_id, name) DO NOTHING'
+        )
+        cursor.execute(
+            f'INSERT INTO {post_tags_table} (post_id, tag_id) '
+            f'SELECT p.post_id, c.id FROM import_post_tag t '
+            f'JOIN import_post p ON p.row_no = t.row_no '
+            f'JOIN {tag_table} c ON c.user_id = p.by_id AND c.name = t.name'
+        )
+        # ON COMMIT DROP does not fire when nested in an outer transaction.
+        cursor.execute('DROP TABLE import_post, import_post_tag')
+
+    return len(batch)
+
+
+def load_batch_orm(batch):
+    """Load a batch with bulk_create, for databases without COPY"""
+    with transaction.atomic():
+        posts = [
+            Post(**{key: value for key, value in row.items()
+                    if key not in ('row_no', 'tags')})
+            for row in batch
+        ]
+        posts = Post.objects.bulk_create(posts)
+        if posts and posts[0].pk is None:
+            # Databases that cannot return ids from bulk inserts assign
+            # them sequentially inside the transaction.
+            ids = Post.objects.order_by('-id').values_list(
+                'id', flat=True)[:len(posts)]
+            for post, post_id in zip(posts, sorted(ids)):
+                post.pk = post_id
+
+        # auto_now_add overrides provided timestamps on insert.
+        dated = []
+        for post, row in zip(posts, batch):
+            if row['created_at'] or row['updated_at']:
+                post.created_at = row['created_at'] or post.created_at
+                post.updated_at = row['updated_at'] or post.created_at
+                dated.append(post)
+        if dated:
+            Post.objects.bulk_update(dated, ['created_at', 'updated_at'])
+        PostRevision.objects.bulk_create([
+            PostRevision(post_id=post.pk, number=1, title=post.title,
+                         is_snapshot=True, content=post.content)
+            for post in posts
+        ])
+
+        names_by_user = {}
+        for row in batch:
+            names_by_user.setdefault(row['by_id'], []).extend(row['tags'])
+        tags = {}
+        for user_id, names in names_by_user.items():
+            for tag in Tag.objects.resolve(user_id, names):
+                tags[(user_id, tag.name)] = tag
+
+        through = Post.tags.through
+        through.objects.bulk_create([
+            through(post_id=post.pk, tag_id=tags[(row['by_id'], name)].pk)
+            for post, row in zip(posts, batch) for name in row['tags']
+        ])
+
+    return len(batch)
+
+
+def import_posts(stream, fmt, by_id=None, batch_size=5000, use_copy=None):
+    """Import posts from a stream in batches, yielding the running total"""
+    if use_copy is None:
+        use_copy = connection.vendor == 'postgresql'
+    load_batch = load_batch_copy if use_copy else load_batch_orm
+    rows = (normalize_row(raw, row_no, by_id)
+            for row_no, raw in enumerate(read_rows(stream, fmt), start=1))
+    total = 0
+    for batch in iter_batches(rows, batch_size):
+        allocate_slugs(batch)
+        total += load_batch(batch)
+        yield total
@@ -0,0 +1,57 @@
+"""
+Side-loading of related objects into compound post responses
+"""
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import ValidationError
+
+from post import serializers
+
+
+def _authors(posts):
+    """Return the authors of posts in one query"""
+    users = get_user_model().objects.filter(
+        pk__in={post.by_id for post in posts}
+    ).only('id', 'name').order_by('pk')
+    return serializers.AuthorSerializer(users, many=True).data
+
+
+def _tags(posts):
+    """Return the distinct tags of posts from their prefetched tags"""
+    tags = {tag.pk: tag for post in posts for tag in post.tags.all()}
+    return serializers.TagSerializer(
+        [tags[pk] for pk in sorted(tags)], many=True).data
+
+
+# Include name -> (key in the included section, loader)
+INCLUDES = {
+    'author': ('users', _authors),
+    'tags': ('tags', _tags),
+}
+
+
+def parse_include(request):
+    """Return the relations requested with ?include=a,b"""
+    value = request.query_params.get('include', '')
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in names if name not in INCLUDES]
+    if unknown:
+        raise ValidationError(
+            {'include': [f'Unknown include: {", ".join(unknown)}.']})
+    return names
+
+
+def prefetch(queryset, include):
+    """Prefetch what the requested includes read from every post"""
+    if 'tags' in include:
+        queryset = queryset.prefetch_related('tags')
+    return queryset
+
+
+def compound(data, posts, include):
+    """Wrap serialized posts with their deduplicated related objects"""
+    return {
+        'data': data,
+        'included': {key: loader(posts) for name, (key, loader)
+                     in INCLUDES.items() if name in include},
+    }
@@ -0,0 +1,46 @@
+"""
+Normalized post keywords and the filters using their GIN index
+"""
+from django.db.models import F, Func, TextField, Value
+
+KEYWORD_MAX_LENGTH = 100
+
+# Array lookups served by the GIN index: && for any, @> for all.
+MATCH_LOOKUPS = {
+    'any': 'keywords__overlap',
+    'all': 'keywords__contains',
+}
+
+
+def normalize_keywords(value):
+    """Return unique lower case keywords from a list or a CSV string.
+
+    Items are split on commas and their whitespace collapsed, matching
+    the migration that converted the comma separated column.
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    names = (' '.join(name.split()).lower()
+             for item in value for name in str(item).split(','))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def filter_keywords(queryset, value, match='any'):
+    """Filter posts having any or all of the keywords in value"""
+    if match not in MATCH_LOOKUPS:
+        raise ValueError(f'Unknown match "{match}", use any or all.')
+    keywords = normalize_keywords(value)
+    if not keywords:
+        return queryset
+    return queryset.filter(**{MATCH_LOOKUPS[match]: keywords})
+
+
+def search_keywords(queryset, text):
+    """Filter posts with a keyword containing text, without the index"""
+    return queryset.annotate(
+        keyword_text=Func(F('keywords'), Value(' '),
+                          function='array_to_string',
+                          output_field=TextField()),
+    ).filter(keyword_text__icontains=text)
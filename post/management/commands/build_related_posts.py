@@ -0,0 +1,23 @@
+"""
+Django command to rebuild the related posts table
+"""
+from django.core.management import BaseCommand
+
+from post.related import build_related_posts
+
+
+class Command(BaseCommand):
+    """Django command to rebuild the related posts table"""
+    help = 'Recompute the top related posts of every post from its tags.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=None)
+        parser.add_argument('--block-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f'Scored {done}/{total} posts...')
+
+        rows = build_related_posts(options['top_k'], options['block_size'],
+                                   progress)
+        self.stdout.write(self.style.SUCCESS(f'Stored {rows} related posts.'))
@@ -0,0 +1,55 @@
+"""
+Django command to bulk import posts from NDJSON or CSV
+"""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from post.importer import import_posts
+
+
+class Command(BaseCommand):
+    """Django command to bulk import posts from NDJSON or CSV"""
+    help = 'Import posts, tags and post tags from an NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or - for stdin')
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help='Input format, guessed from the extension')
+        parser.add_argument('--by', metavar='EMAIL',
+                            help='Author for every imported post')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use batched ORM inserts instead of COPY')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path.endswith('.csv')
+                                    else 'ndjson')
+        by_id = None
+        if options['by']:
+            try:
+                by_id = get_user_model().objects.get(email=options['by']).id
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'User {options["by"]} does not exist')
+
+        stream = sys.stdin if path == '-' else open(path, newline='',
+                                                    encoding='utf-8')
+        total = 0
+        try:
+            for total in import_posts(
+                stream, fmt,
+                by_id=by_id,
+                batch_size=options['batch_size'],
+                use_copy=False if options['no_copy'] else None,
+            ):
+                self.stdout.write(f'Imported {total} posts...')
+        except (ValueError, DatabaseError) as error:
+            raise CommandError(f'Import failed after {total} posts: {error}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {total} posts.'))
@@ -0,0 +1,17 @@
+"""
+Django command to delete expired deleted post markers
+"""
+from django.core.management import BaseCommand
+
+from post.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    """Django command to delete expired deleted post markers"""
+    help = ('Delete post tombstones older than '
+            'POST_TOMBSTONE_RETENTION_DAYS.')
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} tombstones.'))
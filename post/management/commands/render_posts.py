@@ -0,0 +1,42 @@
+"""
+Django command to backfill the stored HTML rendering of posts
+"""
+from django.core.management import BaseCommand
+
+from core.models import Post
+
+RENDER_FIELDS = ['content_html', 'content_hash', 'render_version']
+
+
+class Command(BaseCommand):
+    """Django command to backfill the stored HTML rendering of posts"""
+    help = ('Render post content whose hash or renderer version is out of '
+            'date and store the HTML.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every post')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = Post.objects.order_by('pk').only('pk', 'content',
+                                                 *RENDER_FIELDS[1:])
+        last_pk = 0
+        scanned = rendered = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            scanned += len(batch)
+
+            stale = [post for post in batch
+                     if post.render_content(force=options['force'])]
+            # bulk_update skips save(), so the fields are written as is.
+            Post.objects.bulk_update(stale, RENDER_FIELDS)
+            rendered += len(stale)
+            self.stdout.write(f'Scanned {scanned} posts...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} of {scanned} posts.'))
@@ -0,0 +1,180 @@
+"""
+Related posts computed from tag similarity
+"""
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Min
+from scipy import sparse
+
+from core.models import Post, RelatedPost
+
+
+def load_tag_matrix(post_ids=None):
+    """Return post ids, tag ids and the binary post x tag CSR matrix"""
+    links = Post.tags.through.objects.all()
+    if post_ids is not None:
+        links = links.filter(post_id__in=post_ids)
+    pairs = np.array(list(links.values_list('post_id', 'tag_id')),
+                     dtype=np.int64).reshape(-1, 2)
+    posts, rows = np.unique(pairs[:, 0], return_inverse=True)
+    tags, cols = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs)), (rows, cols)),
+        shape=(len(posts), len(tags)),
+    )
+    return posts, tags, matrix
+
+
+def weigh(matrix, document_frequency, total_posts):
+    """Apply IDF weights to the tags and L2 normalize each post row"""
+    idf = np.log((1 + total_posts) / (1 + document_frequency)) + 1
+    weighted = sparse.csr_matrix(matrix.multiply(idf))
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)))
+    norms[norms == 0] = 1
+    return sparse.csr_matrix(weighted.multiply(1 / norms))
+
+
+def top_k(columns, scores, k):
+    """Return the k highest scoring columns and their scores"""
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[best], scores[best]
+    return columns, scores
+
+
+def build_related_posts(k=None, block_size=1000, progress=None):
+    """Rebuild the whole related posts table, returning the row count.
+
+    Cosine similarities are computed as sparse products of blocks of
+    posts against the whole weighted matrix, so memory is bounded by the
+    block size rather than the square of the number of posts.
+    """
+    k = k or settings.RELATED_POSTS_TOP_K
+    posts, tags, matrix = load_tag_matrix()
+    document_frequency = np.asarray(matrix.sum(axis=0)).ravel()
+    weighted = weigh(matrix, document_frequency, len(posts))
+    transposed = weighted.T.tocsc()
+    total = 0
+
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        for start in range(0, len(posts), block_size):
+            block = (weighted[start:start + block_size] @ transposed).tocsr()
+            rows = []
+            for i in range(block.shape[0]):
+                low, high = block.indptr[i], block.indptr[i + 1]
+                columns = block.indices[low:high]
+                scores = block.data[low:high]
+                keep = columns != start + i
+                columns, scores = top_k(columns[keep], scores[keep], k)
+                post_id = int(posts[start + i])
+                rows.extend(
+                    RelatedPost(post_id=post_id, related_id=related_id,
+                                score=score)
+                    for related_id, score in zip(posts[columns].tolist(),
+                                                 scores.tolist())
+                )
+            RelatedPost.objects.bulk_create(rows, batch_size=5000)
+            total += len(rows)
+            if progress:
+                progress(min(start + block_size, len(posts)), len(posts))
+
+    return total
+
+
+def _trim(post_ids, k):
+    """Delete related rows ranked below k for the given posts"""
+    table = RelatedPost._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE id IN ('
+            f'SELECT id FROM (SELECT id, row_number() OVER ('
+            f'PARTITION BY post_id ORDER BY score DESC) AS position '
+            f'FROM {table} WHERE post_id = ANY(%s)) ranked '
+            f'WHERE position > %s)',
+            [list(post_ids), k],
+        )
+
+
+def refresh_related_posts(post_id, k=None):
+    """Update the related posts of one post after its tags changed"""
+    refresh_related_posts_many([post_id], k)
+
+
+def refresh_related_posts_many(post_ids, k=None):
+    """Update the related posts of posts whose tags changed together.
+
+    The changed posts are rescored along with the posts listing one of
+    them, so a list losing a changed post is refilled with the next best
+    one. Only posts sharing a tag with a rescored post are scored, in one
+    sparse product. The lists of other posts gain a changed post when it
+    beats their current lowest score. Past RELATED_POSTS_REFRESH_MAX
+    rescored posts the whole table is rebuilt instead.
+    """
+    k = k or settings.RELATED_POSTS_TOP_K
+    changed = set(post_ids)
+    holders = RelatedPost.objects.filter(related_id__in=list(changed)) \
+        .values_list('post_id', flat=True).distinct()
+    post_ids = sorted(changed.union(holders))
+    if len(post_ids) > settings.RELATED_POSTS_REFRESH_MAX:
+        build_related_posts(k)
+        return
+    through = Post.tags.through
+    tag_ids = through.objects.filter(post_id__in=post_ids).values('tag_id')
+    candidates = through.objects.filter(tag_id__in=tag_ids).values('post_id')
+    posts, tags, matrix = load_tag_matrix(candidates)
+
+    scored = {post_id: {} for post_id in post_ids}
+    if len(posts):
+        frequency = dict(
+            through.objects.filter(tag_id__in=tags.tolist())
+            .values('tag_id').annotate(posts=Count('id'))
+            .values_list('tag_id', 'posts')
+        )
+        total_posts = through.objects.values('post_id').distinct().count()
+        weighted = weigh(matrix,
+                         np.array([frequency[tag] for tag in tags.tolist()]),
+                         total_posts)
+        indexes = np.flatnonzero(np.isin(posts, post_ids))
+        block = (weighted[indexes] @ weighted.T.tocsc()).tocsr()
+        for i, index in enumerate(indexes.tolist()):
+            low, high = block.indptr[i], block.indptr[i + 1]
+            post_id = int(posts[index])
+            scored[post_id] = {
+                related_id: score for related_id, score
+                in zip(posts[block.indices[low:high]].tolist(),
+                       block.data[low:high].tolist())
+                if related_id != post_id and score > 0
+            }
+
+    others = {other_id for post_id in changed
+              for other_id in scored[post_id] if other_id not in scored}
+    lowest = {
+        row['post_id']: row for row in
+        RelatedPost.objects.filter(post_id__in=list(others))
+        .exclude(related_id__in=list(changed))
+        .values('post_id').annotate(rows=Count('id'), low=Min('score'))
+    }
+    rows = []
+    reverse = set()
+    for post_id, related in scored.items():
+        best = sorted(related.items(), key=lambda item: -item[1])[:k]
+        rows.extend(RelatedPost(post_id=post_id, related_id=related_id,
+                                score=score) for related_id, score in best)
+        if post_id not in changed:
+            continue
+        for other_id, score in related.items():
+            if other_id in others and (
+                    other_id not in lowest or lowest[other_id]['rows'] < k
+                    or score > lowest[other_id]['low']):
+                rows.append(RelatedPost(post_id=other_id, related_id=post_id,
+                                        score=score))
+                reverse.add(other_id)
+
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=post_ids).delete()
+        RelatedPost.objects.filter(related_id__in=list(changed)).delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=5000)
+        if reverse:
+            _trim(reverse, k)
@@ -0,0 +1,20 @@
+"""
+Renderers for the post APIs
+"""
+from django.utils.html import escape
+from rest_framework import renderers
+
+
+class PostHTMLRenderer(renderers.BaseRenderer):
+    """Render a post as its stored, sanitized HTML"""
+    media_type = 'text/html'
+    format = 'html'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data
+        # Errors have no stored rendering, so show their message escaped.
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return escape(str(data))
@@ -0,0 +1,102 @@
+"""
+Post revision history stored as line deltas with periodic snapshots
+"""
+import json
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Subquery
+
+from core.models import Post, PostRevision
+
+
+def make_delta(old, new):
+    """Return the ops that rebuild new from the lines of old.
+
+    An op is either a [start, end] range of old lines to copy or a string
+    of inserted text.
+    """
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old, delta):
+    """Rebuild a text from the previous text and a delta"""
+    lines = old.splitlines(keepends=True)
+    return ''.join(op if isinstance(op, str) else ''.join(lines[op[0]:op[1]])
+                   for op in delta)
+
+
+def _chain(post_id, number=None):
+    """Return revisions from the closest snapshot up to number, oldest first"""
+    revisions = PostRevision.objects.filter(post_id=post_id)
+    if number is not None:
+        revisions = revisions.filter(number__lte=number)
+    snapshot = revisions.filter(is_snapshot=True) \
+        .order_by('-number').values('number')[:1]
+    return list(revisions.filter(number__gte=Subquery(snapshot))
+                .order_by('number'))
+
+
+def _rebuild(chain):
+    content = None
+    for revision in chain:
+        content = revision.content if revision.is_snapshot \
+            else apply_delta(content, revision.content)
+    return content
+
+
+def get_revision(post_id, number):
+    """Return a revision with its full content rebuilt, or None"""
+    chain = _chain(post_id, number)
+    if not chain or chain[-1].number != number:
+        return None
+    revision = chain[-1]
+    revision.content = _rebuild(chain)
+    return revision
+
+
+def record_revision(post):
+    """Store the post's title and content as a revision if they changed.
+
+    Revisions are deltas against the previous one, except every
+    POST_REVISION_SNAPSHOT_INTERVAL revisions and when the delta would not
+    be smaller than the content, which are stored as full snapshots.
+    """
+    with transaction.atomic():
+        # Record the locked row rather than the instance, which may hold
+        # fields left out of update_fields.
+        title, content = Post.objects.select_for_update() \
+            .filter(pk=post.pk).values_list('title', 'content').get()
+        chain = _chain(post.pk)
+        if not chain:
+            return PostRevision.objects.create(
+                post=post, number=1, title=title, is_snapshot=True,
+                content=content,
+            )
+
+        latest = chain[-1]
+        previous = _rebuild(chain)
+        if previous == content and latest.title == title:
+            return None
+
+        number = latest.number + 1
+        delta = make_delta(previous, content)
+        snapshot = (
+            number - chain[0].number >=
+            settings.POST_REVISION_SNAPSHOT_INTERVAL or
+            len(json.dumps(delta)) >= len(content)
+        )
+        return PostRevision.objects.create(
+            post=post, number=number, title=title, is_snapshot=snapshot,
+            content=content if snapshot else delta,
+        )
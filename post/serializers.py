@@ -1,7 +1,16 @@
 """Serializers for the post app."""
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import models
 from rest_framework import serializers
-from core.models import Post, Tag
+from core.models import Post, PostRevision, Tag
+from post import fragments
+from post.keywords import (
+    KEYWORD_MAX_LENGTH,
+    MATCH_LOOKUPS,
+    normalize_keywords,
+)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -13,29 +22,75 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class AuthorSerializer(serializers.ModelSerializer):
+    """Serializer for the public profile of post authors."""
+
+    class Meta:
+        model = get_user_model()
+        fields = ['id', 'name']
+        read_only_fields = fields
+
+
+class KeywordsField(serializers.ListField):
+    """Keyword list field also accepting a comma separated string."""
+    child = serializers.CharField(max_length=KEYWORD_MAX_LENGTH)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [data]
+        if isinstance(data, (list, tuple)):
+            data = normalize_keywords(data)
+        return super().to_internal_value(data)
+
+
+class PostListSerializer(serializers.ListSerializer):
+    """List serializer splicing cached representations of posts."""
+
+    def to_representation(self, data):
+        posts = data.all() if isinstance(data, models.Manager) else data
+        return fragments.represent(self.child, list(posts))
+
+
 class PostSerializer(serializers.ModelSerializer):
     """Serializer for post objects in the post app."""
     tags = TagSerializer(many=True, required=False)
+    keywords = KeywordsField(required=False)
+    # Change without updated_at, or depend on the request host.
+    uncached_fields = ['view_count', 'image']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'tags' in self.context.get('include', ()):
+            # Side-loaded tags are referenced by id only.
+            self.fields['tags'] = serializers.PrimaryKeyRelatedField(
+                many=True, read_only=True)
 
     class Meta:
         model = Post
         fields = ['id',
+                  'by',
                   'title',
+                  'slug',
+                  'created_date',
                   'read_time_min',
                   'status', 'tags',
                   'keywords',
                   'content',
-                  'image']
-        read_only_fields = ['id']
+                  'image',
+                  'view_count',
+                  'content_hash']
+        read_only_fields = ['id', 'by', 'slug', 'created_date', 'view_count',
+                            'content_hash']
+        list_serializer_class = PostListSerializer
 
     def create(self, validated_data):
         """Create a new post and return it."""
         tags = validated_data.pop('tags')
         post = Post.objects.create(**validated_data)
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(user=auth_user, **tag)
-            post.tags.add(tag_obj)
+        tag_objs = Tag.objects.resolve(auth_user,
+                                       [tag['name'] for tag in tags])
+        post.tags.add(*tag_objs)
         return post
 
 
@@ -54,3 +109,95 @@ class PostImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image']
         read_only_fields = ['id']
         extra_kwargs = {'image': {'required': True}}
+
+
+class PostRevisionSerializer(serializers.ModelSerializer):
+    """Serializer for post revisions in the post app."""
+
+    class Meta:
+        model = PostRevision
+        fields = ['number', 'title', 'is_snapshot', 'created_at']
+        read_only_fields = fields
+
+
+class PostRevisionDetailSerializer(PostRevisionSerializer):
+    """Serializer for post revisions with their rebuilt content."""
+    content = serializers.CharField(read_only=True)
+
+    class Meta(PostRevisionSerializer.Meta):
+        fields = PostRevisionSerializer.Meta.fields + ['content']
+        read_only_fields = fields
+
+
+class PostFilterSerializer(serializers.Serializer):
+    """Serializer for the conditions selecting posts in bulk."""
+    status = serializers.ChoiceField(choices=Post.STATUS_CHOICES,
+                                     required=False)
+    by = serializers.IntegerField(required=False)
+    tags = serializers.ListField(child=serializers.IntegerField(),
+                                 required=False, allow_empty=False)
+    keywords = KeywordsField(required=False, allow_empty=False)
+    keywords_match = serializers.ChoiceField(choices=list(MATCH_LOOKUPS),
+                                             default='any')
+
+    def validate(self, attrs):
+        if not set(attrs) - {'keywords_match'}:
+            raise serializers.ValidationError(
+                'At least one condition is required.')
+        return attrs
+
+
+class BulkSelectionSerializer(serializers.Serializer):
+    """Serializer for posts selected by ids or by a filter."""
+    ids = serializers.ListField(child=serializers.IntegerField(),
+                                required=False, allow_empty=False)
+    filter = PostFilterSerializer(required=False)
+
+    def validate_ids(self, value):
+        if len(value) > settings.BULK_MAX_POSTS:
+            raise serializers.ValidationError(
+                f'At most {settings.BULK_MAX_POSTS} posts can be changed '
+                f'at once.')
+        return value
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError(
+                'Either ids or filter is required, not both.')
+        return attrs
+
+
+class BulkUpdateSerializer(BulkSelectionSerializer):
+    """Serializer for values set on posts in bulk."""
+    status = serializers.ChoiceField(choices=Post.STATUS_CHOICES,
+                                     required=False)
+    read_time_min = serializers.IntegerField(min_value=0, max_value=32767,
+                                             required=False)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'status' not in attrs and 'read_time_min' not in attrs:
+            raise serializers.ValidationError(
+                'At least one of status and read_time_min is required.')
+        return attrs
+
+
+class BulkRetagSerializer(BulkSelectionSerializer):
+    """Serializer for tag names added to and removed from posts in bulk."""
+    add = serializers.ListField(child=serializers.CharField(max_length=255),
+                                default=list)
+    remove = serializers.ListField(
+        child=serializers.CharField(max_length=255), default=list)
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if not attrs['add'] and not attrs['remove']:
+            raise serializers.ValidationError(
+                'At least one tag to add or remove is required.')
+        return attrs
+
+
+class BulkResultSerializer(serializers.Serializer):
+    """Serializer for the posts changed by a bulk operation."""
+    count = serializers.IntegerField()
+    ids = serializers.ListField(child=serializers.IntegerField())
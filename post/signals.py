@@ -0,0 +1,92 @@
+"""
+Signal handlers for the post app
+"""
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from core.models import Post, PostTombstone, Tag
+from post.bulk import in_bulk, touch_posts
+from post.events import post_event, publish
+from post.fragments import invalidate
+from post.revisions import record_revision
+from post.tasks import refresh_related_posts, refresh_related_posts_many
+
+REVISION_FIELDS = {'title', 'content'}
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, update_fields, **kwargs):
+    """Record a revision and push an event when a post is saved"""
+    if raw:
+        return
+    if update_fields is None or REVISION_FIELDS & set(update_fields):
+        record_revision(instance)
+    event = post_event('created' if created else 'updated', instance)
+    transaction.on_commit(lambda: publish(event))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Leave a tombstone and push an event when a post is deleted"""
+    if in_bulk():
+        return
+    PostTombstone.objects.create(post_id=instance.pk)
+    invalidate([instance.pk])
+    event = post_event('deleted', instance)
+    transaction.on_commit(lambda: publish(event))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Refresh related posts and cached fragments of posts changed"""
+    if action == 'pre_clear' and reverse:
+        # The cleared posts are only known before the clear.
+        instance._cleared_post_ids = list(
+            instance.posts.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        invalidate([instance.pk])
+        refresh_related_posts.delay(instance.pk)
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_post_ids', ())
+    post_ids = sorted(pk_set or ())
+    invalidate(post_ids)
+    if post_ids:
+        refresh_related_posts_many.delay(post_ids)
+
+
+def _tagged_post_ids(tag):
+    return Post.tags.through.objects.filter(tag_id=tag.pk) \
+        .values_list('post_id', flat=True)
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, raw, **kwargs):
+    """Mark posts showing a renamed tag as changed"""
+    if not created and not raw:
+        touch_posts(list(_tagged_post_ids(instance)))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    """Mark posts losing a tag in the cascade as changed"""
+    # The posts are only known before the cascade deletes their links.
+    instance._tagged_post_ids = list(_tagged_post_ids(instance))
+    touch_posts(instance._tagged_post_ids)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """Refresh related posts of posts that lost a deleted tag"""
+    post_ids = instance.__dict__.pop('_tagged_post_ids', ())
+    if post_ids:
+        refresh_related_posts_many.delay(post_ids)
@@ -0,0 +1,102 @@
+"""
+ASGI endpoints streaming post events over SSE and WebSocket
+"""
+import asyncio
+import json
+
+from django.conf import settings
+
+from post.events import broker
+
+SSE_PATH = '/api/posts/events'
+WEBSOCKET_PATH = '/ws/posts/events'
+
+SSE_HEADERS = [
+    (b'content-type', b'text/event-stream'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+async def _wait_for(receive, message_type):
+    """Consume incoming messages until one of the given type arrives"""
+    while (await receive())['type'] != message_type:
+        pass
+
+
+async def _events(subscription, closed):
+    """Yield events, or None when a heartbeat is due, until closed"""
+    while not closed.done() and not subscription.overflowed:
+        event = asyncio.ensure_future(subscription.get())
+        done, _ = await asyncio.wait({event, closed},
+                                     timeout=settings.EVENTS_HEARTBEAT,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        if event in done:
+            yield event.result()
+        else:
+            event.cancel()
+            if not closed.done():
+                yield None
+
+
+async def sse_app(scope, receive, send):
+    """Stream post events to an HTTP client as Server-Sent Events"""
+    subscription = broker.subscribe()
+    closed = asyncio.ensure_future(_wait_for(receive, 'http.disconnect'))
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': SSE_HEADERS})
+        await send({'type': 'http.response.body',
+                    'body': f'retry: {settings.EVENTS_RETRY_MS}\n\n'.encode(),
+                    'more_body': True})
+        async for event in _events(subscription, closed):
+            if event is None:
+                body = b': keepalive\n\n'
+            else:
+                body = (f'event: {event["type"]}\n'
+                        f'data: {json.dumps(event)}\n\n').encode()
+            await send({'type': 'http.response.body', 'body': body,
+                        'more_body': True})
+        if subscription.overflowed:
+            # Lagging clients reconnect and catch up from the changes feed.
+            await send({'type': 'http.response.body',
+                        'body': b'event: resync\ndata: {}\n\n'})
+    finally:
+        closed.cancel()
+        broker.unsubscribe(subscription)
+
+
+async def websocket_app(scope, receive, send):
+    """Stream post events to a WebSocket client as JSON messages"""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+    subscription = broker.subscribe()
+    closed = asyncio.ensure_future(_wait_for(receive, 'websocket.disconnect'))
+    try:
+        async for event in _events(subscription, closed):
+            if event is not None:
+                await send({'type': 'websocket.send',
+                            'text': json.dumps(event)})
+        if subscription.overflowed:
+            await send({'type': 'websocket.send',
+                        'text': json.dumps({'type': 'resync'})})
+            await send({'type': 'websocket.close', 'code': 1013})
+    finally:
+        closed.cancel()
+        broker.unsubscribe(subscription)
+
+
+def events_router(application):
+    """Wrap an ASGI application to serve post events on their paths"""
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == SSE_PATH:
+            return await sse_app(scope, receive, send)
+        if scope['type'] == 'websocket' and scope['path'] == WEBSOCKET_PATH:
+            return await websocket_app(scope, receive, send)
+        if scope['type'] == 'websocket':
+            await receive()
+            return await send({'type': 'websocket.close'})
+        return await application(scope, receive, send)
+
+    return router
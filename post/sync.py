@@ -0,0 +1,90 @@
+"""
+Incremental sync feed of post changes and deletions
+"""
+import base64
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.models import Post, PostTombstone
+
+
+def encode_cursor(position):
+    """Return the opaque cursor of a (moment, id) feed position"""
+    moment, pk = position
+    raw = f'{moment.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the (moment, id) position of a cursor, raising ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        moment, pk = raw.decode().split('|')
+        position = parse_datetime(moment), int(pk)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+    if position[0] is None or timezone.is_naive(position[0]):
+        raise ValueError('Invalid cursor.')
+    return position
+
+
+def is_expired(position):
+    """Return whether tombstones after a position may have been pruned"""
+    return position[0] < timezone.now() - datetime.timedelta(
+        days=settings.POST_TOMBSTONE_RETENTION_DAYS)
+
+
+def _after(queryset, time_field, id_field, position):
+    """Filter a queryset to rows ordered after a (moment, id) position"""
+    if position is None:
+        return queryset
+    moment, pk = position
+    return queryset.filter(
+        Q(**{f'{time_field}__gt': moment}) |
+        Q(**{time_field: moment, f'{id_field}__gt': pk})
+    )
+
+
+def changes_since(position, limit):
+    """Return the next changes after a position in the feed.
+
+    Posts ordered by (updated_at, id) and tombstones ordered by
+    (deleted_at, post_id) are merged into one stream. Changes younger
+    than POST_CHANGES_SETTLE_SECONDS are held back so a transaction that
+    commits late cannot land behind a cursor already handed out.
+    """
+    horizon = timezone.now() - datetime.timedelta(
+        seconds=settings.POST_CHANGES_SETTLE_SECONDS)
+    posts = _after(Post.objects.filter(updated_at__lte=horizon),
+                   'updated_at', 'id', position)
+    tombstones = _after(PostTombstone.objects.filter(deleted_at__lte=horizon),
+                        'deleted_at', 'post_id', position)
+
+    entries = sorted(
+        [((post.updated_at, post.id), post) for post in
+         posts.order_by('updated_at', 'id').prefetch_related('tags')
+         [:limit + 1]] +
+        [((deleted_at, post_id), None) for deleted_at, post_id in
+         tombstones.order_by('deleted_at', 'post_id')
+         .values_list('deleted_at', 'post_id')[:limit + 1]],
+        key=lambda entry: entry[0],
+    )
+    page = entries[:limit]
+    return {
+        'changed': [post for key, post in page if post is not None],
+        'deleted': [key[1] for key, post in page if post is None],
+        'position': page[-1][0] if page else position,
+        'has_more': len(entries) > limit,
+    }
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period"""
+    cutoff = timezone.now() - datetime.timedelta(
+        days=settings.POST_TOMBSTONE_RETENTION_DAYS)
+    deleted, _ = PostTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,19 @@
+"""
+Background tasks for the post app
+"""
+from core.queue import task
+
+
+@task
+def refresh_related_posts(post_id):
+    """Recompute the related posts of a post whose tags changed"""
+    # numpy and scipy are only needed here, not in the web workers.
+    from post import related
+    related.refresh_related_posts(post_id)
+
+
+@task
+def refresh_related_posts_many(post_ids):
+    """Recompute the related posts of posts retagged together"""
+    from post import related
+    related.refresh_related_posts_many(post_ids)
@@ -0,0 +1,191 @@
+"""
+Tests for the bulk post operations API
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, PostRevision, PostTombstone, Tag, Task
+
+BULK_UPDATE_URL = reverse('post:post-bulk-update')
+BULK_DELETE_URL = reverse('post:post-bulk-delete')
+BULK_RETAG_URL = reverse('post:post-bulk-retag')
+CHANGES_URL = reverse('post:post-changes')
+POSTS_URL = reverse('post:post-list')
+
+
+def create_posts(user, count, **params):
+    """Create and return count sample posts"""
+    return [
+        Post.objects.create(by=user, title=f'Post {index}', content='Text',
+                            read_time_min=2, **params)
+        for index in range(count)
+    ]
+
+
+class PublicBulkApiTests(TestCase):
+    """Test bulk operations are restricted to staff"""
+
+    def test_staff_required(self):
+        """Test non staff users cannot run bulk operations"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        post = create_posts(user, 1)[0]
+
+        res = client.post(BULK_DELETE_URL, {'ids': [post.id]},
+                          format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+
+class PrivateBulkApiTests(TestCase):
+    """Test bulk operations as staff"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, payload):
+        """Post a bulk request and return it with its query count"""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(url, payload, format='json')
+        return res, len(queries)
+
+    def test_update_by_ids(self):
+        """Test publishing posts by id in a constant number of queries"""
+        few = create_posts(self.user, 2)
+        many = create_posts(self.user, 20)
+        before = few[0].updated_at
+
+        res, few_queries = self.post(BULK_UPDATE_URL, {
+            'ids': [post.id for post in few], 'status': 'published'})
+        _, many_queries = self.post(BULK_UPDATE_URL, {
+            'ids': [post.id for post in many], 'status': 'published'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 2)
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(Post.objects.filter(status='published').count(), 22)
+        few[0].refresh_from_db()
+        self.assertGreater(few[0].updated_at, before)
+
+    def test_update_by_filter(self):
+        """Test posts matching a filter are updated"""
+        matching = create_posts(self.user, 2, keywords=['django'])
+        create_posts(self.user, 2, keywords=['flask'])
+        create_posts(self.user, 1, keywords=['django'], status='published')
+
+        res, _ = self.post(BULK_UPDATE_URL, {
+            'filter': {'status': 'draft', 'keywords': 'django'},
+            'read_time_min': 9})
+
+        self.assertEqual(sorted(res.data['ids']),
+                         sorted(post.id for post in matching))
+        self.assertEqual(
+            Post.objects.filter(read_time_min=9).count(), 2)
+
+    def test_update_refreshes_cached_posts(self):
+        """Test listed posts show values set in bulk"""
+        post = create_posts(self.user, 1)[0]
+        self.client.get(POSTS_URL)
+
+        self.post(BULK_UPDATE_URL, {'ids': [post.id], 'status': 'published'})
+        res = self.client.get(POSTS_URL)
+
+        self.assertEqual(res.data[0]['status'], 'published')
+
+    @override_settings(BULK_MAX_POSTS=2)
+    def test_filter_over_limit(self):
+        """Test a filter matching too many posts changes nothing"""
+        create_posts(self.user, 3)
+
+        res, _ = self.post(BULK_UPDATE_URL, {'filter': {'status': 'draft'},
+                                             'status': 'published'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Post.objects.filter(status='published').exists())
+
+    def test_invalid_selection(self):
+        """Test selections need ids or a non empty filter, not both"""
+        post = create_posts(self.user, 1)[0]
+
+        for selection in [{}, {'filter': {}},
+                          {'ids': [post.id], 'filter': {'by': self.user.id}}]:
+            res, _ = self.post(BULK_UPDATE_URL,
+                               {**selection, 'status': 'published'})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete(self):
+        """Test deleting posts leaves tombstones in constant queries"""
+        few = create_posts(self.user, 2)
+        many = create_posts(self.user, 20)
+        kept = create_posts(self.user, 1)[0]
+
+        res, few_queries = self.post(BULK_DELETE_URL,
+                                     {'ids': [post.id for post in few]})
+        _, many_queries = self.post(BULK_DELETE_URL,
+                                    {'ids': [post.id for post in many]})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(few_queries, many_queries)
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)),
+                         [kept.pk])
+        self.assertEqual(PostTombstone.objects.count(), 22)
+        self.assertEqual(
+            list(PostRevision.objects.values_list('post_id', flat=True)),
+            [kept.pk])
+
+    def test_retag(self):
+        """Test adding and removing tags on posts in one request"""
+        posts = create_posts(self.user, 3)
+        old = Tag.objects.create(user=self.user, name='old')
+        for post in posts:
+            post.tags.add(old)
+        self.client.get(POSTS_URL)
+        tasks = Task.objects.count()
+
+        res, _ = self.post(BULK_RETAG_URL, {
+            'ids': [post.id for post in posts[:2]],
+            'add': ['new', 'old'], 'remove': ['old']})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.count(), tasks + 1)
+        listed = {post['id']: sorted(tag['name'] for tag in post['tags'])
+                  for post in self.client.get(POSTS_URL).data}
+        self.assertEqual(listed, {posts[0].id: ['new', 'old'],
+                                  posts[1].id: ['new', 'old'],
+                                  posts[2].id: ['old']})
+
+    @override_settings(POST_CHANGES_SETTLE_SECONDS=0)
+    def test_retag_announces_changes(self):
+        """Test retagged posts show in the changes feed and events"""
+        posts = create_posts(self.user, 3)
+        cursor = self.client.get(CHANGES_URL).data['cursor']
+        ids = [post.id for post in posts[:2]]
+
+        with patch('post.bulk.publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.post(BULK_RETAG_URL, {'ids': ids, 'add': ['new']})
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(sorted(post['id'] for post in res.data['changed']),
+                         ids)
+        self.assertEqual(sorted(call.args[0]['id']
+                                for call in publish.call_args_list), ids)
@@ -0,0 +1,179 @@
+"""
+Tests for the incremental post sync feed
+"""
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.deletion import delete_tags
+from core.models import Post, PostTombstone, Tag
+from post.sync import encode_cursor
+
+CHANGES_URL = reverse('post:post-changes')
+
+
+def tag_url(tag_id):
+    return reverse('post:tag-detail', args=[tag_id])
+
+
+@override_settings(POST_CHANGES_SETTLE_SECONDS=0)
+class PostChangesTests(TestCase):
+    """Test the changes since feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.base = timezone.now() - datetime.timedelta(hours=1)
+        self.posts = [self._post(f'post {i}', minutes=i) for i in range(3)]
+
+    def _post(self, title, minutes):
+        post = Post.objects.create(by=self.user, title=title, content='c',
+                                   read_time_min=1)
+        self._touch(post, minutes)
+        return post
+
+    def _touch(self, post, minutes):
+        """Set updated_at without going through auto_now"""
+        post.updated_at = self.base + datetime.timedelta(minutes=minutes)
+        Post.objects.filter(pk=post.pk).update(updated_at=post.updated_at)
+
+    def _sync(self, since=None, **params):
+        if since:
+            params['since'] = since
+        res = self.client.get(CHANGES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_full_sync_pages_by_cursor(self):
+        """Test an initial sync returns every post across pages"""
+        first = self._sync(limit=2)
+        second = self._sync(first['cursor'], limit=2)
+
+        self.assertEqual([p['title'] for p in first['changed']],
+                         ['post 0', 'post 1'])
+        self.assertTrue(first['has_more'])
+        self.assertEqual([p['title'] for p in second['changed']],
+                         ['post 2'])
+        self.assertFalse(second['has_more'])
+
+    def test_sync_returns_only_changes(self):
+        """Test a sync only returns posts updated after the cursor"""
+        cursor = self._sync()['cursor']
+        self._touch(self.posts[0], 10)
+
+        data = self._sync(cursor)
+
+        self.assertEqual([p['id'] for p in data['changed']],
+                         [self.posts[0].id])
+        self.assertEqual(self._sync(data['cursor'])['changed'], [])
+
+    def test_deleted_posts_return_tombstones(self):
+        """Test deleting a post leaves a tombstone in the feed"""
+        cursor = self._sync()['cursor']
+        post_id = self.posts[1].id
+        self.posts[1].delete()
+
+        data = self._sync(cursor)
+
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [post_id])
+
+    def _tagged(self):
+        """Tag the first two posts and return the tag with a sync cursor"""
+        tag = Tag.objects.create(user=self.user, name='python')
+        for post in self.posts[:2]:
+            post.tags.add(tag)
+            self._touch(post, 0)
+        return tag, self._sync()['cursor']
+
+    def _changed_ids(self, cursor):
+        return sorted(p['id'] for p in self._sync(cursor)['changed'])
+
+    def test_tag_rename_and_delete_are_synced(self):
+        """Test renaming or deleting a tag changes the posts carrying it"""
+        admin = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(admin)
+        tagged = sorted(post.id for post in self.posts[:2])
+        tag, cursor = self._tagged()
+
+        self.client.patch(tag_url(tag.id), {'name': 'py'})
+        data = self._sync(cursor)
+
+        self.assertEqual(sorted(p['id'] for p in data['changed']), tagged)
+        self.assertEqual(data['changed'][0]['tags'][0]['name'], 'py')
+
+        self.client.delete(tag_url(tag.id))
+
+        self.assertEqual(self._changed_ids(data['cursor']), tagged)
+
+    def test_deleted_tags_are_synced(self):
+        """Test tags deleted in batches change the posts carrying them"""
+        _, cursor = self._tagged()
+
+        delete_tags(Tag.objects.filter(user=self.user))
+
+        self.assertEqual(self._changed_ids(cursor),
+                         sorted(post.id for post in self.posts[:2]))
+
+    def test_ties_on_updated_at_are_not_skipped(self):
+        """Test posts sharing a timestamp are split across pages by id"""
+        self._touch(self.posts[2], 0)
+        self._touch(self.posts[1], 0)
+
+        first = self._sync(limit=1)
+        rest = self._sync(first['cursor'])
+
+        titles = [p['title'] for p in first['changed'] + rest['changed']]
+        self.assertEqual(sorted(titles), ['post 0', 'post 1', 'post 2'])
+
+    @override_settings(POST_CHANGES_SETTLE_SECONDS=3600)
+    def test_recent_changes_held_back(self):
+        """Test changes inside the settle window are not returned yet"""
+        self._touch(self.posts[0], 59)
+
+        data = self._sync()
+
+        self.assertNotIn(self.posts[0].id, [p['id'] for p in data['changed']])
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        res = self.client.get(CHANGES_URL, {'since': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(POST_TOMBSTONE_RETENTION_DAYS=1)
+    def test_expired_cursor_requires_resync(self):
+        """Test cursors older than the tombstone retention are gone"""
+        cursor = encode_cursor(
+            (timezone.now() - datetime.timedelta(days=2), 1))
+
+        res = self.client.get(CHANGES_URL, {'since': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    @override_settings(POST_TOMBSTONE_RETENTION_DAYS=1)
+    def test_prune_tombstones(self):
+        """Test the command deletes only expired tombstones"""
+        PostTombstone.objects.create(
+            post_id=1, deleted_at=timezone.now() - datetime.timedelta(days=2))
+        PostTombstone.objects.create(post_id=2)
+        out = io.StringIO()
+
+        call_command('prune_tombstones', stdout=out)
+
+        self.assertIn('Deleted 1 tombstones.', out.getvalue())
+        self.assertEqual(list(PostTombstone.objects.values_list(
+            'post_id', flat=True)), [2])
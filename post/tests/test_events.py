@@ -0,0 +1,203 @@
+"""
+Tests for real-time post events
+"""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import patch
+
+import uvicorn
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from websockets.sync.client import connect
+
+from core.models import Post
+from main_project.asgi import application
+from post.events import broker
+
+SSE_SCOPE = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/api/posts/events',
+    'headers': [],
+    'query_string': b'',
+}
+WEBSOCKET_SCOPE = {
+    'type': 'websocket',
+    'path': '/ws/posts/events',
+    'headers': [],
+    'query_string': b'',
+}
+
+
+class PostEventSignalTests(TestCase):
+    """Test post changes publish events after commit"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+
+    @patch('post.signals.publish')
+    def test_events_published_on_commit(self, publish):
+        """Test create, update and delete each publish one event"""
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(by=self.user, title='Live',
+                                       content='c', read_time_min=1)
+            post_id = post.id
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Updated'
+            post.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+
+        events = [call.args[0] for call in publish.call_args_list]
+        self.assertEqual([(e['type'], e['id']) for e in events], [
+            ('created', post_id),
+            ('updated', post_id),
+            ('deleted', post_id),
+        ])
+
+    @patch('post.signals.publish')
+    def test_no_event_before_commit(self, publish):
+        """Test rolled back changes are never published"""
+        Post.objects.create(by=self.user, title='Draft', content='c',
+                            read_time_min=1)
+
+        publish.assert_not_called()
+
+
+@override_settings(EVENTS_BACKEND='post.events.LocalBackend',
+                   EVENTS_HEARTBEAT=60)
+class PostEventStreamTests(TestCase):
+    """Test streaming events over SSE and WebSocket"""
+
+    async def _subscribed(self, count=1):
+        """Wait until the streams under test have subscribed"""
+        while len(broker.subscriptions) < count:
+            await asyncio.sleep(0.01)
+
+    @async_to_sync
+    async def test_sse_stream(self):
+        """Test events are written to SSE clients as they happen"""
+        stream = ApplicationCommunicator(application, SSE_SCOPE)
+        await stream.send_input({'type': 'http.request'})
+
+        start = await stream.receive_output(1)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'),
+                      start['headers'])
+        retry = await stream.receive_output(1)
+        self.assertTrue(retry['body'].startswith(b'retry:'))
+
+        await self._subscribed()
+        broker.dispatch({'type': 'updated', 'id': 7})
+        message = await stream.receive_output(1)
+        self.assertEqual(message['body'],
+                         b'event: updated\ndata: {"type": "updated", '
+                         b'"id": 7}\n\n')
+
+        await stream.send_input({'type': 'http.disconnect'})
+        await stream.wait(1)
+        self.assertEqual(broker.subscriptions, set())
+
+    @override_settings(EVENTS_HEARTBEAT=0.05)
+    @async_to_sync
+    async def test_sse_heartbeat(self):
+        """Test idle SSE streams receive keepalive comments"""
+        stream = ApplicationCommunicator(application, SSE_SCOPE)
+        await stream.send_input({'type': 'http.request'})
+        await stream.receive_output(1)
+        await stream.receive_output(1)
+
+        message = await stream.receive_output(1)
+
+        self.assertEqual(message['body'], b': keepalive\n\n')
+        await stream.send_input({'type': 'http.disconnect'})
+        await stream.wait(1)
+
+    @override_settings(EVENTS_QUEUE_SIZE=1)
+    @async_to_sync
+    async def test_lagging_client_told_to_resync(self):
+        """Test a client whose queue overflows is sent a resync event"""
+        stream = ApplicationCommunicator(application, SSE_SCOPE)
+        await stream.send_input({'type': 'http.request'})
+        await stream.receive_output(1)
+        await stream.receive_output(1)
+        await self._subscribed()
+        subscription = next(iter(broker.subscriptions))
+        subscription.put({'type': 'updated', 'id': 1})
+        subscription.put({'type': 'updated', 'id': 2})
+
+        await stream.receive_output(1)
+        message = await stream.receive_output(1)
+
+        self.assertEqual(message['body'], b'event: resync\ndata: {}\n\n')
+        self.assertFalse(message.get('more_body', False))
+        await stream.wait(1)
+
+    @async_to_sync
+    async def test_websocket_stream(self):
+        """Test events are sent to WebSocket clients as JSON"""
+        socket = ApplicationCommunicator(application, WEBSOCKET_SCOPE)
+        await socket.send_input({'type': 'websocket.connect'})
+        self.assertEqual(await socket.receive_output(1),
+                         {'type': 'websocket.accept'})
+
+        await self._subscribed()
+        broker.dispatch({'type': 'deleted', 'id': 3})
+        message = await socket.receive_output(1)
+        self.assertEqual(json.loads(message['text']),
+                         {'type': 'deleted', 'id': 3})
+
+        await socket.send_input({'type': 'websocket.disconnect',
+                                 'code': 1000})
+        await socket.wait(1)
+
+    @async_to_sync
+    async def test_unknown_websocket_path_closed(self):
+        """Test WebSocket connections to other paths are closed"""
+        socket = ApplicationCommunicator(
+            application, {**WEBSOCKET_SCOPE, 'path': '/ws/other'})
+        await socket.send_input({'type': 'websocket.connect'})
+
+        self.assertEqual(await socket.receive_output(1),
+                         {'type': 'websocket.close'})
+
+
+@override_settings(EVENTS_BACKEND='post.events.LocalBackend',
+                   EVENTS_HEARTBEAT=60)
+class WebSocketServerTests(SimpleTestCase):
+    """Test the WebSocket stream is reachable through the ASGI server"""
+
+    def setUp(self):
+        config = uvicorn.Config(application, host='127.0.0.1', port=0,
+                                lifespan='off', log_level='warning')
+        self.server = uvicorn.Server(config)
+        thread = threading.Thread(target=self.server.run)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(setattr, self.server, 'should_exit', True)
+        deadline = time.monotonic() + 5
+        while not self.server.started:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+
+    def test_handshake(self):
+        """Test a WebSocket client connects and receives events"""
+        url = f'ws://127.0.0.1:{self.port}/ws/posts/events'
+        with connect(url, open_timeout=5) as socket:
+            deadline = time.monotonic() + 5
+            while not broker.subscriptions:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+            broker.dispatch({'type': 'deleted', 'id': 3})
+
+            self.assertEqual(json.loads(socket.recv(timeout=5)),
+                             {'type': 'deleted', 'id': 3})
@@ -0,0 +1,87 @@
+"""
+Tests for the posts export API
+"""
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from post.export import stream_ndjson
+
+EXPORT_URL = reverse('post:post-export')
+
+
+def create_post(user, **params):
+    """Create and return a sample post"""
+    defaults = {
+        'title': 'Test',
+        'content': 'Test',
+        'read_time_min': 2,
+        'keywords': ['keyword1', 'keyword2'],
+    }
+    defaults.update(params)
+    return Post.objects.create(by=user, **defaults)
+
+
+class ExportApiTests(TestCase):
+    """Test streaming export of posts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.post = create_post(self.user, title='First')
+        self.tag = Tag.objects.create(user=self.user, name='python')
+        self.post.tags.add(self.tag)
+        create_post(self.user, title='Second')
+
+    def test_export_ndjson(self):
+        """Test exporting posts as NDJSON streams one post per line"""
+        res = self.client.get(EXPORT_URL, {'format': 'ndjson'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['title'] for row in rows], ['Second', 'First'])
+        self.assertEqual(rows[1]['tags'],
+                         [{'id': self.tag.id, 'name': 'python'}])
+        self.assertEqual(rows[0]['tags'], [])
+
+    def test_export_csv(self):
+        """Test exporting posts as CSV includes a header and tag names"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['title'], 'First')
+        self.assertEqual(rows[1]['tags'], 'python')
+        self.assertEqual(rows[1]['keywords'], 'keyword1, keyword2')
+
+    def test_export_unknown_format(self):
+        """Test requesting an unsupported export format returns 404"""
+        res = self.client.get(EXPORT_URL, {'format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_loaded_per_chunk(self):
+        """Test tags are fetched with one query per chunk of posts"""
+        for i in range(4):
+            create_post(self.user, title=f'Post {i}').tags.add(self.tag)
+
+        with self.assertNumQueries(4):
+            rows = list(stream_ndjson(Post.objects.order_by('id'),
+                                      chunk_size=2))
+
+        self.assertEqual(len(rows), 6)
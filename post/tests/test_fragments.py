@@ -0,0 +1,104 @@
+"""
+Tests for cached post representations in list responses
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from post.serializers import PostDetailSerializer
+
+POSTS_URL = reverse('post:post-list')
+
+
+def create_post(user, title):
+    """Create and return a sample post"""
+    return Post.objects.create(by=user, title=title, content='Test',
+                               read_time_min=2)
+
+
+class FragmentCacheTests(TestCase):
+    """Test list responses splice cached posts"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.tag = Tag.objects.create(user=self.user, name='python')
+        self.posts = [create_post(self.user, f'Post {index}')
+                      for index in range(3)]
+        self.posts[0].tags.add(self.tag)
+
+    def list_posts(self, **params):
+        """Return the listed posts and how many were serialized"""
+        with mock.patch.object(
+                PostDetailSerializer, 'to_representation', autospec=True,
+                side_effect=PostDetailSerializer.to_representation) as rep:
+            res = self.client.get(POSTS_URL, params)
+        return {post['id']: post for post in res.data}, rep.call_count
+
+    def test_only_changed_posts_are_serialized(self):
+        """Test cached posts are reused until their updated_at changes"""
+        _, serialized = self.list_posts()
+        self.assertEqual(serialized, 3)
+
+        self.posts[1].title = 'Renamed'
+        self.posts[1].save()
+        posts, serialized = self.list_posts()
+
+        self.assertEqual(serialized, 1)
+        self.assertEqual(posts[self.posts[1].id]['title'], 'Renamed')
+
+    def test_tag_changes_invalidate(self):
+        """Test adding, renaming and removing tags refreshes the posts"""
+        self.list_posts()
+        other = Tag.objects.create(user=self.user, name='django')
+
+        self.posts[1].tags.add(other)
+        self.tag.name = 'py'
+        self.tag.save()
+        posts, serialized = self.list_posts()
+
+        self.assertEqual(serialized, 2)
+        self.assertEqual(posts[self.posts[0].id]['tags'][0]['name'], 'py')
+        self.assertEqual(posts[self.posts[1].id]['tags'][0]['name'],
+                         'django')
+
+        other.posts.clear()
+        self.tag.delete()
+        posts, serialized = self.list_posts()
+
+        self.assertEqual(serialized, 2)
+        self.assertEqual(posts[self.posts[0].id]['tags'], [])
+        self.assertEqual(posts[self.posts[1].id]['tags'], [])
+
+    def test_view_count_is_not_cached(self):
+        """Test view counts updated in bulk show in cached posts"""
+        self.list_posts()
+        Post.objects.filter(pk=self.posts[2].pk).update(view_count=7)
+
+        posts, serialized = self.list_posts()
+
+        self.assertEqual(serialized, 0)
+        self.assertEqual(posts[self.posts[2].id]['view_count'], 7)
+
+    def test_shapes_are_cached_apart(self):
+        """Test side-loaded tags do not reuse fragments with nested tags"""
+        self.list_posts()
+
+        res = self.client.get(POSTS_URL, {'include': 'tags'})
+        posts, serialized = self.list_posts()
+
+        post = next(post for post in res.data['data']
+                    if post['id'] == self.posts[0].id)
+        self.assertEqual(post['tags'], [self.tag.id])
+        self.assertEqual(serialized, 0)
+        self.assertEqual(posts[self.posts[0].id]['tags'][0]['name'],
+                         'python')
@@ -0,0 +1,111 @@
+"""
+Tests for the import_posts management command
+"""
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+
+from core.models import Post, Tag
+
+
+class ImportPostsCommandTests(TestCase):
+    """Test bulk importing posts"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.existing_tag = Tag.objects.create(user=self.user, name='python')
+
+    def _write(self, content, suffix):
+        """Write content to a temporary file and return its path"""
+        handle = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        )
+        handle.write(content)
+        handle.close()
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def _import(self, content, suffix='.ndjson', **options):
+        out = io.StringIO()
+        call_command('import_posts', self._write(content, suffix),
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def _ndjson(self):
+        rows = [
+            {'title': 'Hello World', 'content': 'a', 'read_time_min': 3,
+             'keywords': 'k1, k2', 'by': self.user.id,
+             'tags': [{'name': 'python'}, {'name': 'django'}]},
+            {'title': 'Second Post', 'content': 'b', 'read_time_min': 1,
+             'status': 'published', 'by': self.user.id,
+             'created_at': '2023-12-01T10:00:00+00:00',
+             'tags': ['django']},
+            {'title': 'No Tags', 'content': 'c', 'read_time_min': 2,
+             'by': self.user.id},
+        ]
+        return '\n'.join(json.dumps(row) for row in rows) + '\n'
+
+    def _assert_imported(self):
+        self.assertEqual(Post.objects.count(), 3)
+        post = Post.objects.get(title='Hello World')
+        self.assertEqual(post.slug, 'hello-world')
+        self.assertEqual(post.keywords, ['k1', 'k2'])
+        self.assertEqual(post.status, 'draft')
+        self.assertEqual(
+            sorted(post.tags.values_list('name', flat=True)),
+            ['django', 'python'],
+        )
+        self.assertIn(self.existing_tag, post.tags.all())
+        self.assertEqual(Tag.objects.filter(name='django').count(), 1)
+        second = Post.objects.get(title='Second Post')
+        self.assertEqual(second.created_at.isoformat(),
+                         '2023-12-01T10:00:00+00:00')
+        self.assertEqual(list(second.tags.values_list('name', flat=True)),
+                         ['django'])
+        self.assertEqual(Post.objects.get(title='No Tags').tags.count(), 0)
+
+    def test_import_ndjson_with_copy(self):
+        """Test importing NDJSON through COPY staging tables"""
+        out = self._import(self._ndjson(), batch_size=2)
+
+        self.assertIn('Imported 3 posts.', out)
+        self._assert_imported()
+
+    def test_import_ndjson_with_orm(self):
+        """Test importing NDJSON through the batched ORM fallback"""
+        self._import(self._ndjson(), batch_size=2, no_copy=True)
+
+        self._assert_imported()
+
+    def test_import_csv_with_author_option(self):
+        """Test importing CSV rows with an author given on the command"""
+        content = (
+            'title,content,read_time_min,keywords,tags\n'
+            'CSV Post,body,4,"a, b","python,rust"\n'
+        )
+        self._import(content, suffix='.csv', by='admin@example.com')
+
+        post = Post.objects.get(title='CSV Post')
+        self.assertEqual(post.by, self.user)
+        self.assertEqual(post.keywords, ['a', 'b'])
+        self.assertEqual(
+            sorted(post.tags.values_list('name', flat=True)),
+            ['python', 'rust'],
+        )
+
+    def test_import_missing_fields_fails(self):
+        """Test rows without required fields abort the import"""
+        content = json.dumps({'title': 'x', 'by': self.user.id})
+
+        with self.assertRaises(CommandError):
+            self._import(content)
+
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,104 @@
+"""
+Tests for side-loading related objects with ?include=
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, Tag
+from core.tests.mixins import QueryInspectionMixin, ViewCounterMixin
+
+POSTS_URL = reverse('post:post-list')
+
+
+def detail_url(post_id):
+    """Return the detail URL for a post"""
+    return reverse('post:post-detail', args=[post_id])
+
+
+class IncludeApiTests(ViewCounterMixin, QueryInspectionMixin,
+                      TestCase):
+    """Test compound documents for posts"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.authors = [
+            get_user_model().objects.create_user(
+                email=f'author{i}@example.com',
+                password='testpass123',
+                name=f'Author {i}',
+            )
+            for i in range(2)
+        ]
+        self.tags = [Tag.objects.create(user=self.authors[0], name=name)
+                     for name in ['python', 'django']]
+
+    def _create_posts(self, count):
+        for i in range(count):
+            post = Post.objects.create(by=self.authors[i % 2],
+                                       title=f'Post {i}', content='c',
+                                       read_time_min=1)
+            post.tags.add(*self.tags[:i % 2 + 1])
+
+    def test_list_without_include_unchanged(self):
+        """Test the list keeps its plain shape without include"""
+        self._create_posts(1)
+
+        res = self.client.get(POSTS_URL)
+
+        self.assertIsInstance(res.data, list)
+        self.assertEqual(res.data[0]['tags'][0]['name'], 'python')
+
+    def test_list_includes_deduplicated_objects(self):
+        """Test authors and tags are side-loaded once each"""
+        self._create_posts(4)
+
+        res = self.client.get(POSTS_URL, {'include': 'author,tags'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['data']), 4)
+        self.assertEqual(res.data['included']['users'], [
+            {'id': author.id, 'name': author.name} for author in self.authors
+        ])
+        self.assertEqual([tag['name'] for tag in res.data['included']['tags']],
+                         ['python', 'django'])
+        post = res.data['data'][0]
+        self.assertIn(post['by'], [author.id for author in self.authors])
+        self.assertTrue(all(isinstance(tag, int) for tag in post['tags']))
+
+    def test_include_query_count_independent_of_page_size(self):
+        """Test related objects load in a fixed number of queries"""
+        self._create_posts(2)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(POSTS_URL, {'include': 'author,tags'})
+
+        self._create_posts(8)
+        with CaptureQueriesContext(connection) as large:
+            res = self.client.get(POSTS_URL, {'include': 'author,tags'})
+
+        self.assertEqual(len(res.data['data']), 10)
+        self.assertEqual(len(small), len(large))
+
+    def test_retrieve_with_include(self):
+        """Test a single post can side-load its author"""
+        self._create_posts(1)
+        post = Post.objects.get()
+
+        res = self.client.get(detail_url(post.id), {'include': 'author'})
+
+        self.assertEqual(res.data['data']['id'], post.id)
+        self.assertEqual(res.data['included'],
+                         {'users': [{'id': self.authors[0].id,
+                                     'name': 'Author 0'}]})
+
+    def test_unknown_include_rejected(self):
+        """Test unknown relations are a validation error"""
+        res = self.client.get(POSTS_URL, {'include': 'author,comments'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('comments', str(res.data['include']))
@@ -0,0 +1,109 @@
+"""
+Tests for normalized post keywords
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post
+from post.keywords import filter_keywords, normalize_keywords
+
+POSTS_URL = reverse('post:post-list')
+
+
+def create_post(user, keywords):
+    """Create and return a sample post with keywords"""
+    return Post.objects.create(by=user, title='Test', content='Test',
+                               read_time_min=2, keywords=keywords)
+
+
+class NormalizeKeywordsTests(TestCase):
+    """Test keywords are normalized before being stored or matched"""
+
+    def test_split_and_deduplicate(self):
+        """Test CSV strings are split, lower cased and deduplicated"""
+        self.assertEqual(
+            normalize_keywords(' Java,  javascript , JAVA,,Deep   Learning'),
+            ['java', 'javascript', 'deep learning'])
+
+    def test_list_items_are_split(self):
+        """Test list items containing commas give several keywords"""
+        self.assertEqual(normalize_keywords(['a, b', 'B', '']), ['a', 'b'])
+
+    def test_empty(self):
+        """Test missing keywords normalize to an empty list"""
+        self.assertEqual(normalize_keywords(None), [])
+
+
+class KeywordsApiTests(TestCase):
+    """Test storing and filtering posts by keywords"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.java = create_post(self.user, ['java', 'spring'])
+        self.js = create_post(self.user, ['javascript', 'react'])
+        self.both = create_post(self.user, ['java', 'javascript'])
+
+    def ids(self, res):
+        return sorted(post['id'] for post in res.data)
+
+    def test_create_from_string(self):
+        """Test a comma separated string is stored as normalized keywords"""
+        res = self.client.post(POSTS_URL, {
+            'title': 'Post', 'content': 'Text', 'read_time_min': 1,
+            'keywords': 'Django, REST,django', 'tags': [],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['keywords'], ['django', 'rest'])
+
+    def test_keyword_too_long(self):
+        """Test keywords longer than the column are rejected"""
+        res = self.client.post(POSTS_URL, {
+            'title': 'Post', 'content': 'Text', 'read_time_min': 1,
+            'keywords': ['x' * 101], 'tags': [],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_is_exact(self):
+        """Test a keyword does not match keywords containing it"""
+        res = self.client.get(POSTS_URL, {'keywords': 'Java'})
+
+        self.assertEqual(self.ids(res), sorted([self.java.id, self.both.id]))
+
+    def test_filter_any(self):
+        """Test posts with any of the keywords are listed by default"""
+        res = self.client.get(POSTS_URL, {'keywords': 'spring,react'})
+
+        self.assertEqual(self.ids(res), sorted([self.java.id, self.js.id]))
+
+    def test_filter_all(self):
+        """Test all the keywords are required with keywords_match=all"""
+        res = self.client.get(POSTS_URL, {'keywords': 'java,javascript',
+                                          'keywords_match': 'all'})
+
+        self.assertEqual(self.ids(res), [self.both.id])
+
+    def test_filter_unknown_match(self):
+        """Test an unknown keywords_match is rejected"""
+        res = self.client.get(POSTS_URL, {'keywords': 'java',
+                                          'keywords_match': 'some'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_uses_gin_index(self):
+        """Test both match modes can be answered from the GIN index"""
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for match in ('any', 'all'):
+            queryset = filter_keywords(Post.objects.order_by(), 'java', match)
+            self.assertIn('core_post_keywords_gin', queryset.explain())
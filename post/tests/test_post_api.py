@@ -12,6 +12,7 @@ from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
 from core.models import Post, User, Tag
+from core.tests.mixins import ViewCounterMixin
 from post.serializers import PostSerializer, PostDetailSerializer
 
 POSTS_URL = reverse("post:post-list")
@@ -22,6 +23,12 @@ def detail_url(post_id):
     return reverse("post:post-detail", args=[post_id])
 
 
+def by_slug_url(post):
+    """Return the date and slug based URL for a post"""
+    return reverse('post:post-by-slug',
+                   args=[post.created_date.isoformat(), post.slug])
+
+
 def image_upload_url(post_id):
     """Create & Return image upload URL for post"""
     return reverse('post:post-upload-image', args=[post_id])
@@ -32,7 +39,7 @@ def create_post(user, **post_params):
         'title': 'Test',
         'content': 'Test',
         'read_time_min': 2,
-        'keywords': "keyword1, keyword2",
+        'keywords': ['keyword1', 'keyword2'],
     }
     defaults.update(post_params)
     return Post.objects.create(by=user, **defaults)
@@ -47,8 +54,9 @@ class PublicPostApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
 
-class PrivatePostApiTests(TestCase):
+class PrivatePostApiTests(ViewCounterMixin, TestCase):
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
         self.admin_user = get_user_model().objects.create_superuser(
             email="admin_user@example.com",
@@ -245,7 +253,7 @@ class PrivatePostApiTests(TestCase):
             self.assertTrue(exists)
 
     def test_search_posts_by_keyword(self):
-        create_post(user=self.admin_user, keywords='my test keyword')
+        create_post(user=self.admin_user, keywords=['my test keyword'])
 
         res = self.client.get(POSTS_URL, {'search': 'my'})
 
@@ -271,6 +279,25 @@ class PrivatePostApiTests(TestCase):
         self.assertIn(s2.data, res.data)
         self.assertNotIn(s3.data, res.data)
 
+    def test_get_post_by_slug(self):
+        """Test retrieving a post by its date and slug"""
+        create_post(self.admin_user, title='Slug Title')
+        post = create_post(self.admin_user, title='Slug Title')
+
+        res = self.client.get(by_slug_url(post))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], post.id)
+        self.assertEqual(res.data['slug'], 'slug-title-2')
+
+    def test_get_post_by_slug_not_found(self):
+        """Test unknown slugs and invalid dates return 404"""
+        url = reverse('post:post-by-slug', args=['2023-02-30', 'missing'])
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
 
 class ImageUploadTests(TestCase):
     """Test for the Image upload endpoint"""
@@ -0,0 +1,192 @@
+"""
+Tests for the related posts API
+"""
+import io
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, RelatedPost, Tag
+from post.related import (build_related_posts, refresh_related_posts,
+                          refresh_related_posts_many)
+
+
+def related_url(post_id):
+    """Return the related posts URL for a post"""
+    return reverse('post:post-related', args=[post_id])
+
+
+class RelatedPostsTests(TestCase):
+    """Test precomputed related posts"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.tags = {
+            name: Tag.objects.create(user=self.user, name=name)
+            for name in ['python', 'django', 'drf', 'rust', 'common']
+        }
+        self.posts = {
+            title: self._post(title, names)
+            for title, names in [
+                ('base', ['python', 'django', 'drf', 'common']),
+                ('close', ['python', 'django', 'drf']),
+                ('far', ['python', 'common']),
+                ('common', ['common', 'rust']),
+                ('unrelated', ['rust']),
+            ]
+        }
+
+    def _post(self, title, tag_names):
+        post = Post.objects.create(by=self.user, title=title, content='c',
+                                   read_time_min=1)
+        post.tags.add(*[self.tags[name] for name in tag_names])
+        return post
+
+    def _related_titles(self, title):
+        return list(
+            RelatedPost.objects.filter(post=self.posts[title])
+            .order_by('-score').values_list('related__title', flat=True)
+        )
+
+    def test_build_related_posts(self):
+        """Test the full build ranks posts by weighted tag overlap"""
+        rows = build_related_posts(k=2, block_size=2)
+
+        self.assertEqual(rows, RelatedPost.objects.count())
+        self.assertEqual(self._related_titles('base'), ['close', 'far'])
+        self.assertEqual(self._related_titles('unrelated'), ['common'])
+        self.assertNotIn('base', self._related_titles('base'))
+
+    def test_related_endpoint(self):
+        """Test the endpoint returns related posts by descending score"""
+        build_related_posts(k=3)
+
+        res = self.client.get(related_url(self.posts['base'].id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['title'] for post in res.data],
+                         ['close', 'far', 'common'])
+
+    def test_refresh_matches_full_build(self):
+        """Test refreshing one post gives the scores of a full build"""
+        build_related_posts(k=3)
+        expected = dict(
+            RelatedPost.objects.filter(post=self.posts['base'])
+            .values_list('related_id', 'score')
+        )
+        RelatedPost.objects.filter(post=self.posts['base']).delete()
+
+        refresh_related_posts(self.posts['base'].id, k=3)
+
+        refreshed = dict(
+            RelatedPost.objects.filter(post=self.posts['base'])
+            .values_list('related_id', 'score')
+        )
+        self.assertEqual(refreshed.keys(), expected.keys())
+        for post_id, score in expected.items():
+            self.assertAlmostEqual(refreshed[post_id], score)
+
+    def _scores(self, titles):
+        return {
+            (post_id, related_id): score for post_id, related_id, score in
+            RelatedPost.objects.filter(post__title__in=titles)
+            .values_list('post_id', 'related_id', 'score')
+        }
+
+    def test_refresh_many_in_one_pass(self):
+        """Test posts refreshed together match a full build in one pass"""
+        build_related_posts(k=3)
+        titles = ['base', 'close', 'far', 'common']
+        expected = self._scores(titles)
+        RelatedPost.objects.all().delete()
+
+        with self.assertNumQueries(11):
+            refresh_related_posts_many(
+                [self.posts[title].id for title in titles], k=3)
+
+        refreshed = self._scores(titles)
+        self.assertEqual(refreshed.keys(), expected.keys())
+        for pair, score in expected.items():
+            self.assertAlmostEqual(refreshed[pair], score)
+        self.assertEqual(self._related_titles('unrelated'), ['common'])
+
+    def test_refresh_refills_lists(self):
+        """Test lists losing a changed post take the next best post"""
+        base = self.posts['base']
+        base.tags.set([self.tags['rust']])
+        build_related_posts(k=2)
+        expected = set(RelatedPost.objects.values_list('post_id',
+                                                       'related_id'))
+        base.tags.set([self.tags['python'], self.tags['django'],
+                       self.tags['drf'], self.tags['common']])
+        build_related_posts(k=2)
+        base.tags.set([self.tags['rust']])
+
+        refresh_related_posts_many([base.id], k=2)
+
+        self.assertEqual(
+            set(RelatedPost.objects.values_list('post_id', 'related_id')),
+            expected)
+
+    @override_settings(RELATED_POSTS_REFRESH_MAX=1)
+    def test_refresh_many_falls_back_to_build(self):
+        """Test refreshing more posts than the limit rebuilds the table"""
+        with patch('post.related.build_related_posts') as build:
+            refresh_related_posts_many(
+                [self.posts['base'].id, self.posts['close'].id], k=3)
+
+        build.assert_called_once_with(3)
+
+    @override_settings(TASKS_EAGER=True, RELATED_POSTS_TOP_K=3)
+    def test_tag_change_refreshes_related(self):
+        """Test changing tags updates the post and its neighbours"""
+        build_related_posts()
+        unrelated = self.posts['unrelated']
+
+        unrelated.tags.add(self.tags['python'], self.tags['django'],
+                           self.tags['drf'])
+
+        self.assertIn('close', self._related_titles('unrelated'))
+        self.assertIn('unrelated', self._related_titles('close'))
+
+        unrelated.tags.clear()
+
+        self.assertEqual(self._related_titles('unrelated'), [])
+        self.assertNotIn('unrelated', self._related_titles('close'))
+
+    @override_settings(TASKS_EAGER=True, RELATED_POSTS_TOP_K=3)
+    def test_clearing_tag_refreshes_related(self):
+        """Test clearing a tag's posts drops scores based on it"""
+        build_related_posts()
+
+        self.tags['rust'].posts.clear()
+
+        self.assertEqual(self._related_titles('unrelated'), [])
+        self.assertNotIn('unrelated', self._related_titles('common'))
+
+    @override_settings(TASKS_EAGER=True, RELATED_POSTS_TOP_K=3)
+    def test_deleting_tag_refreshes_related(self):
+        """Test deleting a tag drops scores based on it"""
+        build_related_posts()
+
+        self.tags['rust'].delete()
+
+        self.assertEqual(self._related_titles('unrelated'), [])
+        self.assertNotIn('unrelated', self._related_titles('common'))
+
+    def test_build_command(self):
+        """Test the command rebuilds the table"""
+        out = io.StringIO()
+
+        call_command('build_related_posts', top_k=1, stdout=out)
+
+        self.assertIn('Stored 5 related posts.', out.getvalue())
@@ -0,0 +1,115 @@
+"""
+Tests for stored HTML renderings of post content
+"""
+import io
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import rendering
+from core.models import Post
+from core.tests.mixins import ViewCounterMixin
+
+
+def detail_url(post_id):
+    """Return the detail URL for a post"""
+    return reverse('post:post-detail', args=[post_id])
+
+
+class PostRenderingTests(ViewCounterMixin, TestCase):
+    """Test rendering post content to HTML at save time"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.post = Post.objects.create(
+            by=self.user,
+            title='Rendered',
+            content='# Title\n\n**bold** <script>alert(1)</script>',
+            read_time_min=1,
+        )
+
+    def test_save_renders_sanitized_html(self):
+        """Test saving a post stores sanitized HTML and the content hash"""
+        self.assertIn('<h1>Title</h1>', self.post.content_html)
+        self.assertIn('<strong>bold</strong>', self.post.content_html)
+        self.assertNotIn('<script>', self.post.content_html)
+        self.assertEqual(self.post.content_hash,
+                         rendering.content_hash(self.post.content))
+        self.assertEqual(self.post.render_version,
+                         rendering.RENDERER_VERSION)
+
+    def test_unchanged_content_not_rerendered(self):
+        """Test saving without content changes skips rendering"""
+        with patch('core.rendering.render_markdown',
+                   wraps=rendering.render_markdown) as render:
+            self.post.title = 'Renamed'
+            self.post.save()
+            render.assert_not_called()
+
+            self.post.content = 'changed'
+            self.post.save(update_fields=['content'])
+            render.assert_called_once_with('changed')
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.content_hash,
+                         rendering.content_hash('changed'))
+
+    def test_render_posts_command_backfills_stale_posts(self):
+        """Test the backfill only renders out of date posts"""
+        Post.objects.filter(pk=self.post.pk).update(
+            content_html='', content_hash='', render_version=0)
+        Post.objects.create(by=self.user, title='Fresh', content='fresh',
+                            read_time_min=1)
+        out = io.StringIO()
+
+        call_command('render_posts', batch_size=1, stdout=out)
+
+        self.assertIn('Rendered 1 of 2 posts.', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertIn('<h1>Title</h1>', self.post.content_html)
+
+    def test_renderer_version_bump_rerenders(self):
+        """Test a new renderer version makes stored renderings stale"""
+        out = io.StringIO()
+        with patch('core.rendering.RENDERER_VERSION',
+                   rendering.RENDERER_VERSION + 1):
+            call_command('render_posts', stdout=out)
+
+        self.assertIn('Rendered 1 of 1 posts.', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.render_version,
+                         rendering.RENDERER_VERSION + 1)
+
+    def test_retrieve_format_html(self):
+        """Test ?format=html returns the stored rendering"""
+        Post.objects.filter(pk=self.post.pk).update(content_html='<p>x</p>')
+
+        res = self.client.get(detail_url(self.post.id), {'format': 'html'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/html; charset=utf-8')
+        self.assertEqual(res.content, b'<p>x</p>')
+
+    def test_retrieve_format_html_not_found(self):
+        """Test errors are escaped when HTML is requested"""
+        res = self.client.get(detail_url(self.post.id + 1),
+                              {'format': 'html'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(res.content, b'Not found.')
+
+    def test_retrieve_json_includes_content_hash(self):
+        """Test the JSON detail exposes the content hash for caching"""
+        res = self.client.get(detail_url(self.post.id))
+
+        self.assertEqual(res.data['content_hash'], self.post.content_hash)
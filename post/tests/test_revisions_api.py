@@ -0,0 +1,188 @@
+"""
+Tests for post revision history
+"""
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, PostRevision
+from post.revisions import (apply_delta, get_revision, make_delta,
+                            record_revision)
+
+
+def revisions_url(post_id):
+    """Return the revision list URL for a post"""
+    return reverse('post:post-revisions', args=[post_id])
+
+
+def revision_url(post_id, number):
+    """Return the URL of one revision of a post"""
+    return reverse('post:post-revision', args=[post_id, number])
+
+
+def restore_url(post_id, number):
+    """Return the URL restoring a revision of a post"""
+    return reverse('post:post-restore-revision', args=[post_id, number])
+
+
+def version(number):
+    """Return multi line content that differs in one line per version"""
+    lines = [f'line {i}\n' for i in range(50)]
+    lines[number % 50] = f'edited in version {number}\n'
+    return ''.join(lines)
+
+
+class PostRevisionTests(TestCase):
+    """Test recording, fetching and restoring post revisions"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            email='admin@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(by=self.user, title='v0',
+                                        content=version(0), read_time_min=1)
+
+    def _edit(self, number):
+        self.post.title = f'v{number}'
+        self.post.content = version(number)
+        self.post.save()
+
+    def test_delta_round_trip(self):
+        """Test applying a delta rebuilds the new text"""
+        old = 'a\nb\nc\nd\n'
+        new = 'a\nB\nc\nd\ne'
+
+        delta = make_delta(old, new)
+
+        self.assertEqual(apply_delta(old, delta), new)
+        self.assertIn([2, 4], delta)
+
+    def test_edits_stored_as_deltas(self):
+        """Test the first revision is a snapshot and edits are deltas"""
+        self._edit(1)
+        self.post.save()
+
+        revisions = list(PostRevision.objects.filter(post=self.post)
+                         .order_by('number'))
+        self.assertEqual([r.is_snapshot for r in revisions], [True, False])
+        self.assertLess(len(str(revisions[1].content)),
+                        len(self.post.content))
+
+    @override_settings(POST_REVISION_SNAPSHOT_INTERVAL=3)
+    def test_snapshots_bound_reconstruction(self):
+        """Test a snapshot is stored every interval revisions"""
+        for number in range(1, 7):
+            self._edit(number)
+
+        snapshots = PostRevision.objects.filter(
+            post=self.post, is_snapshot=True).values_list('number', flat=True)
+        self.assertEqual(sorted(snapshots), [1, 4, 7])
+        for number in range(7):
+            with self.assertNumQueries(1):
+                revision = get_revision(self.post.pk, number + 1)
+            self.assertEqual(revision.content, version(number))
+            self.assertEqual(revision.title, f'v{number}')
+
+    def test_list_and_fetch_revision(self):
+        """Test listing revisions and fetching one with its content"""
+        self._edit(1)
+
+        res = self.client.get(revisions_url(self.post.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['number'] for r in res.data], [2, 1])
+        self.assertNotIn('content', res.data[0])
+
+        res = self.client.get(revision_url(self.post.id, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['content'], version(0))
+
+    def test_fetch_missing_revision(self):
+        """Test fetching a revision that does not exist returns 404"""
+        res = self.client.get(revision_url(self.post.id, 5))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_restore_revision(self):
+        """Test restoring a revision saves it as the newest version"""
+        self._edit(1)
+
+        res = self.client.post(restore_url(self.post.id, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'v0')
+        self.assertEqual(self.post.content, version(0))
+        self.assertEqual(get_revision(self.post.pk, 3).content, version(0))
+
+    def test_restore_requires_admin(self):
+        """Test regular users cannot restore revisions"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.client.force_authenticate(user)
+
+        res = self.client.post(restore_url(self.post.id, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ConcurrentRevisionTests(TransactionTestCase):
+    """Test concurrent edits are recorded in the order they commit"""
+
+    def test_interleaved_edits(self):
+        """Test an edit waits for the revision of the one before it"""
+        user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        post = Post.objects.create(by=user, title='v0', content=version(0),
+                                   read_time_min=1)
+        recording, release = threading.Event(), threading.Event()
+        errors = []
+
+        def record(instance):
+            if instance.content == version(1):
+                recording.set()
+                release.wait(5)
+            return record_revision(instance)
+
+        def edit(number):
+            try:
+                instance = Post.objects.get(pk=post.pk)
+                instance.content = version(number)
+                instance.save()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        with patch('post.signals.record_revision', side_effect=record):
+            first = threading.Thread(target=edit, args=(1,))
+            first.start()
+            self.assertTrue(recording.wait(5))
+            second = threading.Thread(target=edit, args=(2,))
+            second.start()
+            second.join(0.5)
+            blocked = second.is_alive()
+            release.set()
+            first.join(5)
+            second.join(5)
+
+        self.assertEqual(errors, [])
+        self.assertTrue(blocked)
+        post.refresh_from_db()
+        self.assertEqual(post.content, version(2))
+        self.assertEqual(get_revision(post.pk, 3).content, version(2))
+        self.assertEqual(get_revision(post.pk, 2).content, version(1))
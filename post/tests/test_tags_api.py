@@ -10,6 +10,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Tag, Post
+from core.tests.mixins import QueryInspectionMixin
 
 from post.serializers import TagSerializer
 
@@ -24,10 +25,11 @@ def create_user(email='email@example.com', password='<PASSWORD>'):
     return get_user_model().objects.create_user(email=email, password=password)
 
 
-class PublicTagsApiTests(TestCase):
+class PublicTagsApiTests(QueryInspectionMixin, TestCase):
     """Test the publicly available tags API"""
 
     def setUp(self):
+        super().setUp()
         self.client = APIClient()
         self.user = create_user()
 
@@ -42,10 +44,11 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(res.data, serializer.data)
 
 
-class PrivateTagsApiTest(TestCase):
+class PrivateTagsApiTest(QueryInspectionMixin, TestCase):
     """Test the authorized user tags API"""
 
     def setUp(self):
+        super().setUp()
         self.user = get_user_model().objects.create_superuser(
             email='admin@example.com',
             password='<PASSWORD>'
@@ -78,6 +81,15 @@ class PrivateTagsApiTest(TestCase):
         self.assertEquals(res.status_code, status.HTTP_201_CREATED)
         self.assertTrue(exists)
 
+    def test_create_duplicate_tag_rejected(self):
+        """Test creating a tag name the user already has returns 400"""
+        Tag.objects.create(user=self.user, name='test tag')
+
+        res = self.client.post(TAGS_URL, {'name': 'test tag'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.filter(name='test tag').count(), 1)
+
     def test_update_tag(self):
         """Test updating tag for authenticated user"""
         tag = Tag.objects.create(user=self.user, name="test tag")
@@ -0,0 +1,102 @@
+"""
+Tests for post view counters and the trending API
+"""
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Post, TrendingPost
+from core.tests.mixins import ViewCounterMixin
+from post.counters import ViewCounter, flush_views
+
+TRENDING_URL = reverse('post:post-trending')
+
+
+def create_post(user, **params):
+    """Create and return a sample post"""
+    defaults = {'title': 'Test', 'content': 'Test', 'read_time_min': 1}
+    defaults.update(params)
+    return Post.objects.create(by=user, **defaults)
+
+
+class ViewCounterTests(ViewCounterMixin, TestCase):
+    """Test buffering and flushing post views"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='author@example.com',
+            password='testpass123',
+        )
+        self.post = create_post(self.user, title='First')
+        self.other = create_post(self.user, title='Second')
+
+    @override_settings(VIEW_COUNT_FLUSH_INTERVAL=3600,
+                       VIEW_COUNT_FLUSH_SIZE=100)
+    def test_views_buffered_until_flush(self):
+        """Test retrieving a post does not write until the buffer flushes"""
+        counter = ViewCounter()
+        for _ in range(3):
+            counter.record(self.post.id)
+        counter.record(self.other.id)
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 0)
+
+        with self.assertNumQueries(4):
+            counter.flush()
+
+        self.post.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.post.view_count, 3)
+        self.assertEqual(self.other.view_count, 1)
+        self.assertEqual(TrendingPost.objects.get(post=self.post).score, 3)
+
+    @override_settings(VIEW_COUNT_FLUSH_SIZE=1)
+    def test_retrieve_counts_view(self):
+        """Test the detail endpoint records a view"""
+        res = self.client.get(reverse('post:post-detail',
+                                      args=[self.post.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.view_count, 1)
+
+    @override_settings(TRENDING_HALF_LIFE=3600)
+    def test_trending_scores_decay(self):
+        """Test older views count half as much after one half life"""
+        flush_views({self.post.id: 4})
+        TrendingPost.objects.filter(post=self.post).update(
+            updated_at=timezone.now() - datetime.timedelta(hours=1))
+
+        flush_views({self.post.id: 1})
+
+        score = TrendingPost.objects.get(post=self.post).score
+        self.assertAlmostEqual(score, 3, places=2)
+
+    @override_settings(TRENDING_HALF_LIFE=3600)
+    def test_trending_endpoint_orders_by_decayed_score(self):
+        """Test recent views outrank a larger number of old views"""
+        flush_views({self.post.id: 10, self.other.id: 4})
+        TrendingPost.objects.filter(post=self.post).update(
+            updated_at=timezone.now() - datetime.timedelta(hours=2))
+
+        res = self.client.get(TRENDING_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['title'] for post in res.data],
+                         ['Second', 'First'])
+
+    @override_settings(TRENDING_MAX_POSTS=1)
+    def test_trending_table_pruned(self):
+        """Test only the hottest posts are kept in the trending table"""
+        flush_views({self.post.id: 1, self.other.id: 5})
+
+        self.assertEqual(list(TrendingPost.objects.values_list(
+            'post_id', flat=True)), [self.other.id])
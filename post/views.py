@@ -1,21 +1,47 @@
 """
 Views related to posts APIs
 """
+import datetime
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
 )
+from django.db import transaction, IntegrityError
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.authentication import TokenAuthentication
 
 from core.permissions import IsAdminUserOrReadOnly
+from core.throttling import WriteThrottle
+
+from core.models import Post, Tag, TrendingPost
+from post import bulk, serializers
+from post.counters import view_counter, decayed_score
+from post.includes import compound, parse_include, prefetch
+from post.keywords import filter_keywords, search_keywords
+from post.renderers import PostHTMLRenderer
+from post.revisions import get_revision
+from post.sync import changes_since, decode_cursor, encode_cursor, is_expired
+from post.export import (
+    NDJSONRenderer,
+    CSVRenderer,
+    stream_ndjson,
+    stream_csv,
+)
 
-from core.models import Post, Tag
-from post import serializers
+
+INCLUDE_PARAMETER = OpenApiParameter(
+    name='include',
+    type=OpenApiTypes.STR,
+    description='Comma separated relations to side-load: author, tags'
+)
 
 
 @extend_schema_view(
@@ -26,6 +52,19 @@ from post import serializers
                 type=OpenApiTypes.STR,
                 description='Comma separated list of tags id to filter'
             ),
+            OpenApiParameter(
+                name='keywords',
+                type=OpenApiTypes.STR,
+                description='Comma separated list of exact keywords'
+            ),
+            OpenApiParameter(
+                name='keywords_match',
+                type=OpenApiTypes.STR,
+                enum=['any', 'all'],
+                description='Match any or all of the keywords, '
+                            'defaults to any'
+            ),
+            INCLUDE_PARAMETER,
         ]
     )
 )
@@ -35,6 +74,18 @@ class PostViewSet(viewsets.ModelViewSet):
     queryset = Post.objects.all()
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAdminUserOrReadOnly]
+    throttle_classes = [WriteThrottle]
+    # Most queries per request, counting the token lookup
+    query_budgets = {
+        'list': 4,
+        'retrieve': 4,
+        'by_slug': 4,
+        'trending': 4,
+        'related': 4,
+        'changes': 5,
+        'revisions': 3,
+        'revision': 3,
+    }
 
     def _params_to_ints(self, qs):
         """Convert list of string to integers"""
@@ -48,9 +99,135 @@ class PostViewSet(viewsets.ModelViewSet):
 
         return self.serializer_class
 
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action in ('retrieve', 'by_slug'):
+            renderers.append(PostHTMLRenderer())
+        return renderers
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['include'] = getattr(self, 'include', [])
+        return context
+
     def perform_create(self, serializer):
         serializer.save(by=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        self.include = parse_include(request)
+        if not self.include:
+            return super().list(request, *args, **kwargs)
+
+        queryset = prefetch(self.filter_queryset(self.get_queryset()),
+                            self.include)
+        page = self.paginate_queryset(queryset)
+        posts = list(queryset if page is None else page)
+        serializer = self.get_serializer(posts, many=True)
+        body = compound(serializer.data, posts, self.include)
+        if page is not None:
+            return self.get_paginated_response(body)
+        return Response(body)
+
+    def _detail_response(self, post):
+        """Return a post as JSON or, for ?format=html, its stored HTML"""
+        view_counter.record(post.id)
+        if self.request.accepted_renderer.format == 'html':
+            return Response(post.content_html)
+        self.include = parse_include(self.request)
+        serializer = serializers.PostDetailSerializer(
+            post, context=self.get_serializer_context())
+        if self.include:
+            return Response(compound(serializer.data, [post], self.include))
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='format',
+                type=OpenApiTypes.STR,
+                enum=['json', 'html'],
+                description='Use html for the stored content rendering'
+            ),
+            INCLUDE_PARAMETER,
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        return self._detail_response(self.get_object())
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='limit',
+                type=OpenApiTypes.INT,
+                description='Number of posts to return, at most 100'
+            ),
+        ]
+    )
+    @action(methods=['GET'], detail=False, url_path='trending')
+    def trending(self, request):
+        """List the most viewed posts with recent views weighing most"""
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 100)
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        post_ids = list(
+            TrendingPost.objects.annotate(decayed=decayed_score())
+            .order_by('-decayed').values_list('post_id', flat=True)[:limit]
+        )
+        posts = Post.objects.prefetch_related('tags').in_bulk(post_ids)
+        serializer = serializers.PostSerializer(
+            [posts[post_id] for post_id in post_ids if post_id in posts],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='since',
+                type=OpenApiTypes.STR,
+                description='Cursor returned by the previous sync'
+            ),
+            OpenApiParameter(
+                name='limit',
+                type=OpenApiTypes.INT,
+                description='Number of changes to return, at most 500'
+            ),
+        ]
+    )
+    @action(methods=['GET'], detail=False, url_path='changes')
+    def changes(self, request):
+        """List posts changed and deleted since a sync cursor"""
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), 500)
+        except ValueError:
+            raise ValidationError({'limit': ['A valid integer is required.']})
+        position = None
+        since = request.query_params.get('since')
+        if since:
+            try:
+                position = decode_cursor(since)
+            except ValueError as error:
+                raise ValidationError({'since': [str(error)]})
+            if is_expired(position):
+                return Response(
+                    {'detail': 'Cursor expired, fetch all posts again.'},
+                    status=status.HTTP_410_GONE,
+                )
+
+        changes = changes_since(position, max(limit, 1))
+        serializer = serializers.PostSerializer(
+            changes['changed'], many=True,
+            context=self.get_serializer_context())
+        return Response({
+            'changed': serializer.data,
+            'deleted': changes['deleted'],
+            'cursor': (encode_cursor(changes['position'])
+                       if changes['position'] else None),
+            'has_more': changes['has_more'],
+        })
+
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
         """Uploads image to post"""
@@ -63,15 +240,152 @@ class PostViewSet(viewsets.ModelViewSet):
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @action(methods=['GET'], detail=True, url_path='related')
+    def related(self, request, pk=None):
+        """List posts sharing the most tags with this post"""
+        post = self.get_object()
+        posts = Post.objects.filter(related_from__post=post) \
+            .order_by('-related_from__score').prefetch_related('tags')
+        serializer = serializers.PostSerializer(
+            posts, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=True, url_path='revisions')
+    def revisions(self, request, pk=None):
+        """List the saved revisions of a post, newest first"""
+        post = self.get_object()
+        revisions = post.revisions.defer('content')
+        serializer = serializers.PostRevisionSerializer(revisions, many=True)
+        return Response(serializer.data)
+
+    def _get_revision(self, number):
+        post = self.get_object()
+        revision = get_revision(post.pk, int(number))
+        if revision is None:
+            raise NotFound()
+        return post, revision
+
+    @action(methods=['GET'], detail=True,
+            url_path=r'revisions/(?P<number>\d+)')
+    def revision(self, request, pk=None, number=None):
+        """Retrieve a revision of a post with its full content"""
+        post, revision = self._get_revision(number)
+        serializer = serializers.PostRevisionDetailSerializer(revision)
+        return Response(serializer.data)
+
+    @action(methods=['POST'], detail=True,
+            url_path=r'revisions/(?P<number>\d+)/restore')
+    def restore_revision(self, request, pk=None, number=None):
+        """Restore the title and content of a post from a revision"""
+        post, revision = self._get_revision(number)
+        post.title = revision.title
+        post.content = revision.content
+        post.save()
+        serializer = serializers.PostDetailSerializer(
+            post, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(methods=['GET'], detail=False,
+            url_path=r'by-slug/(?P<date>\d{4}-\d{2}-\d{2})/(?P<slug>[-\w]+)')
+    def by_slug(self, request, date=None, slug=None):
+        """Retrieve a post by its creation date and slug"""
+        try:
+            created_date = datetime.date.fromisoformat(date)
+        except ValueError:
+            raise NotFound()
+        post = get_object_or_404(Post, created_date=created_date, slug=slug)
+        self.check_object_permissions(request, post)
+        return self._detail_response(post)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name='format',
+                type=OpenApiTypes.STR,
+                enum=['ndjson', 'csv'],
+                description='Export format, defaults to ndjson'
+            ),
+        ]
+    )
+    @action(methods=['GET'], detail=False, url_path='export',
+            renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """Stream all posts with their tags as NDJSON or CSV"""
+        queryset = self.get_queryset()
+        if request.accepted_renderer.format == 'csv':
+            response = StreamingHttpResponse(stream_csv(queryset),
+                                             content_type='text/csv')
+            response['Content-Disposition'] = \
+                'attachment; filename="posts.csv"'
+            return response
+
+        return StreamingHttpResponse(stream_ndjson(queryset),
+                                     content_type='application/x-ndjson')
+
+    def _bulk(self, serializer_class, operation):
+        """Run a bulk operation on the posts selected by the request"""
+        serializer = serializer_class(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        queryset = bulk.select_posts(data.get('ids'), data.get('filter'))
+        try:
+            ids = operation(queryset, data)
+        except ValueError as error:
+            raise ValidationError({'filter': [str(error)]})
+        return Response({'count': len(ids), 'ids': ids})
+
+    @extend_schema(request=serializers.BulkUpdateSerializer,
+                   responses=serializers.BulkResultSerializer)
+    @action(methods=['POST'], detail=False, url_path='bulk-update')
+    def bulk_update(self, request):
+        """Set the status or read time of many posts in one UPDATE"""
+        return self._bulk(
+            serializers.BulkUpdateSerializer,
+            lambda queryset, data: bulk.update_posts(queryset, {
+                field: data[field] for field in ('status', 'read_time_min')
+                if field in data
+            }),
+        )
+
+    @extend_schema(request=serializers.BulkSelectionSerializer,
+                   responses=serializers.BulkResultSerializer)
+    @action(methods=['POST'], detail=False, url_path='bulk-delete')
+    def bulk_delete(self, request):
+        """Delete many posts at once"""
+        return self._bulk(
+            serializers.BulkSelectionSerializer,
+            lambda queryset, data: bulk.delete_posts(queryset),
+        )
+
+    @extend_schema(request=serializers.BulkRetagSerializer,
+                   responses=serializers.BulkResultSerializer)
+    @action(methods=['POST'], detail=False, url_path='bulk-retag')
+    def bulk_retag(self, request):
+        """Add and remove tags by name on many posts at once"""
+        return self._bulk(
+            serializers.BulkRetagSerializer,
+            lambda queryset, data: bulk.retag_posts(
+                queryset, request.user, data['add'], data['remove']),
+        )
+
     def get_queryset(self):
         queryset = super().get_queryset()
         tags = self.request.query_params.get('tags', None)
-        search_keywords = self.request.query_params.get('search', None)
+        keywords = self.request.query_params.get('keywords', None)
+        search = self.request.query_params.get('search', None)
         if tags:
             tags_ids = self._params_to_ints(tags)
             queryset = queryset.filter(tags__id__in=tags_ids)
-        if search_keywords:
-            queryset = queryset.filter(keywords__icontains=search_keywords)
+        if keywords:
+            match = self.request.query_params.get('keywords_match', 'any')
+            try:
+                queryset = filter_keywords(queryset, keywords, match)
+            except ValueError as error:
+                raise ValidationError({'keywords_match': [str(error)]})
+        if search:
+            queryset = search_keywords(queryset, search)
+        if self.action in ('list', 'retrieve', 'update', 'partial_update'):
+            queryset = queryset.prefetch_related('tags')
         return queryset.order_by('-id').distinct()
 
 
@@ -97,9 +411,26 @@ class TagViewSet(mixins.ListModelMixin,
     queryset = Tag.objects.all()
     authentication_classes = [TokenAuthentication]
     permission_classes = [IsAdminUserOrReadOnly]
+    throttle_classes = [WriteThrottle]
+    query_budgets = {
+        'list': 2,
+    }
+
+    def _save_unique(self, serializer, **kwargs):
+        """Save a tag, reporting a duplicate name as a validation error"""
+        try:
+            with transaction.atomic():
+                serializer.save(**kwargs)
+        except IntegrityError:
+            raise ValidationError(
+                {'name': ['You already have a tag with this name.']}
+            )
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        self._save_unique(serializer, user=self.request.user)
+
+    def perform_update(self, serializer):
+        self._save_unique(serializer)
 
     def get_queryset(self):
         """Filter queryset based on the values of tags"""
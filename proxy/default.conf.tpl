@@ -5,10 +5,26 @@ server{
         alias /vol/static;
     }
 
+    location = /api/posts/events {
+        proxy_pass              http://${EVENTS_HOST}:${EVENTS_PORT};
+        proxy_http_version      1.1;
+        proxy_set_header        Connection "";
+        proxy_buffering         off;
+        proxy_read_timeout      1h;
+    }
+
+    location = /ws/posts/events {
+        proxy_pass              http://${EVENTS_HOST}:${EVENTS_PORT};
+        proxy_http_version      1.1;
+        proxy_set_header        Upgrade websocket;
+        proxy_set_header        Connection upgrade;
+        proxy_read_timeout      1h;
+    }
+
     location / {
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;
         client_max_body_size    1024M;
 
     }
-}
\ No newline at end of file
+}
@@ -6,4 +6,7 @@ python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module main_project.wsgi
\ No newline at end of file
+# The app is loaded once in the master and forked (no --lazy-apps) so
+# workers share its memory; --need-app refuses to start if it fails to load.
+uwsgi --socket :9000 --workers 4 --master --enable-threads \
+    --need-app --module main_project.wsgi
\ No newline at end of file
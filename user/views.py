@@ -4,17 +4,28 @@ Views for the user API
 from rest_framework import generics, authentication, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
+
+from core.throttling import (
+    LoginIPThrottle,
+    LoginEmailThrottle,
+    SignupIPThrottle,
+)
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
+    # No authenticators so credentials are never hashed before throttling.
+    authentication_classes = []
+    throttle_classes = [SignupIPThrottle]
 
 
 class CreateAuthTokenView(ObtainAuthToken):
     """Create a new auth token for user"""
     serializer_class = AuthTokenSerializer
+    authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
 
 